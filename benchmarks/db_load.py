@@ -0,0 +1,156 @@
+"""
+Benchmark concurrent index page requests against the database during a rebuild.
+
+Fills a database with synthetic experiments, then runs concurrent requests that
+each fetch a page of the experiments table and count the matching rows, while a
+background thread repeatedly rewrites every row in one transaction the way a
+rebuild does. This compares pooled connections in WAL mode with opening a new
+connection per request in the default rollback-journal mode.
+
+    python benchmarks/db_load.py --experiments 20000 --threads 16 --requests 200
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from flask import Flask
+
+from mallennlp.services import db as db_service
+from mallennlp.services.db import Tables
+from mallennlp.services.experiment import ExperimentService
+
+
+def make_entries(n_experiments: int, generation: int = 0):
+    return [
+        (f"group_{i // 100}/run_{i:06d}", f"tag-{i % 7} tag-{generation}", i % 2)
+        for i in range(n_experiments)
+    ]
+
+
+def page_query(db) -> None:
+    condition, args = ExperimentService.get_tags_filter(["tag-1"])
+    db.execute(
+        f"SELECT * FROM {Tables.EXPERIMENTS.value} WHERE {condition} "
+        f"ORDER BY path LIMIT 10",
+        args,
+    ).fetchall()
+    db.execute(
+        f"SELECT COUNT(*) FROM {Tables.EXPERIMENTS.value} WHERE {condition}", args
+    ).fetchone()
+
+
+def legacy_request(path: str) -> None:
+    db = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)
+    db.row_factory = sqlite3.Row
+    try:
+        page_query(db)
+    finally:
+        db.close()
+
+
+def pooled_request(app: Flask) -> None:
+    with app.app_context():
+        page_query(db_service.get_db_from_app())
+
+
+def run(mode: str, args) -> None:
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = str(Path(tmpdirname) / "mallennlp.sqlite")
+        if mode == "legacy":
+
+            def connect():
+                db = sqlite3.connect(path)
+                db.row_factory = sqlite3.Row
+                return db
+
+            def request():
+                legacy_request(path)
+
+        else:
+            app = Flask(__name__)
+            app.config.update(DATABASE=path, DB_POOL_SIZE=args.threads)
+            db_service.init_app(app)
+
+            def connect():
+                return db_service._get_db(path)
+
+            def request():
+                pooled_request(app)
+
+        setup_db = connect()
+        db_service.init_tables(setup_db, (Tables.EXPERIMENTS.value,))
+        ExperimentService.init_db_table(
+            db=setup_db, entries=make_entries(args.experiments)
+        )
+        setup_db.close()
+
+        stop = threading.Event()
+        rebuilds = 0
+
+        def rebuild():
+            nonlocal rebuilds
+            db = connect()
+            while not stop.is_set():
+                try:
+                    ExperimentService.init_db_table(
+                        db=db, entries=make_entries(args.experiments, rebuilds)
+                    )
+                    rebuilds += 1
+                except sqlite3.OperationalError:
+                    db.rollback()
+            db.close()
+
+        latencies = []
+        errors = 0
+
+        def timed_request(_):
+            nonlocal errors
+            start = time.perf_counter()
+            try:
+                request()
+            except sqlite3.OperationalError:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+        writer = threading.Thread(target=rebuild)
+        writer.start()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            list(executor.map(timed_request, range(args.requests)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        writer.join()
+
+        latencies.sort()
+        p50 = statistics.median(latencies) * 1000 if latencies else float("nan")
+        p95 = (
+            latencies[int(len(latencies) * 0.95)] * 1000 if latencies else float("nan")
+        )
+        print(
+            f"{mode:>8} {args.requests / elapsed:>10.1f} {p50:>9.2f} {p95:>9.2f} "
+            f"{errors:>7} {rebuilds:>9}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--experiments", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    print(
+        f"{'mode':>8} {'req/s':>10} {'p50 (ms)':>9} {'p95 (ms)':>9} {'errors':>7} {'rebuilds':>9}"
+    )
+    for mode in ("legacy", "pooled"):
+        run(mode, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark the file system calls made to refresh the epoch metrics of an experiment.
+
+Creates a synthetic experiment with a number of epochs, then counts the ``stat``
+and ``open`` calls made by ``ExperimentService.get_epochs`` on each refresh, both
+when nothing changed and when a new epoch was written since the last refresh. This
+is compared with checking every epoch from the first one on each refresh, which is
+what ``get_epochs`` used to do.
+
+    python benchmarks/epoch_syscalls.py --epochs 10 100 200
+"""
+import argparse
+import builtins
+import json
+import os
+from pathlib import Path
+import tempfile
+import time
+
+from mallennlp.domain.experiment import Epoch, FileData
+from mallennlp.services.experiment import ExperimentService
+
+
+class Counter:
+    def __init__(self) -> None:
+        self.stats = 0
+        self.opens = 0
+        self._stat = os.stat
+        self._open = builtins.open
+
+    def __enter__(self) -> "Counter":
+        def stat(*args, **kwargs):
+            self.stats += 1
+            return self._stat(*args, **kwargs)
+
+        def _open(*args, **kwargs):
+            self.opens += 1
+            return self._open(*args, **kwargs)
+
+        os.stat = stat  # type: ignore
+        builtins.open = _open  # type: ignore
+        return self
+
+    def __exit__(self, *args) -> None:
+        os.stat = self._stat  # type: ignore
+        builtins.open = self._open  # type: ignore
+
+
+def legacy_get_epochs(es: ExperimentService):
+    epoch_number = 0
+    epoch_metric_path = es.e.path / (es.EPOCH_METRICS_FNAME % epoch_number)
+    while epoch_metric_path.exists():
+        try:
+            epoch = es.e.epochs[epoch_number]
+        except IndexError:
+            epoch = Epoch(FileData(epoch_metric_path))
+            es.e.epochs.append(epoch)
+        if epoch.metrics.should_read():
+            with open(epoch_metric_path) as f:
+                epoch.metrics.data = json.load(f)
+        epoch_number += 1
+        epoch_metric_path = es.e.path / (es.EPOCH_METRICS_FNAME % epoch_number)
+    return es.e.epochs
+
+
+def write_epoch(path: Path, epoch: int) -> None:
+    with open(path / (ExperimentService.EPOCH_METRICS_FNAME % epoch), "w") as f:
+        json.dump({"epoch": epoch, "validation_loss": 1.0 / (epoch + 1)}, f)
+
+
+def measure(get_epochs, path: Path, n_epochs: int, new_epoch: bool):
+    for epoch in range(n_epochs):
+        write_epoch(path, epoch)
+    es = ExperimentService(path)
+    get_epochs(es)
+    if new_epoch:
+        write_epoch(path, n_epochs)
+    with Counter() as counter:
+        start = time.perf_counter()
+        epochs = get_epochs(es)
+        elapsed = time.perf_counter() - start
+    assert len(epochs) == n_epochs + int(new_epoch)
+    if new_epoch:
+        os.remove(path / (ExperimentService.EPOCH_METRICS_FNAME % n_epochs))
+    return counter.stats, counter.opens, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--epochs", type=int, nargs="+", default=[10, 100, 200])
+    args = parser.parse_args()
+
+    print(
+        f"{'epochs':>7} {'refresh':>10} {'mode':>12} {'stats':>6} {'opens':>6} {'ms':>8}"
+    )
+    for n_epochs in args.epochs:
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = Path(tmpdirname)
+            for new_epoch in (False, True):
+                for mode, get_epochs in (
+                    ("legacy", legacy_get_epochs),
+                    ("incremental", ExperimentService.get_epochs),
+                ):
+                    stats, opens, elapsed = measure(
+                        get_epochs, path, n_epochs, new_epoch
+                    )
+                    refresh = "new epoch" if new_epoch else "unchanged"
+                    print(
+                        f"{n_epochs:>7} {refresh:>10} {mode:>12} {stats:>6} "
+                        f"{opens:>6} {elapsed * 1000:>8.3f}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
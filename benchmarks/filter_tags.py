@@ -0,0 +1,67 @@
+"""
+Benchmark filtering experiments by tags with the indexed ``experiment_tags`` table.
+
+Fills an in-memory database with synthetic experiments, then times the tag filter
+used by the experiments table against the ``HasAllTags`` function, which splits the
+``tags`` column of every row.
+
+    python benchmarks/filter_tags.py --sizes 10000 100000
+"""
+import argparse
+import random
+import time
+
+from mallennlp.services.db import Tables, _get_db, init_tables
+from mallennlp.services.experiment import ExperimentService
+
+
+TAGS = [f"tag-{i}" for i in range(200)]
+
+
+def make_entries(n_experiments: int, tags_per_experiment: int = 5):
+    rng = random.Random(0)
+    return [
+        (
+            f"group_{i // 100}/run_{i:06d}",
+            " ".join(rng.sample(TAGS, tags_per_experiment)),
+        )
+        for i in range(n_experiments)
+    ]
+
+
+def time_query(db, where_clause: str, args, repeats: int):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        count = db.execute(
+            f"SELECT COUNT(*) FROM {Tables.EXPERIMENTS.value} WHERE {where_clause}",
+            args,
+        ).fetchone()[0]
+        best = min(best, time.perf_counter() - start)
+    return best, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--tags", nargs="+", default=["tag-1", "tag-2"])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'experiments':>12} {'matches':>8} {'indexed (s)':>12} {'udf (s)':>10}")
+    for size in args.sizes:
+        db = _get_db(":memory:")
+        init_tables(db, (Tables.EXPERIMENTS.value,))
+        ExperimentService.init_db_table(db=db, entries=make_entries(size))
+        indexed, count = time_query(
+            db, *ExperimentService.get_tags_filter(args.tags), args.repeats
+        )
+        udf_clause = f"HasAllTags(tags, {', '.join('?' for _ in args.tags)})"
+        udf, udf_count = time_query(db, udf_clause, args.tags, args.repeats)
+        assert count == udf_count
+        print(f"{size:>12} {count:>8} {indexed:>12.4f} {udf:>10.4f}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark the throughput of reading a log with ``LogStreamService.readlines``.
+
+Writes a synthetic training log of the given size, then times reading all of it
+with the binary reader (``max_block_size=-1``) and with the text reader that
+``readlines`` used before, which reads the file in blocks of characters and splits
+them into lines (``max_block_size`` > 0). Both keep the last ``--max-lines`` lines.
+
+    python benchmarks/log_stream_read.py --size-mb 1024 --max-lines 10000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from mallennlp.services.log_stream import LogStreamService
+
+
+LINE = (
+    "2019-11-08 11:39:19,104 - INFO - allennlp.training.trainer - "
+    "loss: {:.4f}, accuracy: 0.9812 ||: 100%|##########| 12/12 [00:01<00:00]\n"
+)
+
+
+def write_log(path: str, size_mb: int) -> None:
+    size = size_mb * 1024 * 1024
+    chunk = "".join(LINE.format(i / 1000) for i in range(10000))
+    with open(path, "w") as f:
+        while f.tell() < size:
+            f.write(chunk)
+
+
+def measure(path: str, max_lines: int, max_block_size: int):
+    s = LogStreamService(path, max_lines=max_lines, max_block_size=max_block_size)
+    start = time.perf_counter()
+    lines = s.readlines()
+    elapsed = time.perf_counter() - start
+    return elapsed, s.current_line_number, lines[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--size-mb", type=int, default=1024)
+    parser.add_argument("--max-lines", type=int, default=10000)
+    parser.add_argument(
+        "--block-size",
+        type=int,
+        default=1024 * 1024,
+        help="number of characters per block of the text reader",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = os.path.join(tmpdirname, "stdout.log")
+        write_log(path, args.size_mb)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"{'reader':>6} {'lines':>10} {'seconds':>8} {'MB/s':>8}")
+        results = []
+        for reader, max_block_size in (("text", args.block_size), ("binary", -1)):
+            elapsed, n_lines, last_line = measure(path, args.max_lines, max_block_size)
+            results.append((n_lines, last_line))
+            print(
+                f"{reader:>6} {n_lines:>10} {elapsed:>8.2f} {size_mb / elapsed:>8.1f}"
+            )
+        assert results[0] == results[1]
+
+
+if __name__ == "__main__":
+    main()
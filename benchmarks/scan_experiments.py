@@ -0,0 +1,67 @@
+"""
+Benchmark searching a project for experiments with different numbers of scan workers.
+
+Creates synthetic project trees of increasing size, then times
+``ExperimentService.find_experiments`` for each worker count. Use ``--latency-ms``
+to add an artificial delay to every directory listing, which approximates the
+round-trip cost of a network filesystem.
+
+    python benchmarks/scan_experiments.py --sizes 1000 10000 --workers 1 4 16 --latency-ms 1
+"""
+import argparse
+import os
+from pathlib import Path
+import tempfile
+import time
+
+from mallennlp.services.experiment import ExperimentService
+
+
+def make_tree(root: Path, n_experiments: int, runs_per_group: int = 10) -> None:
+    for i in range(n_experiments):
+        group = i // runs_per_group
+        run = root / f"model_{group % 10}" / f"group_{group}" / f"run_{i:06d}"
+        (run / "vocabulary").mkdir(parents=True)
+        (run / "config.json").write_text("{}")
+        (run / "stdout.log").write_text("")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.latency_ms:
+        scandir = os.scandir
+
+        def slow_scandir(path):
+            time.sleep(args.latency_ms / 1000)
+            return scandir(path)
+
+        os.scandir = slow_scandir  # type: ignore
+
+    print(f"{'experiments':>12} {'workers':>8} {'seconds':>10}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            root = Path(tmpdirname)
+            make_tree(root, size)
+            for workers in args.workers:
+                best = float("inf")
+                for _ in range(args.repeats):
+                    start = time.perf_counter()
+                    found = sum(
+                        1
+                        for _ in ExperimentService.find_experiments(
+                            root, workers=workers
+                        )
+                    )
+                    best = min(best, time.perf_counter() - start)
+                assert found == size
+                print(f"{size:>12} {workers:>8} {best:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
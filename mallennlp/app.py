@@ -16,7 +16,7 @@ from mallennlp.dashboard.callbacks import register_callbacks, store_callback
 from mallennlp.dashboard.page import Page
 from mallennlp.domain.user import AnonymousUser
 from mallennlp.exceptions import InvalidPageParametersError, NotPermittedError
-from mallennlp.services import db, cache
+from mallennlp.services import db, cache, events
 from mallennlp.services.config import Config
 from mallennlp.services.user import UserService
 from mallennlp.services.serde import from_url
@@ -232,6 +232,7 @@ def create_app(config: Config):
 
     db.init_app(app)
     cache.init_app(app, config)
+    events.init_app(app)
 
     login_manager = LoginManager()
     login_manager.init_app(app)
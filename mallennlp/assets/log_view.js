@@ -0,0 +1,190 @@
+/*
+ * Keeps the lines of the log views on the page (see `LogView` in
+ * `mallennlp/dashboard/components.py`) and only renders the lines that are scrolled
+ * into view. New lines arrive as JSON chunks in the hidden chunk element of each
+ * view, and only the last `data-max-lines` lines are kept. Earlier lines arrive
+ * the same way in the hidden history element, and are added to the top, and
+ * replacements for all of the lines arrive in the hidden reset element. Lines found
+ * by a search that's still going arrive in the hidden search element, and are added
+ * to the bottom like new lines.
+ */
+(function() {
+    // Number of lines rendered above and below the visible ones.
+    var OVERSCAN = 50;
+
+    function getView(root) {
+        if (root.logView) {
+            return root.logView;
+        }
+        var viewport = root.querySelector(".log-view-viewport");
+        var spacer = document.createElement("div");
+        spacer.className = "log-view-spacer";
+        var rows = document.createElement("pre");
+        rows.className = "log-view-rows";
+        spacer.appendChild(rows);
+        viewport.appendChild(spacer);
+        var view = {
+            lines: [],
+            chunk: null,
+            history: null,
+            reset: null,
+            search: null,
+            viewport: viewport,
+            spacer: spacer,
+            rows: rows,
+            rowHeight: parseFloat(window.getComputedStyle(rows).lineHeight) || 20
+        };
+        viewport.addEventListener("scroll", function() {
+            render(view);
+        });
+        root.logView = view;
+        return view;
+    }
+
+    function render(view) {
+        var viewport = view.viewport;
+        var rowHeight = view.rowHeight;
+        var first = Math.floor(viewport.scrollTop / rowHeight) - OVERSCAN;
+        var last =
+            Math.ceil((viewport.scrollTop + viewport.clientHeight) / rowHeight) +
+            OVERSCAN;
+        first = Math.max(0, first);
+        last = Math.min(view.lines.length, last);
+        view.spacer.style.height = view.lines.length * rowHeight + "px";
+        view.rows.style.top = first * rowHeight + "px";
+        view.rows.textContent = view.lines.slice(first, last).join("\n");
+    }
+
+    function parseChunk(chunk) {
+        try {
+            return JSON.parse(chunk || "[]");
+        } catch (e) {
+            return [];
+        }
+    }
+
+    function reset(root, chunk) {
+        var view = getView(root);
+        if (chunk === view.reset) {
+            return;
+        }
+        view.reset = chunk;
+        if (!chunk) {
+            return;
+        }
+        var parsed;
+        try {
+            parsed = JSON.parse(chunk);
+        } catch (e) {
+            return;
+        }
+        view.lines = parsed.lines;
+        render(view);
+        view.viewport.scrollTop = view.viewport.scrollHeight;
+        render(view);
+    }
+
+    function prepend(root, history) {
+        var view = getView(root);
+        if (history === view.history) {
+            return;
+        }
+        view.history = history;
+        var lines = parseChunk(history);
+        if (!lines.length) {
+            return;
+        }
+        view.lines = lines.concat(view.lines);
+        render(view);
+        // Keep the same lines in view.
+        view.viewport.scrollTop += lines.length * view.rowHeight;
+        render(view);
+    }
+
+    function search(root, chunk) {
+        var view = getView(root);
+        if (chunk === view.search) {
+            return;
+        }
+        view.search = chunk;
+        var parsed;
+        try {
+            parsed = JSON.parse(chunk || "null");
+        } catch (e) {
+            return;
+        }
+        if (parsed && parsed.lines.length) {
+            addLines(root, view, parsed.lines);
+        }
+    }
+
+    function append(root, chunk) {
+        var view = getView(root);
+        if (chunk === view.chunk) {
+            return;
+        }
+        view.chunk = chunk;
+        addLines(root, view, parseChunk(chunk));
+    }
+
+    function addLines(root, view, lines) {
+        var viewport = view.viewport;
+        var atBottom =
+            viewport.scrollTop + viewport.clientHeight >=
+            viewport.scrollHeight - view.rowHeight;
+        Array.prototype.push.apply(view.lines, lines);
+        var maxLines = parseInt(root.getAttribute("data-max-lines"), 10);
+        var dropped = 0;
+        if (maxLines > 0 && view.lines.length > maxLines) {
+            dropped = view.lines.length - maxLines;
+            view.lines.splice(0, dropped);
+        }
+        render(view);
+        if (atBottom) {
+            // Follow the end of the log.
+            viewport.scrollTop = viewport.scrollHeight;
+        } else if (dropped) {
+            // Keep the same lines in view.
+            viewport.scrollTop -= dropped * view.rowHeight;
+        }
+        render(view);
+    }
+
+    function update() {
+        var roots = document.querySelectorAll(".log-view");
+        for (var i = 0; i < roots.length; i++) {
+            // Resets come first, since the other chunks may have come after them.
+            var resetChunk = roots[i].querySelector(".log-view-reset");
+            if (resetChunk !== null) {
+                reset(roots[i], resetChunk.textContent);
+            }
+            var searchChunk = roots[i].querySelector(".log-view-search");
+            if (searchChunk !== null) {
+                search(roots[i], searchChunk.textContent);
+            }
+            var chunk = roots[i].querySelector(".log-view-chunk");
+            if (chunk !== null) {
+                append(roots[i], chunk.textContent);
+            }
+            var history = roots[i].querySelector(".log-view-history");
+            if (history !== null) {
+                prepend(roots[i], history.textContent);
+            }
+        }
+    }
+
+    function start() {
+        update();
+        new MutationObserver(update).observe(document.body, {
+            childList: true,
+            characterData: true,
+            subtree: true
+        });
+    }
+
+    if (document.readyState === "loading") {
+        document.addEventListener("DOMContentLoaded", start);
+    } else {
+        start();
+    }
+})();
@@ -0,0 +1,66 @@
+/*
+ * Clicks the hidden push triggers on the page (see `PushTrigger` in
+ * `mallennlp/dashboard/components.py`) whenever the server reports that their
+ * topic changed. A single event stream is kept open for all of the triggers on the
+ * page, and it's reopened whenever the set of topics changes.
+ */
+(function() {
+    var source = null;
+    var currentTopics = "";
+
+    function getTriggers() {
+        return document.querySelectorAll(".push-trigger[data-topic]");
+    }
+
+    function onChange(event) {
+        var triggers = getTriggers();
+        for (var i = 0; i < triggers.length; i++) {
+            if (triggers[i].getAttribute("data-topic") === event.data) {
+                triggers[i].click();
+            }
+        }
+    }
+
+    function update() {
+        var triggers = getTriggers();
+        var topics = [];
+        for (var i = 0; i < triggers.length; i++) {
+            var topic = triggers[i].getAttribute("data-topic");
+            if (topics.indexOf(topic) < 0) {
+                topics.push(topic);
+            }
+        }
+        topics.sort();
+        var key = topics.join("\n");
+        if (key === currentTopics) {
+            return;
+        }
+        currentTopics = key;
+        if (source !== null) {
+            source.close();
+            source = null;
+        }
+        if (!topics.length || typeof EventSource === "undefined") {
+            return;
+        }
+        var query = topics.map(function(t) {
+            return "topic=" + encodeURIComponent(t);
+        });
+        source = new EventSource("/events?" + query.join("&"));
+        source.addEventListener("change", onChange);
+    }
+
+    function start() {
+        update();
+        new MutationObserver(update).observe(document.body, {
+            childList: true,
+            subtree: true
+        });
+    }
+
+    if (document.readyState === "loading") {
+        document.addEventListener("DOMContentLoaded", start);
+    } else {
+        start();
+    }
+})();
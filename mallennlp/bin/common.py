@@ -41,3 +41,14 @@ def validate_password(ctx, param, value):
     if not ok:
         raise click.BadParameter(click.style(reason, fg="red"))
     return value
+
+
+def echo_index_update(update):
+    if not update.total:
+        click.secho("No experiments found", fg="yellow")
+        return
+    click.echo(
+        f"Found {click.style(str(update.total), fg='green')} experiments "
+        f"({len(update.added)} added, {len(update.removed)} removed, "
+        f"{len(update.changed)} changed)"
+    )
@@ -1,6 +1,6 @@
 import click
 
-from mallennlp.bin.common import requires_config
+from mallennlp.bin.common import requires_config, echo_index_update
 
 
 @click.group("db")
@@ -43,21 +43,19 @@ def validate_table(ctx, param, value):
     prompt="Are you sure you want to reset this database table?",
 )
 @click.pass_obj
-def reset(db, table: str):
+@requires_config
+def reset(config, db, table: str):
     click.echo(f"Resetting db table {click.style(table, fg='green')}...")
 
     from mallennlp.services.db import init_tables, Tables
-    from mallennlp.services.experiment import ExperimentService
+    from mallennlp.services.indexer import ExperimentIndexer
 
     init_tables(db, (table,))
     if table == Tables.EXPERIMENTS.value:
         # Recursively search project for experiments and populate database.
-        entries = [s.get_db_fields() for s in ExperimentService.find_experiments()]
-        if entries:
-            click.echo(
-                f"Found {click.style(str(len(entries)), fg='green')} experiments"
-            )
-            ExperimentService.init_db_table(db=db, entries=entries)
+        update = ExperimentIndexer(db=db, workers=config.server.scan_workers).update()
+        if update.total:
+            echo_index_update(update)
     db.close()
     click.secho("Success!", fg="green")
 
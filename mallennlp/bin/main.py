@@ -8,7 +8,9 @@ from mallennlp.bin.serve import serve
 from mallennlp.bin.new import new, init
 from mallennlp.bin.edit import edit
 from mallennlp.bin.launch import launch
+from mallennlp.bin.tags import tags_group
 from mallennlp.bin.user import user_group
+from mallennlp.bin.watch import watch
 
 
 @click.group()
@@ -33,6 +35,8 @@ main.add_command(edit)
 main.add_command(launch)
 main.add_command(user_group)
 main.add_command(db_group)
+main.add_command(tags_group)
+main.add_command(watch)
 
 
 if __name__ == "__main__":
@@ -12,8 +12,8 @@ def init_project(
     from mallennlp.domain.config import ProjectConfig, ServerConfig
     from mallennlp.domain.user import Permissions
     from mallennlp.services.db import init_db, get_db_from_cli
-    from mallennlp.services.experiment import ExperimentService
     from mallennlp.services.config import Config
+    from mallennlp.services.indexer import ExperimentIndexer
     from mallennlp.services.user import UserService
 
     if (path / Config.CONFIG_PATH).exists():
@@ -42,18 +42,17 @@ def init_project(
     user_service = UserService(db=db)
     user_service.create(username, password, permissions=Permissions.ADMIN)
 
+    # Save the config to the 'Project.toml' file in the project directory. This
+    # needs to happen before searching for experiments since the indexer reads the
+    # project's ignore options from it.
+    config.to_toml(path)
+
     # Find existing experiments and add to database (does nothing if new project).
-    experiment_entries = [
-        s.get_db_fields() for s in ExperimentService.find_experiments()
-    ]
-    if experiment_entries:
+    update = ExperimentIndexer(path, db=db, workers=config.server.scan_workers).update()
+    if update.total:
         click.echo(
-            f"Found {click.style(str(len(experiment_entries)), fg='green')} existing experiments"
+            f"Found {click.style(str(update.total), fg='green')} existing experiments"
         )
-        ExperimentService.init_db_table(db=db, entries=experiment_entries)
-
-    # Save the config to the 'Project.toml' file in the project directory.
-    config.to_toml(path)
 
     click.echo(f"{verb} project named {click.style(name, fg='green', bold=True)}")
     click.echo(
@@ -96,6 +95,8 @@ def validate_name(ctx, param, value):
 )
 @click.option("--display-name", type=str)
 @click.option("--loglevel", type=click.Choice(["DEBUG", "INFO", "WARNING", "ERROR"]))
+@click.option("--ignore", type=str, multiple=True)
+@click.option("--max-depth", type=int)
 @click.option("--server-image", type=str)
 @click.option("--server-port", type=int)
 @click.option("--server-secret", type=str)
@@ -104,6 +105,11 @@ def validate_name(ctx, param, value):
 @click.option("--server-memory", type=int)
 @click.option("--server-cpus", type=float)
 @click.option("--server-imports", type=str, multiple=True)
+@click.option("--server-db-pool-size", type=int)
+@click.option("--server-scan-workers", type=int)
+@click.option("--server-watch-interval", type=float)
+@click.option("--server-watch-backend", type=click.Choice(["auto", "inotify", "poll"]))
+@click.option("--server-plot-max-points", type=int)
 def new(name: str, username: str, password: str, **kwargs):
     """
     Create a new project directory.
@@ -129,6 +135,8 @@ def new(name: str, username: str, password: str, **kwargs):
 )
 @click.option("--display-name", type=str)
 @click.option("--loglevel", type=click.Choice(["DEBUG", "INFO", "WARNING", "ERROR"]))
+@click.option("--ignore", type=str, multiple=True)
+@click.option("--max-depth", type=int)
 @click.option("--server-image", type=str)
 @click.option("--server-port", type=int)
 @click.option("--server-secret", type=str)
@@ -137,6 +145,11 @@ def new(name: str, username: str, password: str, **kwargs):
 @click.option("--server-memory", type=int)
 @click.option("--server-cpus", type=float)
 @click.option("--server-imports", type=str, multiple=True)
+@click.option("--server-db-pool-size", type=int)
+@click.option("--server-scan-workers", type=int)
+@click.option("--server-watch-interval", type=float)
+@click.option("--server-watch-backend", type=click.Choice(["auto", "inotify", "poll"]))
+@click.option("--server-plot-max-points", type=int)
 def init(username: str, password: str, **kwargs):
     """
     Initialize a project in existing directory.
@@ -1,8 +1,11 @@
+import subprocess
+import sys
+
 import click
 from gevent import monkey
 from gunicorn.app.base import BaseApplication
 
-from mallennlp.bin.common import requires_config
+from mallennlp.bin.common import requires_config, echo_index_update
 
 
 class StandaloneApplication(BaseApplication):
@@ -29,8 +32,11 @@ class StandaloneApplication(BaseApplication):
 @click.command()
 @click.option("--launch", is_flag=True, help="Launch dashboard in browser.")
 @click.option("--skip-db-update", is_flag=True, help="Skip updating the database.")
+@click.option(
+    "--skip-watch", is_flag=True, help="Don't watch the project for experiment changes."
+)
 @requires_config
-def serve(config, launch, skip_db_update):
+def serve(config, launch, skip_db_update, skip_watch):
     """
     Serve the dashboard locally.
     """
@@ -38,20 +44,15 @@ def serve(config, launch, skip_db_update):
 
     from mallennlp.app import create_app
     from mallennlp.services.db import get_db_from_cli, init_tables, Tables
-    from mallennlp.services.experiment import ExperimentService
+    from mallennlp.services.indexer import ExperimentIndexer
 
     if not skip_db_update:
         db = get_db_from_cli(config)
         click.echo("Updating experiments index...")
-        init_tables(db, (Tables.EXPERIMENTS.value,))
-        entries = [s.get_db_fields() for s in ExperimentService.find_experiments()]
-        if entries:
-            click.echo(
-                f"Found {click.style(str(len(entries)), fg='green')} experiments"
-            )
-            ExperimentService.init_db_table(db=db, entries=entries)
-        else:
-            click.secho("No experiments found", fg="yellow")
+        if not ExperimentIndexer.is_ready(db):
+            init_tables(db, (Tables.EXPERIMENTS.value,))
+        update = ExperimentIndexer(db=db, workers=config.server.scan_workers).update()
+        echo_index_update(update)
         db.close()
 
     click.secho(
@@ -75,4 +76,16 @@ def serve(config, launch, skip_db_update):
         "preload_app": True,
     }
 
-    StandaloneApplication(application, options).run()
+    # Keep the experiments database up-to-date in a separate process so that the
+    # request workers never have to scan the project.
+    watcher = None
+    if config.server.watch_interval > 0 and not skip_watch:
+        watcher = subprocess.Popen(
+            [sys.executable, "-m", "mallennlp.bin.main", "watch"]
+        )
+
+    try:
+        StandaloneApplication(application, options).run()
+    finally:
+        if watcher is not None:
+            watcher.terminate()
@@ -0,0 +1,77 @@
+import click
+
+from mallennlp.bin.common import requires_config
+
+
+@click.group("tags")
+@click.pass_context
+@requires_config
+def tags_group(config, ctx):
+    """
+    Manage experiment tags.
+    """
+    from mallennlp.services.db import get_db_from_cli
+
+    db = get_db_from_cli(config)
+    ctx.obj = db
+
+
+def validate_experiments(ctx, param, value):
+    import os
+    from pathlib import Path
+
+    from mallennlp.services.experiment import ExperimentService
+
+    paths = []
+    for path in value:
+        # Experiments are tracked by their path relative to the project root.
+        path = Path(os.path.relpath(path))
+        if not ExperimentService.is_experiment(path):
+            raise click.BadParameter(
+                click.style(
+                    f"{click.style(str(path), bold=True)} is not an experiment",
+                    fg="red",
+                )
+            )
+        paths.append(path)
+    return paths
+
+
+def update_tags(db, paths, add=(), remove=()):
+    from mallennlp.services.experiment import ExperimentService
+
+    with ExperimentService.batch(db=db) as batch:
+        for path in paths:
+            batch.update_tags(ExperimentService(path, db=db), add=add, remove=remove)
+    db.close()
+    click.echo(
+        f"Updated tags of {click.style(str(len(paths)), fg='green')} experiments"
+    )
+
+
+@click.command("add")
+@click.argument("experiments", nargs=-1, required=True, callback=validate_experiments)
+@click.option("-t", "--tag", "tags", multiple=True, required=True, help="Tag to add.")
+@click.pass_obj
+def add(db, experiments, tags):
+    """
+    Add tags to experiments.
+    """
+    update_tags(db, experiments, add=tags)
+
+
+@click.command("remove")
+@click.argument("experiments", nargs=-1, required=True, callback=validate_experiments)
+@click.option(
+    "-t", "--tag", "tags", multiple=True, required=True, help="Tag to remove."
+)
+@click.pass_obj
+def remove(db, experiments, tags):
+    """
+    Remove tags from experiments.
+    """
+    update_tags(db, experiments, remove=tags)
+
+
+tags_group.add_command(add)
+tags_group.add_command(remove)
@@ -0,0 +1,55 @@
+import logging
+
+import click
+
+from mallennlp.bin.common import requires_config
+
+
+@click.command()
+@click.option(
+    "--interval",
+    type=float,
+    help="How often (in seconds) to flush changes to the database. "
+    "Defaults to the 'watch_interval' server setting.",
+)
+@click.option(
+    "--backend",
+    type=click.Choice(["auto", "inotify", "poll"]),
+    help="How to detect changes. Defaults to the 'watch_backend' server setting.",
+)
+@requires_config
+def watch(config, interval, backend):
+    """
+    Keep the experiments database up-to-date as experiments change.
+    """
+    from mallennlp.services.db import get_db_from_cli, init_tables, Tables
+    from mallennlp.services.indexer import ExperimentIndexer
+    from mallennlp.services.watcher import ExperimentWatcher
+
+    if interval is None:
+        interval = config.server.watch_interval
+    if interval <= 0:
+        raise click.ClickException(
+            click.style("watch interval must be positive", fg="red")
+        )
+
+    logging.basicConfig(
+        format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
+        level=getattr(logging, config.project.loglevel.upper()),
+    )
+
+    db = get_db_from_cli(config)
+    if not ExperimentIndexer.is_ready(db):
+        init_tables(db, (Tables.EXPERIMENTS.value,))
+    watcher = ExperimentWatcher(
+        db,
+        interval=interval,
+        backend=backend or config.server.watch_backend,
+        workers=config.server.scan_workers,
+    )
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        db.close()
@@ -0,0 +1,150 @@
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import dash_table
+import numpy as np
+
+from mallennlp.controllers.experiment import (
+    DEFAULT_PLOT_MAX_POINTS,
+    get_metric_plot_xaxis,
+    get_metric_trace,
+)
+from mallennlp.domain.compare import Comparison
+from mallennlp.services.cache import cache
+from mallennlp.services.compare import CompareService
+from mallennlp.services.experiment import ExperimentService
+
+
+DEFAULT_METRIC = "validation_loss"
+
+
+@cache.memoize(timeout=30)
+def get_comparison(paths: Tuple[str, ...]) -> Comparison:
+    """
+    Compare the experiments at ``paths``. The comparison is cached for each set of
+    paths, so changing the metric that's shown doesn't load every experiment again.
+    """
+    return CompareService(
+        [ExperimentService.get_canonical_path(Path(p)) for p in paths]
+    ).get_comparison()
+
+
+def get_metric_options(comparison: Comparison) -> List[Dict[str, str]]:
+    return [{"label": name, "value": name} for name in sorted(comparison.metrics)]
+
+
+def get_default_metric(comparison: Comparison) -> Optional[str]:
+    if DEFAULT_METRIC in comparison.metrics:
+        return DEFAULT_METRIC
+    validation_metrics = [m for m in comparison.metrics if m.startswith("validation_")]
+    if validation_metrics:
+        return sorted(validation_metrics)[0]
+    return None
+
+
+def _to_list(values: np.ndarray) -> List[Optional[float]]:
+    # NaN isn't valid JSON, so missing values are sent as nulls.
+    return [None if np.isnan(v) else v for v in values.tolist()]
+
+
+def get_compare_plot_figure(
+    comparison: Comparison,
+    metric_name: Optional[str],
+    max_points: int = DEFAULT_PLOT_MAX_POINTS,
+):
+    data: List[Dict[str, Any]] = []
+    values = comparison.metrics.get(metric_name) if metric_name else None
+    if metric_name and values is not None:
+        for path, row in zip(comparison.paths, values):
+            data.append(
+                get_metric_trace(
+                    metric_name, comparison.epochs, row, max_points, label=path
+                )
+            )
+    return {
+        "data": data,
+        "layout": {
+            "clickmode": "event+select",
+            "xaxis": {
+                "title": "epoch",
+                **get_metric_plot_xaxis(len(comparison.epochs)),
+            },
+            "yaxis": {"title": metric_name or ""},
+            "margin": {"l": 40, "b": 40, "t": 20, "pad": 2},
+            "uirevision": True,
+        },
+    }
+
+
+def get_summary_table_data(
+    comparison: Comparison, metric_name: Optional[str]
+) -> List[Dict[str, Any]]:
+    if not metric_name:
+        return [{"path": path} for path in comparison.paths]
+    summary = CompareService.get_metric_summary(comparison, metric_name)
+    best = _to_list(summary.best)
+    final = _to_list(summary.final)
+    delta = _to_list(summary.delta)
+    return [
+        {
+            "path": path,
+            "best": best[i],
+            "best_epoch": int(summary.best_epoch[i])
+            if summary.best_epoch[i] >= 0
+            else None,
+            "final": final[i],
+            "delta": delta[i],
+        }
+        for i, path in enumerate(comparison.paths)
+    ]
+
+
+def render_summary_table(comparison: Comparison, metric_name: Optional[str]):
+    number_format = {"specifier": ".4f"}
+    return dash_table.DataTable(
+        id="compare-summary-table",
+        data=get_summary_table_data(comparison, metric_name),
+        columns=[
+            {"id": "path", "name": "Path"},
+            {"id": "best", "name": "Best", "type": "numeric", "format": number_format},
+            {"id": "best_epoch", "name": "Best epoch", "type": "numeric"},
+            {
+                "id": "final",
+                "name": "Final",
+                "type": "numeric",
+                "format": number_format,
+            },
+            {
+                "id": "delta",
+                "name": "Delta (final vs. first)",
+                "type": "numeric",
+                "format": number_format,
+            },
+        ],
+        style_data={"textAlign": "left"},
+        style_header={"textAlign": "left", "fontWeight": "bold"},
+        style_cell={"padding": "10px"},
+        style_table={"overflowX": "scroll"},
+        sort_action="native",
+    )
+
+
+def render_config_diff_table(comparison: Comparison):
+    keys = list(comparison.config_diff)
+    return dash_table.DataTable(
+        id="compare-config-diff-table",
+        data=[
+            {
+                "path": path,
+                **{key: comparison.config_diff[key][i] for key in keys},
+            }
+            for i, path in enumerate(comparison.paths)
+        ],
+        columns=[{"id": "path", "name": "Path"}]
+        + [{"id": key, "name": key} for key in keys],
+        style_data={"textAlign": "left"},
+        style_header={"textAlign": "left", "fontWeight": "bold"},
+        style_cell={"padding": "10px"},
+        style_table={"overflowX": "scroll"},
+        sort_action="native",
+    )
@@ -1,89 +1,418 @@
 from collections import OrderedDict
+from datetime import datetime, timedelta
+import re
 import urllib.parse
 from pathlib import Path
-from typing import Any, List, Dict, Tuple, Set, Optional
+from typing import Any, Iterator, List, Dict, Tuple, Set, Optional
 
 import dash_bootstrap_components as dbc
 import dash_core_components as dcc
 import dash_html_components as html
 import dash_table
+import numpy as np
 
-from mallennlp.domain.experiment import Status
+from mallennlp.domain.experiment import EpochMetrics, Status
 from mallennlp.services.cache import cache
 from mallennlp.services.db import Tables, get_db_from_app
-from mallennlp.services.experiment import ExperimentService
+from mallennlp.services.downsample import downsample
+from mallennlp.services.experiment import ExperimentService, get_config_search_query
 
 
 PAGE_SIZE = 10
 MAX_TAG_BADGES = 10
 
+DEFAULT_PLOT_MAX_POINTS = 1000
+MAX_PLOT_MARKERS = 100
+MAX_EPOCH_TICKS = 20
 
-def parse_filters(filter_expression) -> Tuple[str, List[str]]:
-    filters: List[str] = []
-    filter_args: List[str] = []
+
+FILTER_REGEX = re.compile(
+    r"^\s*\{(?P<column>[^}]+)\}\s*"
+    r"(?P<operator>>=|<=|!=|<|>|=|(?:ge|le|lt|gt|ne|eq|contains|in)\b)"
+    r"\s*(?P<value>.*)$"
+)
+
+FILTER_OPERATORS = {
+    "ge": ">=",
+    "le": "<=",
+    "lt": "<",
+    "gt": ">",
+    "ne": "!=",
+    "eq": "=",
+    ">=": ">=",
+    "<=": "<=",
+    "<": "<",
+    ">": ">",
+    "!=": "!=",
+    "=": "=",
+    "contains": "contains",
+    "in": "in",
+}
+
+PARAM_COLUMN_PREFIX = "param:"
+"""
+Columns of config parameters have IDs like "param:trainer.optimizer.lr".
+"""
+
+NUMERIC_COLUMNS = {
+    "epochs",
+    "best_epoch",
+    "training_duration",
+    "best_validation_metric",
+}
+
+SORTABLE_COLUMNS = set(ExperimentService.DB_FIELD_NAMES)
+
+
+def iter_filters(filter_expression) -> Iterator[Tuple[str, str, str]]:
+    """
+    Iterate over the ``(column_id, operator, value)`` of each part of a filter
+    expression, skipping parts that are malformed or have empty values.
+    """
     for filter_part in filter_expression.split(" && "):
-        # Filter part looks like `{column_id} contains input_value`
-        name_part, value = filter_part.split(" contains ", 1)
-        col_name = name_part[name_part.find("{") + 1 : name_part.rfind("}")]
-        value = value.strip()
+        # Filter part looks like `{column_id} operator input_value`
+        match = FILTER_REGEX.match(filter_part)
+        if not match:
+            continue
+        col_name = match.group("column")
+        operator = FILTER_OPERATORS[match.group("operator")]
+        value = match.group("value").strip()
+        if len(value) > 1 and value[0] == value[-1] and value[0] in ("'", '"', "`"):
+            value = value[1:-1]
         if not value:
             continue
+        yield col_name, operator, value
+
+
+def parse_list(value: str) -> List[str]:
+    """
+    Get the items of a list like `(a, 'b')` in the value of an 'in' filter.
+    """
+    values = [v.strip() for v in value.strip("()[]").split(",")]
+    return [v.strip("'\"") for v in values if v]
+
+
+def parse_filters(
+    filter_expression, search_configs: bool = True
+) -> Tuple[str, List[Any]]:
+    """
+    Get a SQL condition on the experiments table, along with its arguments, from a
+    filter expression. If ``search_configs`` is false the full-text search of
+    configs is left out, for queries that join the matching configs instead.
+    """
+    filters: List[str] = []
+    filter_args: List[Any] = []
+    for col_name, operator, value in iter_filters(filter_expression):
         if col_name == "path":
-            # Interpret filter for 'path' column as a GLOB.
-            filters.append("path GLOB ?")
-            filter_args.append(value)
+            if operator == "contains":
+                # Interpret filter for 'path' column as a GLOB.
+                filters.append("path GLOB ?")
+                filter_args.append(value)
+            elif operator == "in":
+                paths = parse_list(value)
+                if not paths:
+                    continue
+                filters.append(f"path IN ({', '.join('?' for _ in paths)})")
+                filter_args.extend(paths)
+            else:
+                filters.append(f"path {operator} ?")
+                filter_args.append(value)
         elif col_name == "tags":
-            # Interpret filter for 'tags' column as a 'HasAllTags' query.
+            # Interpret filter for 'tags' column as matching all of the tags.
             tags = [t for t in value.split(" ") if t]
-            filters.append(f"HasAllTags(tags, {', '.join('?' for _ in tags)})")
-            filter_args.extend(tags)
+            if not tags:
+                continue
+            condition, args = ExperimentService.get_tags_filter(tags)
+            filters.append(condition)
+            filter_args.extend(args)
+        elif col_name == "config":
+            if not search_configs:
+                continue
+            # Interpret filter for 'config' column as a full-text search.
+            condition, args = ExperimentService.get_config_filter(value)
+            filters.append(condition)
+            filter_args.extend(args)
         elif col_name == "finished":
             if value.lower() in ("yes", "finished", "done", "success"):
                 filters.append("finished = 1")
             elif value.lower() == "no":
                 filters.append("finished = 0")
+        elif col_name == "status":
+            value = value.upper().replace(" ", "_")
+            if operator == "contains":
+                filters.append("status LIKE ?")
+                filter_args.append(f"%{value}%")
+            elif operator in ("=", "!="):
+                filters.append(f"status {operator} ?")
+                filter_args.append(value)
+        elif col_name.startswith(PARAM_COLUMN_PREFIX):
+            # Interpret filter for a parameter column as a comparison with the
+            # parameter's value. 'in' takes a list of values like `(a, b)`.
+            if operator == "in":
+                values = parse_list(value)
+            else:
+                values = [value]
+            if not values:
+                continue
+            condition, args = ExperimentService.get_param_filter(
+                col_name[len(PARAM_COLUMN_PREFIX) :], operator, values
+            )
+            filters.append(condition)
+            filter_args.extend(args)
+        elif col_name in NUMERIC_COLUMNS:
+            try:
+                number = float(value)
+            except ValueError:
+                continue
+            if operator in ("contains", "in"):
+                operator = "="
+            filters.append(f"{col_name} {operator} ?")
+            filter_args.append(number)
     return " AND ".join(filters), filter_args
 
 
+def get_config_search(filter_expression) -> Optional[str]:
+    """
+    Get the full-text search of configs from a filter expression, if there is one.
+    """
+    for col_name, _, value in iter_filters(filter_expression):
+        if col_name == "config":
+            return value
+    return None
+
+
+def format_duration(seconds: Optional[float]) -> Optional[str]:
+    if seconds is None:
+        return None
+    return str(timedelta(seconds=int(seconds)))
+
+
+def format_table_row(row) -> Dict[str, Any]:
+    best_validation_metric = row["best_validation_metric"]
+    if best_validation_metric is not None:
+        best_validation_metric = (
+            f"{best_validation_metric:.4f} ({row['validation_metric']})"
+        )
+    return {
+        "path": row["path"],
+        "config": (
+            row["config"].replace("\n", "; ") if "config" in row.keys() else None
+        ),
+        "tags": row["tags"],
+        "finished": "Yes" if row["finished"] else "No",
+        "status": row["status"],
+        "epochs": row["epochs"],
+        "best_epoch": row["best_epoch"],
+        "best_validation_metric": best_validation_metric,
+        "training_duration": format_duration(row["training_duration"]),
+        "mtime": (
+            datetime.fromtimestamp(row["mtime"]).strftime("%Y-%m-%d %H:%M")
+            if row["mtime"] is not None
+            else None
+        ),
+    }
+
+
+def get_sort(sort_by: List[Dict[str, Any]] = None) -> Tuple[str, str]:
+    """
+    Get the column and direction to sort the experiments table by.
+    """
+    if sort_by and (
+        sort_by[0]["column_id"] in SORTABLE_COLUMNS
+        or sort_by[0]["column_id"].startswith(PARAM_COLUMN_PREFIX)
+    ):
+        sort_field = sort_by[0]["column_id"]
+        sort_direction = "ASC" if sort_by[0]["direction"] == "asc" else "DESC"
+        return sort_field, sort_direction
+    return "path", "ASC"
+
+
+def get_seek_condition(
+    sort_field: str, sort_direction: str, bookmark: List[Any]
+) -> Tuple[str, List[Any]]:
+    """
+    Get a SQL condition that matches the rows that come after the row with the
+    sort key ``bookmark``, i.e. ``[sort_value, path]``, when the rows are ordered by
+    ``sort_field`` and then by ``path`` (both in ``sort_direction``).
+
+    SQLite puts NULLs first in ascending order and last in descending order, so
+    rows where the sort column is NULL need special handling.
+    """
+    value, path = bookmark
+    op = ">" if sort_direction == "ASC" else "<"
+    if sort_field == "path":
+        return f"path {op} ?", [path]
+    if value is None:
+        if sort_direction == "ASC":
+            return (
+                f"(({sort_field} IS NULL AND path > ?) OR {sort_field} IS NOT NULL)",
+                [path],
+            )
+        return f"({sort_field} IS NULL AND path < ?)", [path]
+    condition = f"{sort_field} {op} ? OR ({sort_field} = ? AND path {op} ?)"
+    if sort_direction == "DESC":
+        condition += f" OR {sort_field} IS NULL"
+    return f"({condition})", [value, value, path]
+
+
+@cache.memoize(timeout=30)
+def get_row_count(filter_expression: str = None) -> int:
+    """
+    Get the number of experiments that match the filter expression.
+    """
+    db = get_db_from_app()
+    where_clause = ""
+    args: List[Any] = []
+    if filter_expression:
+        where_clause, args = parse_filters(filter_expression)
+    cursor = db.execute(
+        f"SELECT COUNT(*) FROM {Tables.EXPERIMENTS.value} "
+        + (f"WHERE {where_clause}" if where_clause else ""),
+        args,
+    )
+    return cursor.fetchone()[0]
+
+
+def get_page_count(page_size: int = PAGE_SIZE, filter_expression: str = None) -> int:
+    return max(1, -(-get_row_count(filter_expression) // page_size))
+
+
 def get_dash_table_data(
     page: int = 0,
     page_size: int = PAGE_SIZE,
     sort_by: List[Dict[str, Any]] = None,
     filter_expression: str = None,
+    bookmarks: Dict[int, List[Any]] = None,
+    param_keys: List[str] = None,
 ):
+    """
+    Get the rows for a page of the experiments table, including the values of the
+    config parameters in ``param_keys``.
+
+    Instead of skipping over the rows of all of the previous pages with an offset, which
+    gets slower the further one pages into the table, the page is found by seeking
+    past the sort key of the last row of a previous page. These keys are looked up
+    in ``bookmarks``, a mapping from page numbers to sort keys, which is updated with
+    the key of the last row of the page. When the previous page hasn't been seen we
+    seek from the closest page before it that has, and skip the rest with an offset.
+
+    Seeking also keeps the pages consistent when experiments are added while paging,
+    since rows that were already shown can't shift onto the next page.
+    """
     db = get_db_from_app()
-    offset = page * page_size
-    if sort_by:
-        sort_field = sort_by[0]["column_id"]
-        sort_direction = "ASC" if sort_by[0]["direction"] == "asc" else "DESC"
-    else:
-        sort_field = "path"
-        sort_direction = "ASC"
-    if filter_expression and " contains " in filter_expression:
-        where_clause, args = parse_filters(filter_expression)
-        cursor = db.execute(
-            f"SELECT * "
-            f"FROM {Tables.EXPERIMENTS.value} "
-            f"WHERE {where_clause} "
-            f"ORDER BY {sort_field} {sort_direction} "
-            f"LIMIT {offset}, {page_size}",
-            args,
+    if bookmarks is None:
+        bookmarks = {}
+    sort_field, sort_direction = get_sort(sort_by)
+    columns = "*"
+    source = Tables.EXPERIMENTS.value
+    filters, args = [], []
+    if sort_field.startswith(PARAM_COLUMN_PREFIX):
+        columns += (
+            f", (SELECT COALESCE(num_value, str_value) "
+            f"FROM {ExperimentService.PARAMS_TABLE} "
+            f"WHERE {ExperimentService.PARAMS_TABLE}.path = "
+            f"{Tables.EXPERIMENTS.value}.path AND key = ?) AS param_value"
         )
-    else:
-        cursor = db.execute(
-            f"SELECT * "
-            f"FROM {Tables.EXPERIMENTS.value} "
-            f"ORDER BY {sort_field} {sort_direction} "
-            f"LIMIT {offset}, {page_size}"
+        args.append(sort_field[len(PARAM_COLUMN_PREFIX) :])
+        sort_field = "param_value"
+    if filter_expression:
+        config_search = get_config_search(filter_expression)
+        if config_search is not None:
+            # Join the matching configs to get a snippet of the match and its rank,
+            # and order the results by rank unless another order was requested.
+            source += (
+                f" JOIN (SELECT path AS config_path, rank, "
+                f"snippet({ExperimentService.CONFIGS_TABLE}, 1, '', '', '...', 8) AS config "
+                f"FROM {ExperimentService.CONFIGS_TABLE} "
+                f"WHERE {ExperimentService.CONFIGS_TABLE} MATCH ?) "
+                f"ON config_path = path"
+            )
+            args.append(get_config_search_query(config_search))
+            if not sort_by:
+                sort_field = "rank"
+        # The JOIN above already only keeps the experiments with matching configs.
+        where_clause, filter_args = parse_filters(
+            filter_expression, search_configs=config_search is None
         )
-    return [
-        {
-            "path": row["path"],
-            "tags": row["tags"],
-            "finished": "Yes" if row["finished"] else "No",
-        }
-        for row in cursor
-    ]
+        if where_clause:
+            filters.append(where_clause)
+            args.extend(filter_args)
+    offset = page * page_size
+    previous_pages = [p for p in bookmarks if p < page]
+    if previous_pages:
+        bookmarked_page = max(previous_pages)
+        seek_condition, seek_args = get_seek_condition(
+            sort_field, sort_direction, bookmarks[bookmarked_page]
+        )
+        filters.append(seek_condition)
+        args = args + seek_args
+        offset = (page - bookmarked_page - 1) * page_size
+    cursor = db.execute(
+        f"SELECT {columns} "
+        f"FROM {source} "
+        + (f"WHERE {' AND '.join(filters)} " if filters else "")
+        + f"ORDER BY {sort_field} {sort_direction}, path {sort_direction} "
+        f"LIMIT ? OFFSET ?",
+        args + [page_size, offset],
+    )
+    rows = cursor.fetchall()
+    if rows:
+        bookmarks[page] = [rows[-1][sort_field], rows[-1]["path"]]
+    data = [format_table_row(row) for row in rows]
+    if param_keys and data:
+        param_values = get_param_values([row["path"] for row in data], param_keys)
+        for row in data:
+            row.update(param_values.get(row["path"], {}))
+    return data
+
+
+def get_param_values(
+    paths: List[str], param_keys: List[str]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Get the values of config parameters for the experiments table, as a mapping
+    from experiment paths to a mapping from column IDs to values.
+    """
+    db = get_db_from_app()
+    cursor = db.execute(
+        f"SELECT path, key, COALESCE(num_value, str_value) AS value "
+        f"FROM {ExperimentService.PARAMS_TABLE} "
+        f"WHERE path IN ({', '.join('?' for _ in paths)}) "
+        f"AND key IN ({', '.join('?' for _ in param_keys)})",
+        list(paths) + list(param_keys),
+    )
+    values: Dict[str, Dict[str, Any]] = {}
+    for row in cursor:
+        values.setdefault(row["path"], {})[PARAM_COLUMN_PREFIX + row["key"]] = row[
+            "value"
+        ]
+    return values
+
+
+def get_table_columns(param_keys: List[str] = None) -> List[Dict[str, Any]]:
+    """
+    Get the columns of the experiments table, with a column for each of the config
+    parameters in ``param_keys``.
+    """
+    return (
+        [
+            {"id": "path", "name": "Path"},
+            {"id": "tags", "name": "Tags"},
+            {"id": "finished", "name": "Finished"},
+            {"id": "status", "name": "Status"},
+            {"id": "epochs", "name": "Epochs", "type": "numeric"},
+            {"id": "best_epoch", "name": "Best epoch", "type": "numeric"},
+            {
+                "id": "best_validation_metric",
+                "name": "Best validation metric",
+                "type": "numeric",
+            },
+            {"id": "training_duration", "name": "Duration", "type": "numeric"},
+            {"id": "mtime", "name": "Last modified"},
+        ]
+        + [{"id": PARAM_COLUMN_PREFIX + key, "name": key} for key in param_keys or []]
+        + [{"id": "config", "name": "Config"}]
+    )
 
 
 def render_dash_table(filter_query: str = None):
@@ -91,11 +420,7 @@ def render_dash_table(filter_query: str = None):
     return dash_table.DataTable(
         id="experiments-table",
         #  data=get_dash_table_data(filter_expression=filter_query),
-        columns=[
-            {"id": "path", "name": "Path"},
-            {"id": "tags", "name": "Tags"},
-            {"id": "finished", "name": "Finished"},
-        ],
+        columns=get_table_columns(),
         #  style_as_list_view=True,
         style_data={"textAlign": "left"},
         style_header={"textAlign": "left", "fontWeight": "bold"},
@@ -110,7 +435,15 @@ def render_dash_table(filter_query: str = None):
                 "height": "auto",
                 "minWidth": "0px",
                 "maxWidth": "200px",
-            }
+            },
+            # Same for snippets of matching configs.
+            {
+                "if": {"column_id": "config"},
+                "whiteSpace": "normal",
+                "height": "auto",
+                "minWidth": "0px",
+                "maxWidth": "300px",
+            },
         ],
         style_data_conditional=[
             {
@@ -137,8 +470,17 @@ def render_dash_table(filter_query: str = None):
 @cache.memoize(timeout=60 * 5)
 def get_all_tags() -> Set[str]:
     db = get_db_from_app()
-    cursor = db.execute(f"SELECT tags FROM {Tables.EXPERIMENTS.value}")
-    return set(t for r in cursor for t in r["tags"].split(" ") if t)
+    cursor = db.execute(f"SELECT DISTINCT tag FROM {ExperimentService.TAGS_TABLE}")
+    return set(r["tag"] for r in cursor)
+
+
+@cache.memoize(timeout=60 * 5)
+def get_all_param_keys() -> List[str]:
+    db = get_db_from_app()
+    cursor = db.execute(
+        f"SELECT DISTINCT key FROM {ExperimentService.PARAMS_TABLE} ORDER BY key"
+    )
+    return [r["key"] for r in cursor]
 
 
 @cache.memoize(timeout=30)
@@ -300,65 +642,107 @@ def get_path_breadcrumbs(path: Path):
     return parts
 
 
-def get_metric_plot_figure(es: ExperimentService, metric_name: str):
-    epochs = es.get_epochs()
+def get_metric_trace(
+    name: str,
+    x: np.ndarray,
+    y: np.ndarray,
+    max_points: int = DEFAULT_PLOT_MAX_POINTS,
+    label: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Get a plot trace of a metric, downsampled to at most ``max_points`` points.
+    The trace is named by ``label`` if given, otherwise by the metric name.
+    Hover text is formatted by Plotly in the browser.
+    """
+    x, y = downsample(x, y, max_points)
+    return {
+        "name": label or name,
+        "x": x.tolist(),
+        "y": y.tolist(),
+        "mode": "lines+markers" if len(x) <= MAX_PLOT_MARKERS else "lines",
+        "hovertemplate": f"epoch %{{x}} {name}: %{{y:.4f}}<extra>{label or ''}</extra>",
+    }
 
-    training_metric_name = f"training_{metric_name}"
-    validation_metric_name = f"validation_{metric_name}"
-    x_vals = list(range(len(epochs)))
 
-    training_metrics: List[float] = []
-    validation_metrics: List[float] = []
-    for epoch in epochs:
-        metrics = epoch.metrics.data
-        if metrics is None:
-            continue
-        t = metrics.get(training_metric_name)
-        if t:
-            training_metrics.append(t)
-        v = metrics.get(validation_metric_name)
-        if v:
-            validation_metrics.append(v)
-
-    data: List[Dict[str, Any]] = []
-    if len(training_metrics) == len(epochs):
-        data.append(
-            {
-                "name": training_metric_name,
-                "x": x_vals,
-                "y": training_metrics,
-                "mode": "lines+markers",
-                "hoverinfo": "text",
-                "text": [
-                    f"epoch {i} {training_metric_name}: {m:.4f}"
-                    for i, m in enumerate(training_metrics)
-                ],
-            }
-        )
-    if len(validation_metrics) == len(epochs):
-        data.append(
-            {
-                "name": validation_metric_name,
-                "x": x_vals,
-                "y": validation_metrics,
-                "mode": "lines+markers",
-                "hoverinfo": "text",
-                "text": [
-                    f"epoch {i} {validation_metric_name}: {m:.4f}"
-                    for i, m in enumerate(validation_metrics)
-                ],
-            }
-        )
+def get_metric_plot_xaxis(n_epochs: int) -> Dict[str, Any]:
+    if n_epochs <= MAX_EPOCH_TICKS:
+        # One tick for each epoch.
+        return {"tickformat": "d", "dtick": 1}
+    return {"tickformat": "d", "nticks": MAX_EPOCH_TICKS}
+
+
+def get_metric_plot_traces(epoch_metrics: EpochMetrics, metric_name: str) -> List[str]:
+    """
+    Get the names of the columns that are plotted for a metric.
+    """
+    traces: List[str] = []
+    for prefix in ("training_", "validation_"):
+        name = prefix + metric_name
+        column = epoch_metrics.columns.get(name)
+        # A metric is only plotted if every epoch reported it.
+        if column is not None and not np.isnan(column).any():
+            traces.append(name)
+    return traces
+
+
+def get_metric_plot_figure(
+    es: ExperimentService,
+    metric_name: str,
+    max_points: int = DEFAULT_PLOT_MAX_POINTS,
+):
+    epoch_metrics = es.get_epoch_metrics()
+    epochs = epoch_metrics.epochs
+
+    data: List[Dict[str, Any]] = [
+        get_metric_trace(name, epochs, epoch_metrics.columns[name], max_points)
+        for name in get_metric_plot_traces(epoch_metrics, metric_name)
+    ]
     return {
         "data": data,
         "layout": {
             "clickmode": "event+select",
-            "xaxis": {
-                "range": [0, len(epochs) - 0.5],
-                "tickvals": list(range(len(epochs))),
-                "ticktext": [str(i) for i in range(0, len(epochs))],
-            },
+            "xaxis": get_metric_plot_xaxis(len(epochs)),
             "margin": {"l": 40, "b": 30, "t": 20, "pad": 2},
             "uirevision": True,
         },
     }
+
+
+def get_metric_plot_extension(
+    es: ExperimentService,
+    metric_name: str,
+    traces: List[str],
+    n_epochs_sent: int,
+    run_sent: Optional[float],
+    max_points: int = DEFAULT_PLOT_MAX_POINTS,
+) -> Optional[Tuple[Dict[str, List[List[Any]]], List[int]]]:
+    """
+    Get the points of the epochs after the first ``n_epochs_sent`` for each of the
+    ``traces`` of a metric plot, in the form that a graph's ``extendData`` takes.
+    ``run_sent`` is the ``EpochMetrics.first_lastmod`` of the epochs in the plot, which
+    tells them apart from the epochs of a run that was restarted since.
+
+    Returns ``None`` if the plot can't just be extended and has to be replaced: if
+    the run was restarted, if epochs were removed, if the plot would need to be downsampled or formatted
+    differently with the new epochs, or if the traces that would be plotted now
+    aren't the ones that were, e.g. because the plot was empty before the first
+    epoch or one of the traces is missing values.
+    """
+    epoch_metrics = es.get_epoch_metrics()
+    n_epochs = len(epoch_metrics.epochs)
+    if epoch_metrics.first_lastmod != run_sent:
+        return None
+    if n_epochs < n_epochs_sent or n_epochs > max_points:
+        return None
+    for threshold in (MAX_EPOCH_TICKS, MAX_PLOT_MARKERS):
+        if n_epochs_sent <= threshold < n_epochs:
+            return None
+    if not traces or get_metric_plot_traces(epoch_metrics, metric_name) != traces:
+        return None
+    x: List[List[Any]] = []
+    y: List[List[Any]] = []
+    for name in traces:
+        column = epoch_metrics.columns[name]
+        x.append(epoch_metrics.epochs[n_epochs_sent:].tolist())
+        y.append(column[n_epochs_sent:].tolist())
+    return {"x": x, "y": y}, list(range(len(traces)))
@@ -1,7 +1,95 @@
-import dash_html_components as html
+from collections import deque
+import json
+import re
+import time
+from typing import Iterable, List, Optional, Pattern
 
-from mallennlp.services.log_stream import Line
+from mallennlp.services.log_stream import Line, LogStreamService, SearchCursor
 
 
-def format_log_line(line: Line):
-    return html.Pre(f"{line.number}:  {line.content}")
+DEFAULT_MAX_LINES = 10000
+"""
+Maximum number of lines kept by the log stream page, both on the server and in the
+browser.
+"""
+
+SEARCH_STEP_SECONDS = 0.25
+"""
+How long to search a log for lines matching a filter per callback. The search is
+continued by the next callback, so a search of a big log doesn't hold up the worker,
+and the lines that were found stream in as it goes.
+"""
+
+
+def format_log_line(line: Line) -> str:
+    # Line numbers that are only estimates are marked with a "~".
+    prefix = "~" if line.approximate else ""
+    return f"{prefix}{line.number}:  {line.content}"
+
+
+def get_log_chunk(lines: Iterable[Line]) -> str:
+    """
+    Encode lines as a chunk to append to a ``LogView``. Each chunk holds every line
+    since the last one, so the browser only has to add them to the lines it has.
+    """
+    return json.dumps([format_log_line(line) for line in lines])
+
+
+def get_log_reset_chunk(lines: Iterable[Line], version: int) -> str:
+    """
+    Encode lines as a chunk that replaces all of the lines of a ``LogView``.
+    ``version`` has to change every time, so the browser can tell that two resets
+    with the same lines happened.
+    """
+    return json.dumps(
+        {"version": version, "lines": [format_log_line(line) for line in lines]}
+    )
+
+
+def compile_filter(pattern: Optional[str]) -> Optional[Pattern[str]]:
+    """
+    Compile a filter for log lines, or return ``None`` if there's no filter.
+    Raises ``re.error`` for invalid patterns.
+    """
+    if not pattern:
+        return None
+    return re.compile(pattern)
+
+
+def filter_lines(lines: List[Line], regex: Optional[Pattern[str]]) -> List[Line]:
+    if regex is None:
+        return lines
+    return [line for line in lines if regex.search(line.content)]
+
+
+def get_log_search_chunk(lines: Iterable[Line], version: int) -> str:
+    """
+    Encode lines found by a search that's still going as a chunk to append to a
+    ``LogView``. Like with ``get_log_reset_chunk``, ``version`` has to change every
+    time, since the same lines can be found by different searches.
+    """
+    return json.dumps(
+        {"version": version, "lines": [format_log_line(line) for line in lines]}
+    )
+
+
+def search_log(
+    stream: LogStreamService, regex: Pattern[str], cursor: SearchCursor
+) -> List[Line]:
+    """
+    Search the log of ``stream`` for lines matching ``regex`` from where ``cursor``
+    is up to for `SEARCH_STEP_SECONDS`, and get the last ``stream.max_lines`` of them.
+    ``cursor`` is moved to where the search stopped, so it can be continued.
+    """
+    deadline = time.time() + SEARCH_STEP_SECONDS
+    start = cursor.position
+    matches = deque(
+        stream.search(
+            regex,
+            # Always get past at least one line, so the search can't get stuck.
+            should_stop=lambda: cursor.position > start and time.time() > deadline,
+            cursor=cursor,
+        ),
+        maxlen=stream.max_lines or None,
+    )
+    return list(matches)
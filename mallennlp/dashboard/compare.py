@@ -1,8 +1,18 @@
+from pathlib import Path
 from typing import List
 
+import attr
+from dash.dependencies import Input, Output
+from dash.exceptions import PreventUpdate
+import dash_bootstrap_components as dbc
+import dash_core_components as dcc
 import dash_html_components as html
+from flask import current_app
 
+import mallennlp.controllers.compare as cc
 from mallennlp.dashboard.page import Page
+from mallennlp.exceptions import InvalidPageParametersError
+from mallennlp.services.experiment import ExperimentService
 from mallennlp.services.serde import serde
 
 
@@ -10,7 +20,71 @@ from mallennlp.services.serde import serde
 class ComparePage(Page):
     @serde
     class Params:
-        paths: List[str]
+        paths: List[str] = attr.ib()
+
+        @paths.validator
+        def check_paths_valid(self, attribute, value):
+            if not value:
+                raise InvalidPageParametersError("No experiments to compare.")
+            for path_str in value:
+                try:
+                    path = ExperimentService.get_canonical_path(Path(path_str))
+                except ValueError:
+                    raise InvalidPageParametersError(
+                        f"Directory {path_str} outside of project."
+                    )
+                if not ExperimentService.is_experiment(path):
+                    raise InvalidPageParametersError(
+                        f"Directory {path_str} is not an experiment."
+                    )
 
     def get_elements(self):
-        return [html.H3("Comparing experiments")]
+        comparison = cc.get_comparison(tuple(self.p.paths))
+        metric_name = cc.get_default_metric(comparison)
+        elements = [
+            html.H3(f"Comparing {len(comparison.paths)} experiments"),
+            dcc.Dropdown(
+                id="compare-metric-dropdown",
+                options=cc.get_metric_options(comparison),
+                value=metric_name,
+            ),
+            dcc.Graph(
+                id="compare-metric-plot",
+                config={"displayModeBar": False},
+                figure=cc.get_compare_plot_figure(
+                    comparison, metric_name, current_app.config["PLOT_MAX_POINTS"]
+                ),
+            ),
+            html.H5("Metrics"),
+            cc.render_summary_table(comparison, metric_name),
+            html.Br(),
+            html.H5("Config differences"),
+        ]
+        if comparison.config_diff:
+            elements.append(cc.render_config_diff_table(comparison))
+        else:
+            elements.append(dbc.Alert("Configs are identical", color="info"))
+        return [
+            dbc.Row(
+                dbc.Col(elements, className="dash-padded-element dash-element-no-hover")
+            )
+        ]
+
+    @Page.callback(
+        [
+            Output("compare-metric-plot", "figure"),
+            Output("compare-summary-table", "data"),
+        ],
+        [Input("compare-metric-dropdown", "value")],
+        mutating=False,
+    )
+    def update_metric(self, metric_name):
+        if not metric_name:
+            raise PreventUpdate
+        comparison = cc.get_comparison(tuple(self.p.paths))
+        return (
+            cc.get_compare_plot_figure(
+                comparison, metric_name, current_app.config["PLOT_MAX_POINTS"]
+            ),
+            cc.get_summary_table_data(comparison, metric_name),
+        )
@@ -71,3 +71,63 @@ def SidebarLayout(
             ]
         )
     ]
+
+
+def PushTrigger(id: str, topic: str):
+    """
+    A hidden button that gets clicked whenever ``topic`` changes, so that callbacks
+    can use its ``n_clicks`` as an input instead of polling with a ``dcc.Interval``.
+
+    The clicks come from ``assets/push.js``, which subscribes to the topics of all
+    triggers on the page through the server-sent events endpoint ``/events``
+    (see ``mallennlp.services.events``).
+    """
+    return html.Button(
+        id=id,
+        className="push-trigger",
+        style={"display": "none"},
+        **{"data-topic": topic},
+    )
+
+
+def LogView(id: str, chunk: str, max_lines: Optional[int] = None):
+    """
+    A scrollable view of log lines that only renders the lines that are scrolled
+    into view, so it stays fast with many thousands of lines.
+
+    Lines are appended by setting the ``children`` of the hidden ``{id}-chunk``
+    element to a new chunk from ``mallennlp.controllers.log_stream.get_log_chunk``,
+    and earlier lines are prepended the same way with the ``{id}-history`` element.
+    All of the lines are replaced with a chunk from ``get_log_reset_chunk`` in the
+    ``{id}-reset`` element, and lines found by a search that's still going are
+    appended with a chunk from ``get_log_search_chunk`` in the ``{id}-search``
+    element. ``assets/log_view.js`` keeps the lines of each view in the browser, and drops
+    the oldest ones when appending would leave more than ``max_lines``.
+    """
+    return html.Div(
+        [
+            html.Pre(
+                chunk,
+                id=f"{id}-chunk",
+                className="log-view-chunk",
+                style={"display": "none"},
+            ),
+            html.Pre(
+                id=f"{id}-history",
+                className="log-view-history",
+                style={"display": "none"},
+            ),
+            html.Pre(
+                id=f"{id}-reset", className="log-view-reset", style={"display": "none"}
+            ),
+            html.Pre(
+                id=f"{id}-search",
+                className="log-view-search",
+                style={"display": "none"},
+            ),
+            html.Div(className="log-view-viewport"),
+        ],
+        id=id,
+        className="log-view",
+        **{"data-max-lines": max_lines or 0},
+    )
@@ -10,20 +10,45 @@ from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
 import dash_core_components as dcc
 import dash_html_components as html
+from flask import current_app
 
 import mallennlp.controllers.experiment as ec
-from mallennlp.dashboard.components import SidebarEntry, SidebarLayout
+from mallennlp.dashboard.components import PushTrigger, SidebarEntry, SidebarLayout
 from mallennlp.dashboard.page import Page
-from mallennlp.domain.experiment import Status
 from mallennlp.domain.user import Permissions
 from mallennlp.exceptions import InvalidPageParametersError
 from mallennlp.services.cache import cache
+from mallennlp.services.events import EXPERIMENT_TOPIC_PREFIX
 from mallennlp.services.experiment import ExperimentService
 from mallennlp.services.serde import serde
 
 
 @Page.register("/experiment")
 class ExperimentPage(Page):
+    @serde
+    class SessionState:
+        plot_metric: Optional[str] = None
+        """
+        Metric shown in the metric plot.
+        """
+
+        plot_traces: List[str] = attr.ib(default=attr.Factory(list))
+        """
+        Names of the traces in the metric plot.
+        """
+
+        plot_epochs: int = 0
+        """
+        Number of epochs in the metric plot, which is only extended with the epochs
+        after these on updates.
+        """
+
+        plot_run: Optional[float] = None
+        """
+        The ``EpochMetrics.first_lastmod`` of the epochs in the metric plot, so it's
+        replaced rather than extended when the run is restarted.
+        """
+
     @serde
     class Params:
         path: str = attr.ib()
@@ -48,7 +73,7 @@ class ExperimentPage(Page):
     def __init__(self, state, params):
         super().__init__(state, params)
         self.path = ExperimentService.get_canonical_path(Path(self.p.path))
-        self.es = ExperimentService(self.path)
+        self.es = ExperimentService.from_cache(self.path)
 
     def get_experiment_header_elements(self):
         status = ec.get_status(self.es)
@@ -57,12 +82,11 @@ class ExperimentPage(Page):
             html.Div(id="experiment-tags", children=ec.display_tags(self.es)),
             ec.edit_tags_modal("experiment"),
         ]
-        if status not in (Status.FINISHED, Status.FAILED):
-            interval = 1000 * 30
-        else:
-            interval = 1000 * 300
         elements.append(
-            dcc.Interval(id="experiment-update-interval", interval=interval)
+            PushTrigger(
+                id="experiment-update-trigger",
+                topic=EXPERIMENT_TOPIC_PREFIX + str(self.path),
+            )
         )
         return elements
 
@@ -82,8 +106,7 @@ class ExperimentPage(Page):
                 + urlparse.urlencode({"path": self.path / self.es.STDERR_FNAME}),
             ),
         ]
-        epochs = self.es.get_epochs()
-        if epochs:
+        if len(self.es.get_epoch_metrics().epochs):
             out.extend(
                 [
                     html.Br(),
@@ -98,12 +121,23 @@ class ExperimentPage(Page):
                     dcc.Graph(
                         id="experiment-metric-plot",
                         config={"displayModeBar": False},
-                        figure=ec.get_metric_plot_figure(self.es, "loss"),
+                        figure=self.get_metric_plot_figure("loss"),
                     ),
                 ]
             )
         return out
 
+    def get_metric_plot_figure(self, metric_name: str):
+        figure = ec.get_metric_plot_figure(
+            self.es, metric_name, current_app.config["PLOT_MAX_POINTS"]
+        )
+        self.s.plot_metric = metric_name
+        self.s.plot_traces = [trace["name"] for trace in figure["data"]]
+        epoch_metrics = self.es.get_epoch_metrics()
+        self.s.plot_epochs = len(epoch_metrics.epochs)
+        self.s.plot_run = epoch_metrics.first_lastmod
+        return figure
+
     def get_settings_elements(self):
         return ["Coming soon"]
 
@@ -163,21 +197,45 @@ class ExperimentPage(Page):
         ]
 
     @Page.callback(
-        [Output("experiment-metric-plot", "figure")],
+        [
+            Output("experiment-metric-plot", "figure"),
+            Output("experiment-metric-plot", "extendData"),
+        ],
         [
             Input("experiment-metric-plot-dropdown", "value"),
-            Input("experiment-update-interval", "n_intervals"),
+            Input("experiment-update-trigger", "n_clicks"),
         ],
-        mutating=False,
+        mutating=True,
     )
-    def update_metric_plot_figure(self, metric_name, n_intervals):
-        if not metric_name and not n_intervals:
+    def update_metric_plot_figure(self, metric_name, n_clicks):
+        if not metric_name:
+            raise PreventUpdate
+        if metric_name != self.s.plot_metric:
+            return self.get_metric_plot_figure(metric_name), dash.no_update
+        epoch_metrics = self.es.get_epoch_metrics()
+        n_epochs = len(epoch_metrics.epochs)
+        if (
+            n_epochs == self.s.plot_epochs
+            and epoch_metrics.first_lastmod == self.s.plot_run
+        ):
+            # Nothing new to show.
             raise PreventUpdate
-        return ec.get_metric_plot_figure(self.es, metric_name)
+        extension = ec.get_metric_plot_extension(
+            self.es,
+            metric_name,
+            self.s.plot_traces,
+            self.s.plot_epochs,
+            self.s.plot_run,
+            current_app.config["PLOT_MAX_POINTS"],
+        )
+        if extension is None:
+            return self.get_metric_plot_figure(metric_name), dash.no_update
+        self.s.plot_epochs = n_epochs
+        return dash.no_update, extension
 
     @Page.callback(
         [Output("experiment-status-badge", "children")],
-        [Input("experiment-update-interval", "n_intervals")],
+        [Input("experiment-update-trigger", "n_clicks")],
         mutating=False,
     )
     def update_status_badge(self, _):
@@ -188,7 +246,7 @@ class ExperimentPage(Page):
 
     @Page.callback(
         [Output("experiment-epoch-metrics", "children")],
-        [Input("experiment-update-interval", "n_intervals")],
+        [Input("experiment-update-trigger", "n_clicks")],
         mutating=False,
     )
     def update_epoch_metrics(self, _):
@@ -213,8 +271,10 @@ class ExperimentPage(Page):
             tag = ctx.states[f"{button_id}.key"]
             if tag in current_tags:
                 self.es.set_tags([t for t in current_tags if t != tag])
-                # Need to clear the memoized cache for `get_all_tags` now.
+                # Need to clear the memoized caches for `get_all_tags` and
+                # `get_row_count` now.
                 cache.delete_memoized(ec.get_all_tags)
+                cache.delete_memoized(ec.get_row_count)
         return ec.display_tags(self.es)
 
     @Page.callback(
@@ -268,4 +328,6 @@ class ExperimentPage(Page):
         if any(tag not in all_tags for tag in tags):
             # Need to clear the memoized cache for `get_all_tags` now.
             cache.delete_memoized(ec.get_all_tags)
+        # Counts of experiments matching tag filters may have changed.
+        cache.delete_memoized(ec.get_row_count)
         return True
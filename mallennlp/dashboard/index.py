@@ -7,21 +7,40 @@ from typing import Optional, List, Any, Dict, NamedTuple
 from dash.dependencies import Output, Input, State
 from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
+import dash_core_components as dcc
 import dash_html_components as html
+from flask import current_app
 
 from mallennlp.controllers.experiment import (
     render_dash_table,
     get_dash_table_data,
+    get_all_param_keys,
     get_all_tags,
+    get_page_count,
+    get_row_count,
+    get_table_columns,
     PAGE_SIZE,
+    PARAM_COLUMN_PREFIX,
     edit_tags_modal,
 )
 from mallennlp.dashboard.page import Page
 from mallennlp.dashboard.components import SidebarEntry, SidebarLayout
 from mallennlp.domain.user import Permissions
 from mallennlp.services.cache import cache
-from mallennlp.services.serde import serde
+from mallennlp.services.serde import serde, serialize
 from mallennlp.services.experiment import ExperimentService
+from mallennlp.services.indexer import ExperimentIndexer
+
+
+def get_common_tags(rows: List[Dict[str, Any]]) -> List[str]:
+    """
+    Get the tags shared by all of the given rows of the experiments table.
+    """
+    tags = [t for t in rows[0]["tags"].split(" ") if t]
+    for row in rows[1:]:
+        row_tags = set(row["tags"].split(" "))
+        tags = [t for t in tags if t in row_tags]
+    return tags
 
 
 class UpdateActionsOut(NamedTuple):
@@ -41,6 +60,18 @@ class IndexPage(Page):
         Keep track of selected row(s).
         """
 
+        table_query: Optional[str] = None
+        """
+        The sort, filter, and page size of the experiments table that ``bookmarks``
+        apply to.
+        """
+
+        bookmarks: Optional[Dict[int, List[Any]]] = None
+        """
+        Sort keys of the last row of each page of the experiments table seen so far,
+        used to seek to later pages.
+        """
+
     @serde
     class Params:
         filter_query: Optional[str] = None
@@ -100,14 +131,13 @@ class IndexPage(Page):
                                             id="re-build-database",
                                         ),
                                         dbc.Tooltip(
-                                            "If you've added or removed experiments through a "
-                                            "method "
-                                            "other than the AllenNLP Manager CLI or Dashboard "
-                                            "since starting the server, you may need to re-build "
-                                            "the "
-                                            "database of experiments in order for the manager to "
-                                            "get "
-                                            "up-to-date.",
+                                            "Experiments are tracked automatically while the "
+                                            "server is running. If the experiment watcher is "
+                                            "disabled and you've added or removed experiments "
+                                            "through a method other than the AllenNLP Manager "
+                                            "CLI or Dashboard since starting the server, you may "
+                                            "need to re-build the database of experiments in "
+                                            "order for the manager to get up-to-date.",
                                             target="re-build-database-help",
                                             placement="right",
                                         ),
@@ -125,6 +155,17 @@ class IndexPage(Page):
                     ####################################################
                     # < Settings >
                     ####################################################
+                    dbc.Col(
+                        dcc.Dropdown(
+                            id="index-param-columns",
+                            multi=True,
+                            placeholder="Show config parameters...",
+                        ),
+                        lg=4,
+                        md=5,
+                        width=12,
+                        className="mb-3",
+                    ),
                     dbc.Col(
                         dbc.InputGroup(
                             [
@@ -226,6 +267,29 @@ class IndexPage(Page):
             ),
         ]
 
+    @staticmethod
+    @Page.callback(
+        [Output("index-param-columns", "options")],
+        [Input("index-param-columns", "search_value")],
+        [State("index-param-columns", "value")],
+    )
+    def update_param_column_options(search, value):
+        if not search:
+            raise PreventUpdate
+        options = [k for k in get_all_param_keys() if search in k]
+        for v in value or []:
+            if v not in options:
+                options.append(v)
+        return [{"label": k, "value": k} for k in options]
+
+    @staticmethod
+    @Page.callback(
+        [Output("experiments-table", "columns")],
+        [Input("index-param-columns", "value")],
+    )
+    def update_param_columns(param_keys):
+        return get_table_columns(param_keys)
+
     @staticmethod
     @Page.callback(
         [Output("experiments-table", "page_size")],
@@ -236,26 +300,53 @@ class IndexPage(Page):
             raise PreventUpdate
         return value
 
-    @staticmethod
     @Page.callback(
-        [Output("experiments-table", "data")],
+        [
+            Output("experiments-table", "data"),
+            Output("experiments-table", "page_count"),
+        ],
         [
             Input("experiments-table", "page_current"),
             Input("experiments-table", "page_size"),
             Input("experiments-table", "sort_by"),
             Input("experiments-table", "filter_query"),
+            Input("experiments-table", "columns"),
             Input("index-tags-edited-success", "children"),
             Input("index-database-rebuilt-success", "children"),
         ],
+        mutating=True,
     )
     def render_table_data(
-        page, page_size, sort_by, filter_expression, tags_updated, db_updated
+        self,
+        page,
+        page_size,
+        sort_by,
+        filter_expression,
+        columns,
+        tags_updated,
+        db_updated,
     ):
-        page = page or 0
         if not page_size:
             raise PreventUpdate
         page = page or 0
-        return get_dash_table_data(page, page_size, sort_by, filter_expression)
+        table_query = serialize([sort_by, filter_expression, page_size])
+        if self.s.bookmarks is None or self.s.table_query != table_query:
+            self.s.table_query = table_query
+            self.s.bookmarks = {}
+        param_keys = [
+            c["id"][len(PARAM_COLUMN_PREFIX) :]
+            for c in columns or []
+            if c["id"].startswith(PARAM_COLUMN_PREFIX)
+        ]
+        data = get_dash_table_data(
+            page,
+            page_size,
+            sort_by,
+            filter_expression,
+            bookmarks=self.s.bookmarks,
+            param_keys=param_keys,
+        )
+        return data, get_page_count(page_size, filter_expression)
 
     @staticmethod
     @Page.callback(
@@ -295,6 +386,7 @@ class IndexPage(Page):
         self.s.selected = [data[i] for i in selected if i < len(data)]
         if len(self.s.selected) > 1:
             return UpdateActionsOut(
+                edit_tags_modal_disabled=False,
                 compare_disabled=False,
                 compare_href="/compare?"
                 + urllib.parse.urlencode(
@@ -326,7 +418,8 @@ class IndexPage(Page):
         if n1 or n2:
             will_open = not is_open and self.s.selected
             if will_open:
-                tags = [t for t in self.s.selected[0]["tags"].split(" ") if t]
+                # Start with the tags that all of the selected experiments share.
+                tags = get_common_tags(self.s.selected)
             return will_open, tags
         return is_open, tags
 
@@ -355,15 +448,26 @@ class IndexPage(Page):
         mutating=True,
     )
     def save_tags(self, n_clicks, tags):
-        if not n_clicks or not self.s.selected or not len(self.s.selected) == 1:
+        if not n_clicks or not self.s.selected:
             raise PreventUpdate
-        es = ExperimentService(Path(self.s.selected[0]["path"]))
-        es.set_tags(tags)
-        self.s.selected[0]["tags"] = " ".join(tags)
+        tags = tags or []
+        # Tags that were shared by all of the selected experiments but are no longer in
+        # the dropdown were removed, while any experiment's other tags are left alone.
+        removed = [t for t in get_common_tags(self.s.selected) if t not in tags]
+        with ExperimentService.batch() as batch:
+            for row in self.s.selected:
+                batch.update_tags(
+                    ExperimentService(Path(row["path"])), add=tags, remove=removed
+                )
+        for row in self.s.selected:
+            row_tags = [t for t in row["tags"].split(" ") if t and t not in removed]
+            row["tags"] = " ".join(row_tags + [t for t in tags if t not in row_tags])
         all_tags = get_all_tags()
         if any(tag not in all_tags for tag in tags):
             # Need to clear the memoized cache for `get_all_tags` now.
             cache.delete_memoized(get_all_tags)
+        # Counts of experiments matching tag filters may have changed.
+        cache.delete_memoized(get_row_count)
         return True, None
 
     @staticmethod
@@ -399,6 +503,7 @@ class IndexPage(Page):
         [
             Output("database-build-noti", "is_open"),
             Output("database-build-finish-noti", "is_open"),
+            Output("database-build-finish-noti", "children"),
             Output("index-database-rebuilt-success", "children"),
         ],
         [Input("re-build-database", "n_clicks")],
@@ -409,11 +514,17 @@ class IndexPage(Page):
             raise PreventUpdate
         start_time = time.time()
         # Remove any deleted experiments, track new experiments added.
-        ExperimentService.init_db_table()
-        # Clear the memoized cache for `get_all_tags` now.
+        update = ExperimentIndexer(workers=current_app.config["SCAN_WORKERS"]).update()
+        # Clear the memoized caches that depend on the experiments now.
         cache.delete_memoized(get_all_tags)
+        cache.delete_memoized(get_all_param_keys)
+        cache.delete_memoized(get_row_count)
         # Ensure this takes at least 1 second so that the spinner notification has
         # time to display (it looks cool).
         if (time.time() - start_time) < 1:
             time.sleep(1)
-        return False, True, None
+        message = (
+            f"Database successfully re-built: {len(update.added)} added, "
+            f"{len(update.removed)} removed, {len(update.changed)} changed"
+        )
+        return False, True, message, None
@@ -1,16 +1,29 @@
 from pathlib import Path
+import re
+from typing import Optional
 
 import attr
+import dash
 from dash.exceptions import PreventUpdate
 from dash.dependencies import Input, Output
 import dash_bootstrap_components as dbc
 import dash_core_components as dcc
-import dash_html_components as html
 
-from mallennlp.controllers.log_stream import format_log_line
+from mallennlp.controllers.log_stream import (
+    DEFAULT_MAX_LINES,
+    SEARCH_STEP_SECONDS,
+    compile_filter,
+    filter_lines,
+    get_log_chunk,
+    get_log_reset_chunk,
+    get_log_search_chunk,
+    search_log,
+)
+from mallennlp.dashboard.components import LogView, PushTrigger
 from mallennlp.dashboard.page import Page
 from mallennlp.exceptions import InvalidPageParametersError
-from mallennlp.services.log_stream import LogStreamService
+from mallennlp.services.events import LOG_TOPIC_PREFIX
+from mallennlp.services.log_stream import LogStreamService, SearchCursor
 from mallennlp.services.serde import serde
 
 
@@ -19,6 +32,17 @@ class LogStream(Page):
     @serde
     class SessionState:
         stream: LogStreamService
+        pattern: Optional[str] = None
+        """
+        Only lines matching this regular expression are displayed.
+        """
+        reset_version: int = 0
+        search: Optional[SearchCursor] = None
+        """
+        Where the search for lines matching `pattern` is up to, while it's still
+        going. New lines aren't streamed until it's done, so they come after the
+        lines it finds.
+        """
 
     @serde
     class Params:
@@ -34,7 +58,7 @@ class LogStream(Page):
     def from_params(cls, params):
         stream = LogStreamService(
             params.path,
-            max_lines=None,
+            max_lines=DEFAULT_MAX_LINES,
             max_lines_per_update=None,
             max_blocks_per_update=None,
             max_block_size=-1,
@@ -42,17 +66,42 @@ class LogStream(Page):
         return cls(cls.SessionState(stream=stream), params)
 
     def get_elements(self):
+        # Start from the end of the log, so big logs open just as fast as small ones.
+        lines = self.s.stream.read_tail()
         elements = [
             dbc.Row(
                 [
                     dbc.Col(
-                        html.Div(
-                            id="log-stream-content",
-                            children=[
-                                format_log_line(line)
-                                for line in self.s.stream.readlines()
-                            ],
-                        ),
+                        [
+                            dbc.Input(
+                                id="log-stream-filter",
+                                type="text",
+                                placeholder="Filter lines (regular expression)",
+                                debounce=True,
+                                value="",
+                            ),
+                            dbc.Button(
+                                "Load earlier lines",
+                                n_clicks=0,
+                                id="log-stream-history-button",
+                                color="secondary",
+                                size="sm",
+                                disabled=not self.s.stream.has_earlier_lines,
+                            ),
+                            LogView(
+                                id="log-stream-content",
+                                chunk=get_log_chunk(lines),
+                                max_lines=self.s.stream.max_lines,
+                            ),
+                            # Continues a search until it's done. Waiting for twice
+                            # as long as each step of the search takes keeps the
+                            # steps from overlapping.
+                            dcc.Interval(
+                                id="log-stream-search-interval",
+                                interval=2000 * SEARCH_STEP_SECONDS,
+                                disabled=True,
+                            ),
+                        ],
                         width=True,
                         className="dash-padded-element dash-element-no-hover",
                     )
@@ -61,16 +110,108 @@ class LogStream(Page):
         ]
         if self.p.live:
             elements.append(
-                dcc.Interval(id="log-stream-update-interval", interval=1000 * 1)
+                PushTrigger(
+                    id="log-stream-update-trigger", topic=LOG_TOPIC_PREFIX + self.p.path
+                )
             )
         return elements
 
     @Page.callback(
-        [Output("log-stream-content", "children")],
-        [Input("log-stream-update-interval", "n_intervals")],
+        [Output("log-stream-content-chunk", "children")],
+        [Input("log-stream-update-trigger", "n_clicks")],
         mutating=True,
     )
     def render_log_stream_content(self, _):
-        if not self.s.stream.should_read():
+        if self.s.search is not None or not self.s.stream.should_read():
             raise PreventUpdate
-        return [format_log_line(line) for line in self.s.stream.readlines()]
+        # The session state only keeps track of the position in the file, so these
+        # are just the lines written since the last update. The browser appends them
+        # to the lines it already has.
+        lines = filter_lines(self.s.stream.readlines(), compile_filter(self.s.pattern))
+        if not lines:
+            # Only part of a line was written, or none of the lines match the filter.
+            return dash.no_update
+        return get_log_chunk(lines)
+
+    @Page.callback(
+        [
+            Output("log-stream-content-history", "children"),
+            Output("log-stream-history-button", "disabled"),
+        ],
+        [Input("log-stream-history-button", "n_clicks")],
+        mutating=True,
+    )
+    def render_log_stream_history(self, n_clicks):
+        if not n_clicks:
+            raise PreventUpdate
+        lines = self.s.stream.read_before()
+        return get_log_chunk(lines), not self.s.stream.has_earlier_lines
+
+    @Page.callback(
+        [
+            Output("log-stream-content-reset", "children"),
+            Output("log-stream-content-search", "children"),
+            Output("log-stream-filter", "invalid"),
+            Output("log-stream-history-button", "style"),
+            Output("log-stream-search-interval", "disabled"),
+        ],
+        [
+            Input("log-stream-filter", "value"),
+            Input("log-stream-search-interval", "n_intervals"),
+        ],
+        mutating=True,
+    )
+    def filter_log_stream_content(self, pattern, _):
+        ctx = dash.callback_context
+        if ctx.triggered and ctx.triggered[0]["prop_id"].startswith(
+            "log-stream-search-interval."
+        ):
+            return self.continue_search()
+        pattern = pattern or None
+        if pattern == self.s.pattern:
+            raise PreventUpdate
+        try:
+            regex = compile_filter(pattern)
+        except re.error:
+            return dash.no_update, dash.no_update, True, dash.no_update, dash.no_update
+        self.s.pattern = pattern
+        self.s.reset_version += 1
+        if regex is None:
+            self.s.search = None
+            lines = self.s.stream.read_tail()
+            history_button_style = None
+        else:
+            # Only matches up to the current position, since the following lines
+            # are filtered as they're streamed. The search is continued by the
+            # search interval, a step at a time, until it gets there.
+            self.s.search = self.s.stream.get_search_cursor()
+            lines = search_log(self.s.stream, regex, self.s.search)
+            if self.s.search.done:
+                self.s.search = None
+            history_button_style = {"display": "none"}
+        return (
+            get_log_reset_chunk(lines, self.s.reset_version),
+            dash.no_update,
+            False,
+            history_button_style,
+            self.s.search is None,
+        )
+
+    def continue_search(self):
+        if self.s.search is None:
+            raise PreventUpdate
+        regex = compile_filter(self.s.pattern)
+        assert regex is not None
+        lines = search_log(self.s.stream, regex, self.s.search)
+        if self.s.search.done:
+            self.s.search = None
+        self.s.reset_version += 1
+        return (
+            dash.no_update,
+            get_log_search_chunk(lines, self.s.reset_version)
+            if lines
+            else dash.no_update,
+            dash.no_update,
+            dash.no_update,
+            self.s.search is None,
+        )
@@ -15,10 +15,11 @@ from mallennlp.controllers.sys_info import (
     update_device_history,
     render_device_info,
 )
-from mallennlp.dashboard.components import SidebarEntry, SidebarLayout
+from mallennlp.dashboard.components import PushTrigger, SidebarEntry, SidebarLayout
 from mallennlp.dashboard.page import Page
 from mallennlp.domain.sys_info import GpuInfo
 from mallennlp.exceptions import CudaUnavailableError
+from mallennlp.services.events import GPU_TOPIC
 from mallennlp.services.serde import serde
 
 
@@ -46,9 +47,7 @@ class SysInfoPage(Page):
     def get_gpu_elements(self, info):
         if info.gpus:
             return [
-                dcc.Interval(
-                    id="sys-info-update-interval", interval=1500, n_intervals=0
-                ),
+                PushTrigger(id="sys-info-update-trigger", topic=GPU_TOPIC),
                 get_gpu_device_dropdown(info),
                 html.Br(),
                 html.Div(id="gpu-util-info"),
@@ -73,7 +72,7 @@ class SysInfoPage(Page):
         [Output("gpu-util-info", "children"), Output("gpu-util-plot", "figure")],
         [
             Input("device-selection", "value"),
-            Input("sys-info-update-interval", "n_intervals"),
+            Input("sys-info-update-trigger", "n_clicks"),
         ],
         mutating=True,
     )
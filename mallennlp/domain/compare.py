@@ -0,0 +1,63 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from mallennlp.domain.dataclass import dataclass
+
+
+@dataclass
+class Comparison:
+    paths: List[str]
+    """
+    Paths of the experiments being compared, in order.
+    """
+
+    epochs: np.ndarray
+    """
+    Epoch numbers that the metrics are aligned on, from 0 to the greatest number of
+    epochs of any experiment.
+    """
+
+    metrics: Dict[str, np.ndarray]
+    """
+    The values of each numeric metric as an array with a row for each experiment and
+    a column for each epoch. Values are NaN where an experiment didn't report the
+    metric for an epoch or hasn't gotten to it.
+    """
+
+    config_diff: Dict[str, List[Optional[str]]]
+    """
+    Flattened config parameters that aren't the same in every experiment, along with
+    the value of the parameter in each experiment (``None`` if it isn't set).
+    """
+
+    validation_metrics: List[str]
+    """
+    The validation metric of each experiment, like "-loss", which tells whether
+    lower or higher values of the metric are better.
+    """
+
+
+@dataclass
+class MetricSummary:
+    best: np.ndarray
+    """
+    Best value of the metric reached by each experiment.
+    """
+
+    best_epoch: np.ndarray
+    """
+    Epoch of the best value for each experiment, or -1 if the metric was never
+    reported.
+    """
+
+    final: np.ndarray
+    """
+    Value of the metric at the latest epoch that reported it for each experiment.
+    """
+
+    delta: np.ndarray
+    """
+    Difference between the final value of each experiment and that of the first
+    experiment.
+    """
@@ -29,6 +29,20 @@ class ProjectConfig:
     Log level across CLI and dashboard.
     """
 
+    ignore: Optional[List[str]] = None
+    """
+    Glob patterns of directories to skip when searching for experiments, in addition
+    to hidden directories, common heavy directories like ``vocabulary`` or ``venv``, and
+    the patterns listed in the project's ``.mallennlpignore`` file. Patterns that
+    contain a "/" are matched against the path relative to the project root, others
+    against the directory name.
+    """
+
+    max_depth: Optional[int] = None
+    """
+    Maximum depth below the project root to search for experiments.
+    """
+
 
 @dataclass
 class ServerConfig:
@@ -64,6 +78,38 @@ class ServerConfig:
     Additional packages to import.
     """
 
+    db_pool_size: int = 16
+    """
+    Number of idle database connections each worker process keeps open between
+    requests.
+    """
+
+    scan_workers: int = 8
+    """
+    Number of threads used to list directories concurrently when searching the project
+    for experiments. Scanning is mostly spent waiting on the filesystem, so this can
+    be much higher than the CPU count on network filesystems.
+    """
+
+    watch_interval: float = 5.0
+    """
+    How often (in seconds) the experiment watcher started along with the server flushes
+    changes to the experiments database. Set to 0 to disable the watcher.
+    """
+
+    watch_backend: str = "auto"
+    """
+    How the experiment watcher detects changes: "inotify", "poll", or "auto" to use
+    inotify when it's available. Use "poll" if experiments are written to a network
+    filesystem from other machines, since inotify won't see those changes.
+    """
+
+    plot_max_points: int = 1000
+    """
+    Maximum number of points sent to the browser for each curve in metric plots.
+    Longer curves are downsampled in a way that preserves their shape.
+    """
+
     """
     Uppercase properties are mapped to the Flask config.
     """
@@ -80,6 +126,18 @@ class ServerConfig:
     def cache_path(self):
         return self.instance_path / "cache/"
 
+    @property
+    def SCAN_WORKERS(self):
+        return self.scan_workers
+
+    @property
+    def DB_POOL_SIZE(self):
+        return self.db_pool_size
+
+    @property
+    def PLOT_MAX_POINTS(self):
+        return self.plot_max_points
+
     @property
     def DATABASE(self):
         return str(self.instance_path / "mallennlp.sqlite")
@@ -3,6 +3,7 @@ from pathlib import Path
 from typing import Optional, Any, Dict, List, Generic, TypeVar
 
 from allennlp.common.params import Params
+import numpy as np
 
 from mallennlp.domain.dataclass import dataclass
 
@@ -44,6 +45,32 @@ class Epoch:
     """
 
 
+@dataclass
+class EpochMetrics:
+    epochs: np.ndarray
+    """
+    Number of each epoch with metrics, in order.
+    """
+
+    columns: Dict[str, np.ndarray]
+    """
+    The values of each numeric metric, aligned with ``epochs``. Epochs that didn't
+    report a metric have a value of NaN.
+    """
+
+    lastmod: Optional[float] = None
+    """
+    Last modified time of the metrics file of the latest epoch when it was read.
+    """
+
+    first_lastmod: Optional[float] = None
+    """
+    Last modified time of the metrics file of the first epoch when it was read. A
+    run that's restarted in the same directory writes that file again, so this tells
+    when the metrics belong to an earlier run.
+    """
+
+
 @dataclass
 class Meta:
     tags: List[str]
@@ -85,3 +112,31 @@ class Experiment:
     """
     Data for each epoch.
     """
+
+    epoch_metrics: Optional[EpochMetrics] = None
+    """
+    Metrics of each epoch in columnar form, once they've been loaded.
+    """
+
+
+@dataclass
+class IndexUpdate:
+    added: List[str]
+    """
+    Paths of experiments added to the index.
+    """
+
+    removed: List[str]
+    """
+    Paths of experiments removed from the index.
+    """
+
+    changed: List[str]
+    """
+    Paths of experiments that were already indexed but have since been modified.
+    """
+
+    total: int
+    """
+    Total number of experiments in the index after the update.
+    """
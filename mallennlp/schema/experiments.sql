@@ -1,7 +1,71 @@
+PRAGMA user_version = 5;
+
 DROP TABLE IF EXISTS experiments;
 
+-- Besides `path` and `tags`, the columns summarize the progress of each experiment
+-- so that experiments can be sorted and filtered without reading their files.
 CREATE TABLE experiments (
   path TEXT UNIQUE NOT NULL,
   tags TEXT,
-  finished INTEGER
+  finished INTEGER,
+  status TEXT,
+  mtime REAL,
+  epochs INTEGER,
+  best_epoch INTEGER,
+  training_duration REAL,
+  validation_metric TEXT,
+  best_validation_metric REAL
+);
+
+CREATE INDEX experiments_finished_idx ON experiments (finished);
+CREATE INDEX experiments_status_idx ON experiments (status);
+CREATE INDEX experiments_mtime_idx ON experiments (mtime);
+CREATE INDEX experiments_epochs_idx ON experiments (epochs);
+CREATE INDEX experiments_best_epoch_idx ON experiments (best_epoch);
+CREATE INDEX experiments_training_duration_idx ON experiments (training_duration);
+CREATE INDEX experiments_best_validation_metric_idx ON experiments (best_validation_metric);
+
+DROP TABLE IF EXISTS experiment_tags;
+
+-- One row for each tag of each experiment, so that experiments can be filtered by
+-- tags using the index on `tag` instead of scanning the `tags` column.
+CREATE TABLE experiment_tags (
+  path TEXT NOT NULL,
+  tag TEXT NOT NULL,
+  UNIQUE (path, tag)
+);
+
+CREATE INDEX experiment_tags_tag_idx ON experiment_tags (tag, path);
+
+DROP TABLE IF EXISTS experiment_configs;
+
+-- Full-text index over the config of each experiment, with one "key = value" line
+-- for each parameter of the flattened config.
+CREATE VIRTUAL TABLE experiment_configs USING fts5(path UNINDEXED, config);
+
+DROP TABLE IF EXISTS experiment_params;
+
+-- The parameters of the flattened config of each experiment, so that experiments
+-- can be filtered and sorted by their hyperparameters without reading configs.
+CREATE TABLE experiment_params (
+  path TEXT NOT NULL,
+  key TEXT NOT NULL,
+  num_value REAL,
+  str_value TEXT,
+  UNIQUE (path, key)
+);
+
+CREATE INDEX experiment_params_num_value_idx ON experiment_params (key, num_value);
+CREATE INDEX experiment_params_str_value_idx ON experiment_params (key, str_value);
+
+DROP TABLE IF EXISTS experiment_dirs;
+
+-- Every directory visited while indexing experiments, used to incrementally
+-- update the experiments table.
+CREATE TABLE experiment_dirs (
+  path TEXT UNIQUE NOT NULL,
+  parent TEXT,
+  mtime_ns INTEGER,
+  inode INTEGER,
+  is_experiment INTEGER
 );
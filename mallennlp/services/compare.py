@@ -0,0 +1,154 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from mallennlp.domain.compare import Comparison, MetricSummary
+from mallennlp.domain.experiment import EpochMetrics
+from mallennlp.services.experiment import ExperimentService, format_config_value
+
+
+METRIC_PREFIXES = ("best_validation_", "validation_", "training_")
+"""
+Prefixes that AllenNLP adds to the names of metrics in the metrics files.
+"""
+
+
+def is_minimized(metric_name: str, validation_metrics: Iterable[str] = ()) -> bool:
+    """
+    Check whether lower values of a metric are better.
+
+    ``validation_metrics`` are the validation metrics of the trainers, like "-loss"
+    or "+accuracy", whose sign tells which way a metric of the same name is better.
+    Other metrics are assumed to be better lower if they're losses, like AllenNLP's
+    default validation metric of "-loss", and better higher otherwise.
+    """
+    name = metric_name
+    for prefix in METRIC_PREFIXES:
+        if name.startswith(prefix):
+            name = name[len(prefix) :]
+            break
+    for validation_metric in validation_metrics:
+        if validation_metric[1:] == name:
+            return validation_metric.startswith("-")
+    return name.endswith("loss")
+
+
+def align_metrics(
+    epoch_metrics: List[EpochMetrics],
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Stack the metric columns of each experiment into one array per metric, with a row
+    for each experiment and a column for each epoch, padded with NaN.
+    """
+    n_epochs = max(
+        (int(em.epochs.max()) + 1 for em in epoch_metrics if len(em.epochs)), default=0
+    )
+    names = sorted({name for em in epoch_metrics for name in em.columns})
+    metrics: Dict[str, np.ndarray] = {}
+    for name in names:
+        values = np.full((len(epoch_metrics), n_epochs), np.nan)
+        for i, em in enumerate(epoch_metrics):
+            column = em.columns.get(name)
+            if column is not None:
+                values[i, em.epochs] = column
+        metrics[name] = values
+    return np.arange(n_epochs), metrics
+
+
+def summarize_metric(values: np.ndarray, minimize: bool = False) -> MetricSummary:
+    """
+    Compute the best and final values of a metric for each experiment from an array
+    returned by ``align_metrics``.
+    """
+    n_experiments, n_epochs = values.shape
+    reported = ~np.isnan(values)
+    any_reported = reported.any(axis=1)
+    if n_epochs == 0:
+        empty = np.full(n_experiments, np.nan)
+        return MetricSummary(
+            best=empty,
+            best_epoch=np.full(n_experiments, -1),
+            final=empty,
+            delta=empty,
+        )
+
+    # Fill missing values with the worst possible value so they're never the best.
+    filled = np.where(reported, values, np.inf if minimize else -np.inf)
+    best_epoch = filled.argmin(axis=1) if minimize else filled.argmax(axis=1)
+    rows = np.arange(n_experiments)
+    best = np.where(any_reported, values[rows, best_epoch], np.nan)
+    best_epoch = np.where(any_reported, best_epoch, -1)
+
+    # Index of the last reported value in each row.
+    final_epoch = n_epochs - 1 - reported[:, ::-1].argmax(axis=1)
+    final = np.where(any_reported, values[rows, final_epoch], np.nan)
+    delta = final - final[0] if n_experiments else final
+    return MetricSummary(best=best, best_epoch=best_epoch, final=final, delta=delta)
+
+
+def diff_configs(
+    flat_configs: List[Dict[str, Any]],
+) -> Dict[str, List[Optional[str]]]:
+    """
+    Find the parameters of flattened configs that aren't the same in all of them.
+    """
+    keys = sorted({key for config in flat_configs for key in config})
+    diff: Dict[str, List[Optional[str]]] = {}
+    for key in keys:
+        values = [
+            format_config_value(config[key]) if key in config else None
+            for config in flat_configs
+        ]
+        if any(value != values[0] for value in values[1:]):
+            diff[key] = values
+    return diff
+
+
+class CompareService:
+    """
+    Compares the metrics and configs of a set of experiments.
+
+    The metrics and config of each experiment are loaded concurrently, using the
+    shared experiment cache and the columnar epoch metrics, so that comparing a
+    hundred or more experiments mostly comes down to array operations.
+    """
+
+    def __init__(
+        self, paths: Iterable[Path], workers: int = 8, cache_dir: Path = None
+    ) -> None:
+        self.paths = list(paths)
+        self.workers = workers
+        # Resolved up front since worker threads don't have an app context.
+        self.cache_dir = cache_dir or ExperimentService.get_metrics_cache_dir()
+
+    def _load(self, path: Path) -> Tuple[EpochMetrics, Dict[str, Any], str]:
+        es = ExperimentService.from_cache(path)
+        return (
+            es.get_epoch_metrics(self.cache_dir),
+            es.get_flat_config(),
+            es.get_validation_metric(),
+        )
+
+    def get_comparison(self) -> Comparison:
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(self._load, self.paths))
+        epochs, metrics = align_metrics([result[0] for result in results])
+        return Comparison(
+            paths=[str(path) for path in self.paths],
+            epochs=epochs,
+            metrics=metrics,
+            config_diff=diff_configs([result[1] for result in results]),
+            validation_metrics=[result[2] for result in results],
+        )
+
+    @staticmethod
+    def get_metric_summary(comparison: Comparison, metric_name: str) -> MetricSummary:
+        values = comparison.metrics.get(metric_name)
+        if values is None:
+            values = np.full((len(comparison.paths), 0), np.nan)
+        return summarize_metric(
+            values,
+            minimize=is_minimized(metric_name, comparison.validation_metrics),
+        )
@@ -1,7 +1,9 @@
 from enum import Enum
+import os
 import pkg_resources
 import sqlite3
-from typing import Iterable
+import threading
+from typing import Dict, Iterable, List, Tuple
 
 from flask import current_app, g
 
@@ -13,9 +15,45 @@ class Tables(Enum):
     EXPERIMENTS = "experiments"
 
 
+PRAGMAS: Tuple[str, ...] = (
+    # Write-ahead logging lets readers keep reading while the watcher or a rebuild
+    # writes to the database, instead of failing with "database is locked".
+    "PRAGMA journal_mode = WAL",
+    # With WAL this is still safe from corruption, and avoids syncing on every commit.
+    "PRAGMA synchronous = NORMAL",
+    # 16 MiB page cache.
+    "PRAGMA cache_size = -16000",
+    # Read the database through a 256 MiB memory map.
+    "PRAGMA mmap_size = 268435456",
+)
+"""
+Pragmas set on every new connection.
+"""
+
+BUSY_TIMEOUT: float = 10.0
+"""
+Seconds to wait for a lock held by another connection before giving up.
+"""
+
+STATEMENT_CACHE_SIZE: int = 256
+"""
+Number of prepared statements each connection keeps around for reuse.
+"""
+
+
 def _get_db(uri: str):
-    db = sqlite3.connect(uri, detect_types=sqlite3.PARSE_DECLTYPES)
+    db = sqlite3.connect(
+        uri,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        timeout=BUSY_TIMEOUT,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        # Pooled connections may be used by a different thread than the one
+        # that created them, though only by one at a time.
+        check_same_thread=False,
+    )
     db.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        db.execute(pragma)
 
     # Custom function for matching rows that contain any of the tags in the function
     # args.
@@ -36,6 +74,61 @@ def _get_db(uri: str):
     return db
 
 
+class ConnectionPool:
+    """
+    Keeps database connections open between requests so that each request doesn't pay
+    for opening a connection, setting it up, and warming up its caches.
+
+    Connections are handed out last-in-first-out, and up to ``size`` idle connections
+    are kept. More connections are opened when needed rather than making requests
+    wait for one, but they are closed when they're returned to a full pool.
+    """
+
+    def __init__(self, uri: str, size: int = 16) -> None:
+        self.uri = uri
+        self.size = size
+        self.pid = os.getpid()
+        self._idle: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return _get_db(self.uri)
+
+    def release(self, db: sqlite3.Connection) -> None:
+        if db.in_transaction:
+            # Don't hold on to locks from a request that didn't commit.
+            db.rollback()
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(db)
+                return
+        db.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for db in idle:
+            db.close()
+
+
+_pools: Dict[str, ConnectionPool] = {}
+
+
+def get_pool(uri: str, size: int = 16) -> ConnectionPool:
+    """
+    Get the connection pool for a database in the current process. Connections can't
+    be shared with forked processes like gunicorn workers, so each process gets its
+    own pool.
+    """
+    pool = _pools.get(uri)
+    if pool is None or pool.pid != os.getpid():
+        pool = _pools[uri] = ConnectionPool(uri, size)
+    return pool
+
+
 def get_db_from_config(config: Config):
     return _get_db(config.server.DATABASE)
 
@@ -44,16 +137,20 @@ def get_db_from_cli(config: Config):
     return get_db_from_config(config)
 
 
+def _get_app_pool() -> ConnectionPool:
+    return get_pool(current_app.config["DATABASE"], current_app.config["DB_POOL_SIZE"])
+
+
 def get_db_from_app():
     if "db" not in g:
-        g.db = _get_db(current_app.config["DATABASE"])
+        g.db = _get_app_pool().acquire()
     return g.db
 
 
 def close_db_from_app(e=None):
     db = g.pop("db", None)
     if db is not None:
-        db.close()
+        _get_app_pool().release(db)
 
 
 def all_tables() -> Iterable[str]:
@@ -0,0 +1,55 @@
+from typing import Tuple
+
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Pick the indices of ``n_out`` points that preserve the shape of a curve using
+    the Largest-Triangle-Three-Buckets algorithm.
+
+    The first and last points are always kept. The points in between are split into
+    ``n_out - 2`` buckets, and from each bucket the point that forms the largest
+    triangle with the point picked from the previous bucket and the average of the
+    next bucket is kept. Unlike taking every k-th point, this keeps spikes and dips.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            avg_x = x[next_start:next_end].mean()
+            avg_y = y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+        # Twice the area of the triangle formed with each point in the bucket.
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(area.argmax())
+        indices[i + 1] = a
+    return indices
+
+
+def downsample(
+    x: np.ndarray, y: np.ndarray, max_points: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Drop missing (NaN) values from a curve and reduce it to at most ``max_points``
+    points with ``lttb``.
+    """
+    present = ~np.isnan(y)
+    if not present.all():
+        x, y = x[present], y[present]
+    if len(x) <= max_points:
+        return x, y
+    indices = lttb(x.astype(np.float64), y, max_points)
+    return x[indices], y[indices]
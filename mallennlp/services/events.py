@@ -0,0 +1,255 @@
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Set, Tuple
+
+from flask import Response, request, stream_with_context
+from flask_login import login_required
+
+
+logger = logging.getLogger(__name__)
+
+
+EXPERIMENT_TOPIC_PREFIX = "experiment:"
+
+LOG_TOPIC_PREFIX = "log:"
+
+GPU_TOPIC = "gpu"
+
+TOPIC_INTERVALS: Dict[str, float] = {
+    EXPERIMENT_TOPIC_PREFIX: 30.0,
+    LOG_TOPIC_PREFIX: 1.0,
+    GPU_TOPIC: 1.5,
+}
+"""
+Minimum number of seconds between checks of each kind of topic, which is also the
+most often subscribers can be notified of changes to a topic.
+"""
+
+HEARTBEAT_INTERVAL = 15.0
+"""
+How often to send a comment to idle event streams so that proxies don't close them
+and disconnected clients are noticed.
+"""
+
+
+def get_topic_interval(topic: str) -> float:
+    for prefix, interval in TOPIC_INTERVALS.items():
+        if topic.startswith(prefix):
+            return interval
+    raise ValueError(f"unknown topic '{topic}'")
+
+
+def _stat_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def get_topic_signature(topic: str) -> Hashable:
+    """
+    Get a value that changes whenever a subscriber to ``topic`` should be notified.
+
+    - "experiment:PATH" changes when files in the experiment directory are created or
+      removed, or when its meta data, final metrics, or STDERR log are written to.
+    - "log:PATH" changes when the log file is written to or replaced.
+    - "gpu" always changes, since GPU utilization is always changing.
+    """
+    if topic.startswith(EXPERIMENT_TOPIC_PREFIX):
+        # Avoid importing the experiment service (and AllenNLP) just for file names.
+        path = topic[len(EXPERIMENT_TOPIC_PREFIX) :]
+        return tuple(
+            _stat_signature(os.path.join(path, fname))
+            for fname in (".", "meta.json", "metrics.json", "stderr.log")
+        )
+    if topic.startswith(LOG_TOPIC_PREFIX):
+        return _stat_signature(topic[len(LOG_TOPIC_PREFIX) :])
+    if topic == GPU_TOPIC:
+        return time.time()
+    raise ValueError(f"unknown topic '{topic}'")
+
+
+class Subscription:
+    """
+    Receives the topics that changed out of those it's subscribed to.
+
+    Notifications of the same topic are coalesced while the subscriber is busy,
+    so a slow client never has more than one pending notification per topic.
+    """
+
+    def __init__(self, topics: Set[str]) -> None:
+        self.topics = topics
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def notify(self, topic: str) -> None:
+        with self._lock:
+            if topic in self._pending:
+                return
+            self._pending.add(topic)
+        self._queue.put(topic)
+
+    def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Wait up to ``timeout`` seconds for a topic to change, returning ``None`` if
+        none did.
+        """
+        try:
+            topic = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        with self._lock:
+            self._pending.discard(topic)
+        return topic
+
+
+class EventBroker:
+    """
+    Notifies subscribers when the files behind their topics change.
+
+    Each worker process has one broker, and a single background thread checks each
+    topic that has subscribers at most every ``TOPIC_INTERVALS`` seconds, no matter how
+    many clients are subscribed to it. Under the gevent workers that serve the
+    dashboard the thread is a greenlet, and waiting subscribers don't use any CPU.
+
+    If ``poll_interval`` is ``None`` there's no background thread, and topics are only
+    checked when ``check()`` is called.
+    """
+
+    def __init__(self, poll_interval: Optional[float] = 0.5) -> None:
+        self.poll_interval = poll_interval
+        self._subscriptions: Dict[str, List[Subscription]] = {}
+        self._signatures: Dict[str, Hashable] = {}
+        self._next_check: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, topics: Set[str]) -> Subscription:
+        for topic in topics:
+            # Raises a `ValueError` for unknown topics.
+            get_topic_interval(topic)
+        subscription = Subscription(topics)
+        with self._lock:
+            for topic in topics:
+                if topic not in self._subscriptions:
+                    self._subscriptions[topic] = []
+                    self._signatures[topic] = get_topic_signature(topic)
+                    self._next_check[topic] = time.time() + get_topic_interval(topic)
+                self._subscriptions[topic].append(subscription)
+            if self._thread is None and self.poll_interval is not None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._subscriptions.get(topic)
+                if subscribers is None:
+                    continue
+                subscribers.remove(subscription)
+                if not subscribers:
+                    del self._subscriptions[topic]
+                    del self._signatures[topic]
+                    del self._next_check[topic]
+
+    def publish(self, topic: str) -> None:
+        with self._lock:
+            subscribers = list(self._subscriptions.get(topic, []))
+        for subscription in subscribers:
+            subscription.notify(topic)
+
+    def check(self, now: Optional[float] = None) -> List[str]:
+        """
+        Check the topics that are due for a check, publish the ones that changed,
+        and return them.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            due = [t for t, next_check in self._next_check.items() if next_check <= now]
+        changed: List[str] = []
+        for topic in due:
+            signature = get_topic_signature(topic)
+            with self._lock:
+                if topic not in self._signatures:
+                    # No subscribers left.
+                    continue
+                self._next_check[topic] = now + get_topic_interval(topic)
+                if signature == self._signatures[topic]:
+                    continue
+                self._signatures[topic] = signature
+            changed.append(topic)
+            self.publish(topic)
+        return changed
+
+    def _run(self) -> None:
+        assert self.poll_interval is not None
+        while True:
+            try:
+                self.check()
+            except Exception as e:
+                logger.exception(e)
+            time.sleep(self.poll_interval)
+
+
+_brokers: Dict[int, EventBroker] = {}
+
+
+def get_broker() -> EventBroker:
+    """
+    Get the broker of the current process. Threads don't survive forking, so each
+    worker process gets its own broker.
+    """
+    pid = os.getpid()
+    broker = _brokers.get(pid)
+    if broker is None:
+        broker = _brokers[pid] = EventBroker()
+    return broker
+
+
+def stream_events(
+    subscription: Subscription, heartbeat_interval: float = HEARTBEAT_INTERVAL
+) -> Iterator[str]:
+    """
+    Format the topics that change as server-sent events.
+    """
+    # Tell the browser how long to wait before reconnecting.
+    yield "retry: 5000\n\n"
+    while True:
+        topic = subscription.get(timeout=heartbeat_interval)
+        if topic is None:
+            yield ": heartbeat\n\n"
+        else:
+            yield f"event: change\ndata: {topic}\n\n"
+
+
+def events_view():
+    topics = set(request.args.getlist("topic"))
+    if not topics:
+        return Response("no topics given", status=400)
+    broker = get_broker()
+    try:
+        subscription = broker.subscribe(topics)
+    except ValueError as e:
+        return Response(str(e), status=400)
+
+    def generate() -> Iterator[str]:
+        try:
+            yield from stream_events(subscription)
+        finally:
+            broker.unsubscribe(subscription)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def init_app(app: Any) -> None:
+    app.add_url_rule("/events", "events", login_required(events_view))
@@ -1,13 +1,257 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 import json
 import os
+import re
 from pathlib import Path
-from typing import Any, Dict, Optional, List, Iterable, Set, Tuple, Union
+import threading
+from typing import Any, Dict, Optional, List, Iterable, Tuple, Union
 
 from allennlp.common.params import Params
-
-from mallennlp.domain.experiment import Experiment, Epoch, Meta, FileData, Status
+from flask import current_app, has_app_context
+import numpy as np
+
+from mallennlp.domain.experiment import (
+    Experiment,
+    Epoch,
+    EpochMetrics,
+    Meta,
+    FileData,
+    Status,
+)
 from mallennlp.services.db import Tables, get_db_from_app
+from mallennlp.services.ignore import IgnoreMatcher
+from mallennlp.services.scanner import parallel_walk
 from mallennlp.services.serde import serialize
+from mallennlp.services.sidecar import prune_sidecars
+
+
+DURATION_REGEX = re.compile(
+    r"^(?:(?P<days>\d+) days?, )?(?P<hours>\d+):(?P<minutes>\d+):(?P<seconds>[\d.]+)$"
+)
+
+
+def parse_duration(duration: Optional[str]) -> Optional[float]:
+    """
+    Parse a duration like "1 day, 0:02:04.405518" (the string format of a
+    ``datetime.timedelta``, which is how AllenNLP reports training duration)
+    into a number of seconds.
+    """
+    if not duration:
+        return None
+    match = DURATION_REGEX.match(duration)
+    if not match:
+        return None
+    return (
+        int(match.group("days") or 0) * 86400
+        + int(match.group("hours")) * 3600
+        + int(match.group("minutes")) * 60
+        + float(match.group("seconds"))
+    )
+
+
+def format_config_value(value: Any) -> str:
+    """
+    Format a config value for the full-text index. Numbers are normalized so that
+    e.g. "2e-5" in a search matches a learning rate of 0.00002 in a config.
+    """
+    if isinstance(value, str):
+        try:
+            value = float(value) if not value.lstrip("-").isdigit() else int(value)
+        except ValueError:
+            return value
+    if isinstance(value, bool):
+        return str(value).lower()
+    if isinstance(value, (list, tuple)):
+        return " ".join(format_config_value(v) for v in value)
+    return str(value)
+
+
+def get_config_document(flat_config: Dict[str, Any]) -> str:
+    """
+    Format a flattened config for the full-text index, with one "key = value" line
+    for each parameter.
+    """
+    return "\n".join(
+        f"{key} = {format_config_value(value)}"
+        for key, value in sorted(flat_config.items())
+    )
+
+
+def get_config_search_query(text: str) -> str:
+    """
+    Turn a search of configs into an FTS5 query.
+
+    Each whitespace-separated term of ``text`` has to match, either as a phrase
+    anywhere in the config, like "bert-base-uncased", or as a parameter with a
+    value, like "lr=2e-5" or "trainer.optimizer.lr=2e-5". Parameter names can be
+    given by any suffix of the full name.
+    """
+    phrases = []
+    for term in text.split():
+        if "=" in term:
+            key, value = term.split("=", 1)
+            term = f"{key} = {format_config_value(value)}"
+        phrases.append('"' + term.replace('"', '""') + '"')
+    return " ".join(phrases)
+
+
+def append_epoch_metrics(
+    epoch_metrics: EpochMetrics, rows: List[Tuple[int, Dict[str, Any]]]
+) -> None:
+    """
+    Append the numeric metrics of new epochs, given as ``(epoch, metrics)`` pairs,
+    to the columns of ``epoch_metrics``.
+    """
+    if not rows:
+        return
+    n_old = len(epoch_metrics.epochs)
+    n_new = len(rows)
+    new_columns: Dict[str, np.ndarray] = {}
+    for i, (_, metrics) in enumerate(rows):
+        for name, value in metrics.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            column = new_columns.get(name)
+            if column is None:
+                column = new_columns[name] = np.full(n_new, np.nan)
+            column[i] = value
+    for name in set(epoch_metrics.columns) | set(new_columns):
+        old = epoch_metrics.columns.get(name)
+        if old is None:
+            old = np.full(n_old, np.nan)
+        new = new_columns.get(name)
+        if new is None:
+            new = np.full(n_new, np.nan)
+        epoch_metrics.columns[name] = np.concatenate([old, new])
+    epoch_metrics.epochs = np.concatenate(
+        [epoch_metrics.epochs, np.array([epoch for epoch, _ in rows], dtype=np.int64)]
+    )
+
+
+def truncate_epoch_metrics(epoch_metrics: EpochMetrics, n_epochs: int) -> None:
+    """
+    Drop all but the first ``n_epochs`` epochs from ``epoch_metrics``.
+    """
+    epoch_metrics.epochs = epoch_metrics.epochs[:n_epochs]
+    epoch_metrics.columns = {
+        name: column[:n_epochs]
+        for name, column in epoch_metrics.columns.items()
+        if not np.isnan(column[:n_epochs]).all()
+    }
+    epoch_metrics.lastmod = None
+    if not n_epochs:
+        epoch_metrics.first_lastmod = None
+
+
+def _to_npz_float(value: Optional[float]) -> np.ndarray:
+    return np.array(np.nan if value is None else value)
+
+
+def _from_npz_float(value: np.ndarray) -> Optional[float]:
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+METRICS_CACHE_SIZE = 4096
+"""
+Maximum number of sidecar files saved by ``save_epoch_metrics`` to keep.
+"""
+
+
+def save_epoch_metrics(path: Path, epoch_metrics: EpochMetrics) -> None:
+    """
+    Save ``epoch_metrics`` to an uncompressed ``.npz`` file. The file is replaced
+    atomically, so readers in other processes never see a partially written file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            __epochs__=epoch_metrics.epochs,
+            __lastmod__=_to_npz_float(epoch_metrics.lastmod),
+            __first_lastmod__=_to_npz_float(epoch_metrics.first_lastmod),
+            **epoch_metrics.columns,
+        )
+    os.replace(tmp_path, path)
+    prune_sidecars(path.parent, METRICS_CACHE_SIZE)
+
+
+def load_epoch_metrics(path: Path) -> Optional[EpochMetrics]:
+    """
+    Load metrics saved with ``save_epoch_metrics``, or return ``None`` if the file
+    doesn't exist or can't be read.
+    """
+    try:
+        with np.load(path) as data:
+            columns = {
+                name: data[name]
+                for name in data.files
+                if name not in ("__epochs__", "__lastmod__", "__first_lastmod__")
+            }
+            return EpochMetrics(
+                epochs=data["__epochs__"],
+                columns=columns,
+                lastmod=_from_npz_float(data["__lastmod__"]),
+                first_lastmod=_from_npz_float(data["__first_lastmod__"]),
+            )
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+class ExperimentCache:
+    """
+    A size-bounded LRU cache of ``Experiment`` objects keyed by path, shared by
+    every ``ExperimentService`` created with ``ExperimentService.from_cache``.
+
+    Keeping the ``Experiment`` around means its ``FileData`` don't have to be
+    recreated (and their files stat-ed) on every request, and files that haven't
+    changed since they were last read aren't read again. Entries are stored along with
+    the mtime of the experiment directory when they were created, since files being
+    added, removed, or replaced within the directory changes it.
+    """
+
+    def __init__(self, size: int = 256) -> None:
+        self.size = size
+        self._entries: "OrderedDict[str, Tuple[float, Experiment, threading.Lock]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, path: str) -> Optional[Tuple[float, Experiment, threading.Lock]]:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                self._entries.move_to_end(path)
+            return entry
+
+    def put(
+        self, path: str, mtime: float, experiment: Experiment, lock: threading.Lock
+    ) -> None:
+        with self._lock:
+            self._entries[path] = (mtime, experiment, lock)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def pop(self, path: str) -> None:
+        with self._lock:
+            self._entries.pop(path, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+experiment_cache = ExperimentCache()
+"""
+The process-wide cache of experiments.
+"""
 
 
 def with_db_update(method):
@@ -32,13 +276,40 @@ class ExperimentService:
 
     EPOCH_METRICS_FNAME = "metrics_epoch_%d.json"
 
-    DIRS_TO_IGNORE: Set[str] = {"vocabulary", "log"}
+    EPOCH_METRICS_FNAME_REGEX = re.compile(r"^metrics_epoch_(\d+)\.json$")
+
+    DEFAULT_VALIDATION_METRIC: str = "-loss"
+
+    METRICS_CACHE_DIRNAME: str = "metrics"
+
+    TAGS_TABLE: str = "experiment_tags"
+
+    CONFIGS_TABLE: str = "experiment_configs"
 
-    DB_FIELD_NAMES: Tuple[str, str, str] = ("path", "tags", "finished")
+    PARAMS_TABLE: str = "experiment_params"
 
-    def __init__(self, path: Path, db=None) -> None:
+    DB_FIELD_NAMES: Tuple[str, ...] = (
+        "path",
+        "tags",
+        "finished",
+        "status",
+        "mtime",
+        "epochs",
+        "best_epoch",
+        "training_duration",
+        "validation_metric",
+        "best_validation_metric",
+    )
+
+    def __init__(
+        self,
+        path: Path,
+        db=None,
+        experiment: Optional[Experiment] = None,
+        lock: Optional[threading.Lock] = None,
+    ) -> None:
         self._db = db
-        self.e = Experiment(
+        self.e = experiment or Experiment(
             path=path,
             config=FileData(path / self.CONFIG_FNAME),
             meta=FileData(path / self.META_FNAME),
@@ -47,6 +318,33 @@ class ExperimentService:
             stderr=FileData(path / self.STDERR_FNAME),
             epochs=[],
         )
+        # Guards `self.e.epochs`, which can be shared with other services.
+        self._lock = lock or threading.Lock()
+
+    @classmethod
+    def from_cache(cls, path: Path, db=None) -> "ExperimentService":
+        """
+        Create a service for the experiment at ``path`` that shares its ``Experiment``
+        with every other service created this way in the same process, as long as the
+        experiment directory hasn't changed. Epochs that were already read are kept
+        even if it has.
+        """
+        mtime = os.stat(path).st_mtime
+        entry = experiment_cache.get(str(path))
+        if entry is None:
+            es = cls(path, db=db)
+        elif entry[0] == mtime:
+            return cls(path, db=db, experiment=entry[1], lock=entry[2])
+        else:
+            # Files were added, removed, or replaced within the directory, so the
+            # `FileData` are recreated. That happens every time a training run starts
+            # a new epoch, but the epochs already read check themselves for changes
+            # (see `get_epochs`), so they're carried over along with their lock.
+            es = cls(path, db=db, lock=entry[2])
+            es.e.epochs = entry[1].epochs
+            es.e.epoch_metrics = entry[1].epoch_metrics
+        experiment_cache.put(str(path), mtime, es.e, es._lock)
+        return es
 
     def __repr__(self):
         return f"{self.__class__.__name__}({str(self.get_path())})"
@@ -55,8 +353,27 @@ class ExperimentService:
     def db(self):
         return self._db or get_db_from_app()
 
-    def get_db_fields(self) -> Tuple[str, str, int]:
-        return str(self.get_path()), " ".join(self.get_tags()), int(self.is_finished())
+    def get_db_fields(self) -> Tuple[Any, ...]:
+        """
+        Get the values for each of the ``DB_FIELD_NAMES``. Besides the tags, these are
+        a summary of the experiment's progress taken from the final metrics if the
+        experiment has finished, or the metrics from the latest epoch otherwise.
+        """
+        metrics = self.get_latest_metrics() or {}
+        validation_metric = self.get_validation_metric()
+        epoch = metrics.get("epoch")
+        return (
+            str(self.get_path()),
+            " ".join(self.get_tags()),
+            int(self.is_finished()),
+            self.get_status().value,
+            os.stat(self.get_path()).st_mtime,
+            epoch + 1 if epoch is not None else 0,
+            metrics.get("best_epoch"),
+            parse_duration(metrics.get("training_duration")),
+            validation_metric,
+            metrics.get(f"best_validation_{validation_metric[1:]}"),
+        )
 
     def get_path(self) -> Path:
         return self.e.path
@@ -100,13 +417,19 @@ class ExperimentService:
         meta = self.get_meta()
         return sorted(meta.tags)
 
-    @with_db_update
-    def set_tags(self, tags: List[str]) -> None:
+    def write_tags(self, tags: List[str]) -> None:
+        """
+        Write tags to the experiment's meta file without updating the database.
+        """
         meta = self.get_meta()
         meta.tags = tags
         with open(self.e.meta.path, "w") as f:
             f.write(serialize(meta))  # type: ignore
 
+    @with_db_update
+    def set_tags(self, tags: List[str]) -> None:
+        self.write_tags(tags)
+
     def get_metrics(self, epoch: Optional[int] = None) -> Optional[Dict[str, Any]]:
         if epoch is None:
             fd = self.e.metrics
@@ -118,6 +441,59 @@ class ExperimentService:
                 fd.data = json.load(f)
         return fd.data
 
+    def get_last_epoch(self) -> Optional[int]:
+        """
+        Get the number of the latest epoch with metrics, by listing the experiment
+        directory once instead of checking each epoch metrics file.
+        """
+        last_epoch: Optional[int] = None
+        with os.scandir(self.e.path) as it:
+            for entry in it:
+                match = self.EPOCH_METRICS_FNAME_REGEX.match(entry.name)
+                if match:
+                    epoch = int(match.group(1))
+                    if last_epoch is None or epoch > last_epoch:
+                        last_epoch = epoch
+        return last_epoch
+
+    def get_latest_metrics(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the final metrics if the experiment finished, otherwise the metrics
+        from the latest epoch.
+        """
+        if self.is_finished():
+            return self.get_metrics()
+        last_epoch = self.get_last_epoch()
+        if last_epoch is None:
+            return None
+        return self.get_metrics(last_epoch)
+
+    def get_validation_metric(self) -> str:
+        """
+        Get the validation metric used to pick the best epoch, e.g. "-loss".
+        """
+        try:
+            trainer = self.get_config().get("trainer", {})
+        except FileNotFoundError:
+            return self.DEFAULT_VALIDATION_METRIC
+        return trainer.get("validation_metric", self.DEFAULT_VALIDATION_METRIC)
+
+    def get_flat_config(self) -> Dict[str, Any]:
+        """
+        Get the config as a flat dictionary with keys like "trainer.optimizer.lr",
+        or an empty dictionary if the experiment doesn't have a config.
+        """
+        try:
+            return self.get_config().as_flat_dict()
+        except FileNotFoundError:
+            return {}
+
+    def get_config_document(self) -> str:
+        """
+        Get the text of the config that goes into the full-text index.
+        """
+        return get_config_document(self.get_flat_config())
+
     def get_metric_names(self) -> List[str]:
         metrics = self.get_metrics()
         if not metrics:
@@ -146,20 +522,130 @@ class ExperimentService:
         return fd.data
 
     def get_epochs(self) -> List[Epoch]:
-        epoch_number = 0
+        """
+        Get the metrics of every epoch so far. Epochs that were already read are
+        remembered, so each call only checks the latest known epoch for changes and
+        looks for epochs after it.
+        """
+        with self._lock:
+            return self._get_epochs()
+
+    def _get_epochs(self) -> List[Epoch]:
+        # AllenNLP writes the metrics file of an epoch once, at the end of the epoch,
+        # so the metrics of every epoch except the latest are final. The latest one
+        # is still checked for changes before looking for new epochs, and the first
+        # one is checked to tell if the experiment was restarted.
+        epochs = self.e.epochs
+        if epochs:
+            first, latest = epochs[0].metrics, epochs[-1].metrics
+            try:
+                restarted = first.path.stat().st_mtime != first.lastmod
+            except FileNotFoundError:
+                restarted = True
+            if restarted or not latest.path.exists():
+                # The experiment must have been restarted, so start over.
+                del epochs[:]
+            elif latest.should_read():
+                with open(latest.path) as f:
+                    latest.data = json.load(f)
+        epoch_number = len(epochs)
         epoch_metric_path = self.e.path / (self.EPOCH_METRICS_FNAME % epoch_number)
         while epoch_metric_path.exists():
-            try:
-                epoch = self.e.epochs[epoch_number]
-            except IndexError:
-                epoch = Epoch(FileData(epoch_metric_path))
-                self.e.epochs.append(epoch)
+            epoch = Epoch(FileData(epoch_metric_path))
             if epoch.metrics.should_read():
                 with open(epoch_metric_path) as f:
                     epoch.metrics.data = json.load(f)
+            epochs.append(epoch)
             epoch_number += 1
             epoch_metric_path = self.e.path / (self.EPOCH_METRICS_FNAME % epoch_number)
-        return self.e.epochs
+        return epochs
+
+    @classmethod
+    def get_metrics_cache_dir(cls) -> Optional[Path]:
+        """
+        Get the directory for the sidecar files of ``get_epoch_metrics``, which is the
+        "metrics" directory in the app's instance folder, or ``None`` outside of an
+        app context.
+        """
+        if not has_app_context():
+            return None
+        return Path(current_app.instance_path) / cls.METRICS_CACHE_DIRNAME
+
+    def get_epoch_metrics(self, cache_dir: Optional[Path] = None) -> EpochMetrics:
+        """
+        Get the metrics of every epoch as one NumPy array per metric, which can be
+        plotted without going through the metrics of each epoch.
+
+        Metrics of new epochs are appended as their files appear, and the arrays are
+        saved to a sidecar file in ``cache_dir`` so that other worker processes and
+        restarts of the server don't have to parse every metrics file again.
+        ``cache_dir`` defaults to ``get_metrics_cache_dir()``.
+        """
+        if cache_dir is None:
+            cache_dir = self.get_metrics_cache_dir()
+        sidecar_path: Optional[Path] = None
+        if cache_dir is not None:
+            key = hashlib.sha1(os.path.abspath(self.get_path()).encode()).hexdigest()
+            sidecar_path = cache_dir / f"{key}.npz"
+        with self._lock:
+            epoch_metrics = self.e.epoch_metrics
+            if epoch_metrics is None and sidecar_path is not None:
+                epoch_metrics = load_epoch_metrics(sidecar_path)
+            if epoch_metrics is None:
+                epoch_metrics = EpochMetrics(
+                    epochs=np.zeros(0, dtype=np.int64), columns={}
+                )
+            self.e.epoch_metrics = epoch_metrics
+            if self._update_epoch_metrics(epoch_metrics) and sidecar_path is not None:
+                save_epoch_metrics(sidecar_path, epoch_metrics)
+        return epoch_metrics
+
+    def _update_epoch_metrics(self, epoch_metrics: EpochMetrics) -> bool:
+        # Like `get_epochs`, only the latest epoch is checked for changes, after
+        # checking that the metrics are from the current run.
+        changed = False
+        n_epochs = len(epoch_metrics.epochs)
+        if n_epochs:
+            first_path = self.e.path / (self.EPOCH_METRICS_FNAME % 0)
+            try:
+                first_lastmod: Optional[float] = first_path.stat().st_mtime
+            except FileNotFoundError:
+                first_lastmod = None
+            if first_lastmod != epoch_metrics.first_lastmod:
+                # The experiment must have been restarted, so start over.
+                n_epochs = 0
+                truncate_epoch_metrics(epoch_metrics, n_epochs)
+                changed = True
+        if n_epochs:
+            latest_path = self.e.path / (self.EPOCH_METRICS_FNAME % (n_epochs - 1))
+            try:
+                lastmod: Optional[float] = latest_path.stat().st_mtime
+            except FileNotFoundError:
+                # The experiment must have been restarted, so start over.
+                lastmod = None
+                n_epochs = 0
+            if lastmod != epoch_metrics.lastmod:
+                n_epochs = max(n_epochs - 1, 0)
+                truncate_epoch_metrics(epoch_metrics, n_epochs)
+                changed = True
+        rows: List[Tuple[int, Dict[str, Any]]] = []
+        while True:
+            epoch_metric_path = self.e.path / (
+                self.EPOCH_METRICS_FNAME % (n_epochs + len(rows))
+            )
+            try:
+                with open(epoch_metric_path) as f:
+                    lastmod = os.fstat(f.fileno()).st_mtime
+                    rows.append((n_epochs + len(rows), json.load(f)))
+            except FileNotFoundError:
+                break
+            epoch_metrics.lastmod = lastmod
+            if rows[-1][0] == 0:
+                epoch_metrics.first_lastmod = lastmod
+        if rows:
+            append_epoch_metrics(epoch_metrics, rows)
+            changed = True
+        return changed
 
     @classmethod
     def is_experiment(cls, path: Path) -> bool:
@@ -175,60 +661,331 @@ class ExperimentService:
         root = root or Path("./")
         return path.relative_to(root)
 
+    @classmethod
+    def scan_dir(
+        cls, path: Path, ignore: IgnoreMatcher, relpath: str = "."
+    ) -> Tuple[bool, List[str]]:
+        """
+        List a directory in a single pass, returning whether it contains an experiment
+        config and the names of the subdirectories that should be searched for
+        experiments. ``relpath`` is the path of the directory relative to the
+        project root, which is what ``ignore`` patterns are matched against.
+
+        This only relies on the information returned with the directory listing,
+        so it doesn't need to ``stat`` every entry.
+        """
+        has_config = False
+        subdirs: List[str] = []
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.name == cls.CONFIG_FNAME:
+                    has_config = True
+                elif entry.is_dir(follow_symlinks=False) and ignore.should_descend(
+                    relpath, entry.name
+                ):
+                    subdirs.append(entry.name)
+        return has_config, subdirs
+
     @classmethod
     def find_experiments(
-        cls, root: Path = None, ignore_root: bool = True
+        cls,
+        root: Path = None,
+        ignore_root: bool = True,
+        workers: int = 1,
+        ignore: IgnoreMatcher = None,
     ) -> Iterable["ExperimentService"]:
+        """
+        Recursively search for experiments, listing up to ``workers`` directories
+        concurrently. Directories matched by ``ignore`` are skipped, which defaults to
+        the project's ignore patterns.
+        """
         root = root or Path("./")
         root = root.resolve()
-        for dirpath, dirnames, _ in os.walk(root):
-            path = Path(dirpath)
-            if cls.is_experiment(path) and (path != root or not ignore_root):
+        ignore = ignore or IgnoreMatcher.from_project(root)
+
+        def visit(relpath: str) -> Tuple[Optional[str], List[str]]:
+            try:
+                has_config, subdirs = cls.scan_dir(root / relpath, ignore, relpath)
+            except (FileNotFoundError, NotADirectoryError):
+                return None, []
+            if has_config and (relpath != "." or not ignore_root):
                 # If `path` is an experiment, we can ignore all subdirectories
                 # (experiments can't be nested).
-                yield cls(cls.get_canonical_path(path, root))
-                continue
-            # Ignore hidden directories or directories in the explicit ignore list.
-            dirnames[:] = [
-                d
-                for d in dirnames
-                if d not in cls.DIRS_TO_IGNORE or not d.startswith(".")
-            ]
+                return relpath, []
+            return None, [str(Path(relpath) / d) for d in subdirs]
 
-    def update_db_entry(self):
-        field_names = self.DB_FIELD_NAMES
-        fields = self.get_db_fields()
-        c = self.db.cursor()
-        insert_stmnt = (
+        for relpath in parallel_walk(["."], visit, workers=workers):
+            if relpath is not None:
+                yield cls(Path(relpath))
+
+    @classmethod
+    def get_db_insert_statement(cls, n_fields: int = None) -> str:
+        """
+        Get the statement to insert a row with the first ``n_fields`` of ``DB_FIELD_NAMES``
+        (all of them by default).
+        """
+        field_names = cls.DB_FIELD_NAMES[:n_fields]
+        return (
             f"INSERT OR REPLACE INTO {Tables.EXPERIMENTS.value} "
             f"({', '.join(field_names)}) VALUES "
             f"({','.join('?' for _ in field_names)})"
         )
-        c.execute(insert_stmnt, fields)
+
+    @classmethod
+    def write_db_entries(cls, c, entries: List[Tuple[Any, ...]]) -> None:
+        """
+        Insert or replace rows in the experiments table using the cursor ``c``, keeping
+        the ``experiment_tags`` table in sync with the tags of each row.
+        """
+        if not entries:
+            return
+        c.executemany(cls.get_db_insert_statement(len(entries[0])), entries)
+        c.executemany(
+            f"DELETE FROM {cls.TAGS_TABLE} WHERE path = ?",
+            ((entry[0],) for entry in entries),
+        )
+        c.executemany(
+            f"INSERT OR IGNORE INTO {cls.TAGS_TABLE} (path, tag) VALUES (?, ?)",
+            (
+                (entry[0], tag)
+                for entry in entries
+                for tag in entry[1].split(" ")
+                if tag
+            ),
+        )
+
+    @classmethod
+    def delete_db_entries(cls, c, paths: Iterable[str]) -> None:
+        """
+        Delete rows from the experiments table, along with their tags and configs.
+        """
+        rows = [(str(path),) for path in paths]
+        for table in (
+            Tables.EXPERIMENTS.value,
+            cls.TAGS_TABLE,
+            cls.CONFIGS_TABLE,
+            cls.PARAMS_TABLE,
+        ):
+            c.executemany(f"DELETE FROM {table} WHERE path = ?", rows)
+
+    @classmethod
+    def write_db_configs(
+        cls, c, experiments: Iterable["ExperimentService"], root: Path = None
+    ) -> None:
+        """
+        Replace the full-text index entries and the parameters of the configs of
+        ``experiments``, with paths relative to ``root`` if given.
+        """
+        paths: List[Tuple[str]] = []
+        documents: List[Tuple[str, str]] = []
+        params: List[Tuple[str, str, Optional[float], Optional[str]]] = []
+        for es in experiments:
+            path = str(es.get_path().relative_to(root) if root else es.get_path())
+            flat_config = es.get_flat_config()
+            paths.append((path,))
+            documents.append((path, get_config_document(flat_config)))
+            for key, value in flat_config.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    params.append((path, key, value, None))
+                else:
+                    params.append((path, key, None, format_config_value(value)))
+        c.executemany(f"DELETE FROM {cls.CONFIGS_TABLE} WHERE path = ?", paths)
+        c.executemany(
+            f"INSERT INTO {cls.CONFIGS_TABLE} (path, config) VALUES (?, ?)", documents
+        )
+        c.executemany(f"DELETE FROM {cls.PARAMS_TABLE} WHERE path = ?", paths)
+        c.executemany(
+            f"INSERT OR REPLACE INTO {cls.PARAMS_TABLE} "
+            f"(path, key, num_value, str_value) VALUES (?, ?, ?, ?)",
+            params,
+        )
+
+    @classmethod
+    def get_tags_filter(
+        cls, tags: Iterable[str], match_all: bool = True
+    ) -> Tuple[str, List[str]]:
+        """
+        Get a SQL condition on the experiments table, along with its arguments, that
+        matches experiments with all of the given tags (or any of them if ``match_all``
+        is ``False``).
+
+        The condition is answered from the index on the ``experiment_tags`` table
+        instead of splitting the ``tags`` column of every row.
+        """
+        tags = list(OrderedDict.fromkeys(tags))
+        condition = (
+            f"path IN (SELECT path FROM {cls.TAGS_TABLE} "
+            f"WHERE tag IN ({', '.join('?' for _ in tags)})"
+        )
+        if match_all and len(tags) > 1:
+            condition += f" GROUP BY path HAVING COUNT(*) = {len(tags)}"
+        return condition + ")", tags
+
+    @classmethod
+    def get_config_filter(cls, text: str) -> Tuple[str, List[str]]:
+        """
+        Get a SQL condition on the experiments table, along with its arguments, that
+        matches experiments whose config matches the full-text search ``text``.
+        See ``get_config_search_query`` for the syntax.
+        """
+        return (
+            f"path IN (SELECT path FROM {cls.CONFIGS_TABLE} "
+            f"WHERE {cls.CONFIGS_TABLE} MATCH ?)",
+            [get_config_search_query(text)],
+        )
+
+    @classmethod
+    def get_param_filter(
+        cls, key: str, operator: str, values: List[str]
+    ) -> Tuple[str, List[Any]]:
+        """
+        Get a SQL condition on the experiments table, along with its arguments, that
+        matches experiments with a config parameter ``key`` that compares to
+        ``values`` with ``operator``.
+
+        ``operator`` is one of "=", "!=", "<", "<=", ">", ">=", "contains", or "in".
+        Only "in" uses more than one value. Numbers are compared to numeric parameters
+        while everything else is compared to the other parameters as text.
+        """
+        try:
+            numbers: Optional[List[float]] = [float(v) for v in values]
+        except ValueError:
+            numbers = None
+        args: List[Any]
+        if operator == "in":
+            column, args = ("num_value", numbers) if numbers else ("str_value", values)
+            condition = f"{column} IN ({', '.join('?' for _ in args)})"
+        elif numbers:
+            args = numbers[:1]
+            condition = f"num_value {'=' if operator == 'contains' else operator} ?"
+        elif operator == "contains":
+            args = [f"%{values[0]}%"]
+            condition = "str_value LIKE ?"
+        elif operator in ("=", "!="):
+            args = values[:1]
+            condition = f"str_value {operator} ?"
+        else:
+            # Can't compare text with '<' and friends in a meaningful way.
+            return "0", []
+        return (
+            f"path IN (SELECT path FROM {cls.PARAMS_TABLE} "
+            f"WHERE key = ? AND {condition})",
+            [key] + list(args),
+        )
+
+    @classmethod
+    def batch(cls, db=None, workers: int = 8) -> "ExperimentBatch":
+        """
+        Start a batch of changes to many experiments, to be used as a context manager.
+        See ``ExperimentBatch``.
+        """
+        return ExperimentBatch(db=db, workers=workers)
+
+    def update_db_entry(self):
+        c = self.db.cursor()
+        self.write_db_entries(c, [self.get_db_fields()])
         self.db.commit()
 
-    @staticmethod
-    def remove_db_entry(path: Union[str, Path], db=None):
+    @classmethod
+    def remove_db_entry(cls, path: Union[str, Path], db=None):
         db = db or get_db_from_app()
         c = db.cursor()
-        c.execute(
-            f"DELETE FROM {Tables.EXPERIMENTS.value} WHERE path = ?", (str(path),)
-        )
+        cls.delete_db_entries(c, [str(path)])
         db.commit()
 
     @classmethod
-    def init_db_table(cls, db=None, entries: List[Tuple[str, str, int]] = None):
+    def init_db_table(cls, db=None, entries: List[Tuple[Any, ...]] = None):
         db = db or get_db_from_app()
-        entries = entries or [
-            experiment.get_db_fields() for experiment in cls.find_experiments()
-        ]
+        experiments: List["ExperimentService"] = []
+        if not entries:
+            experiments = list(cls.find_experiments())
+            entries = [experiment.get_db_fields() for experiment in experiments]
         c = db.cursor()
         c.execute(f"DELETE FROM {Tables.EXPERIMENTS.value}")
-        field_names = cls.DB_FIELD_NAMES
-        insert_stmnt = (
-            f"INSERT OR REPLACE INTO {Tables.EXPERIMENTS.value} "
-            f"({', '.join(field_names)}) VALUES "
-            f"({','.join('?' for _ in field_names)})"
-        )
-        c.executemany(insert_stmnt, entries)
+        c.execute(f"DELETE FROM {cls.TAGS_TABLE}")
+        c.execute(f"DELETE FROM {cls.CONFIGS_TABLE}")
+        c.execute(f"DELETE FROM {cls.PARAMS_TABLE}")
+        cls.write_db_entries(c, entries)
+        cls.write_db_configs(c, experiments)
         db.commit()
+
+
+class ExperimentBatch:
+    """
+    A unit of work for changing many experiments at once, such as tagging all of the
+    experiments selected in the dashboard.
+
+    Changes are collected until the batch is committed, which happens when leaving
+    the ``with`` block without an error. Files are then written concurrently over a
+    pool of ``workers`` threads, and all of the database rows are written in a single
+    transaction, instead of one transaction (and sync to disk) per experiment.
+
+    Example::
+
+        with ExperimentService.batch() as batch:
+            for es in experiments:
+                batch.update_tags(es, add=["baseline"])
+    """
+
+    def __init__(self, db=None, workers: int = 8) -> None:
+        self._db = db
+        self.workers = workers
+        self._tags: Dict[Path, Tuple[ExperimentService, List[str]]] = OrderedDict()
+        self._removed: Dict[str, None] = OrderedDict()
+
+    @property
+    def db(self):
+        return self._db or get_db_from_app()
+
+    def set_tags(self, es: ExperimentService, tags: List[str]) -> None:
+        self._tags[es.get_path()] = (es, list(tags))
+
+    def update_tags(
+        self,
+        es: ExperimentService,
+        add: Iterable[str] = (),
+        remove: Iterable[str] = (),
+    ) -> None:
+        """
+        Add and remove tags, leaving the experiment's other tags as they are.
+        """
+        if es.get_path() in self._tags:
+            tags = self._tags[es.get_path()][1]
+        else:
+            tags = es.get_tags()
+        remove = set(remove)
+        tags = [t for t in tags if t not in remove]
+        tags.extend(t for t in add if t not in tags)
+        self.set_tags(es, tags)
+
+    def remove_db_entry(self, path: Union[str, Path]) -> None:
+        self._removed[str(path)] = None
+
+    def __len__(self) -> int:
+        return len(self._tags) + len(self._removed)
+
+    def commit(self) -> None:
+        def write(item: Tuple[ExperimentService, List[str]]) -> Tuple[Any, ...]:
+            es, tags = item
+            es.write_tags(tags)
+            return es.get_db_fields()
+
+        items = list(self._tags.values())
+        if self.workers > 1 and len(items) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                entries = list(executor.map(write, items))
+        else:
+            entries = [write(item) for item in items]
+        c = self.db.cursor()
+        ExperimentService.delete_db_entries(c, self._removed)
+        ExperimentService.write_db_entries(c, entries)
+        self.db.commit()
+        self._tags.clear()
+        self._removed.clear()
+
+    def __enter__(self) -> "ExperimentBatch":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.commit()
@@ -0,0 +1,97 @@
+import fnmatch
+from pathlib import Path
+import re
+from typing import Iterable, List, Optional, Pattern
+
+from mallennlp.exceptions import NotInProjectError
+from mallennlp.services.config import Config
+
+
+IGNORE_FNAME = ".mallennlpignore"
+
+DEFAULT_IGNORE_PATTERNS: List[str] = [
+    # Experiment subdirectories.
+    "vocabulary",
+    "log",
+    # Python environments and caches.
+    "__pycache__",
+    "venv",
+    "site-packages",
+    "node_modules",
+]
+"""
+Directories that never contain experiments but can contain a huge number of files.
+Hidden directories such as ``.git`` are always ignored as well.
+"""
+
+
+def _compile(patterns: List[str]) -> Optional[Pattern]:
+    if not patterns:
+        return None
+    return re.compile("|".join(fnmatch.translate(p) for p in patterns))
+
+
+class IgnoreMatcher:
+    """
+    Decides which directories to skip when searching a project for experiments.
+
+    Patterns are globs. Patterns that contain a "/" (other than a trailing one) are
+    matched against the path of a directory relative to the project root, while all
+    other patterns are matched against the directory's name. All patterns of each
+    kind are compiled into a single regular expression, so the cost of checking a
+    directory doesn't grow with the number of patterns.
+    """
+
+    def __init__(
+        self, patterns: Iterable[str] = None, max_depth: Optional[int] = None
+    ) -> None:
+        name_patterns: List[str] = []
+        path_patterns: List[str] = []
+        for pattern in DEFAULT_IGNORE_PATTERNS if patterns is None else patterns:
+            pattern = pattern.strip().rstrip("/")
+            if not pattern or pattern.startswith("#"):
+                continue
+            if "/" in pattern:
+                path_patterns.append(pattern.lstrip("/"))
+            else:
+                name_patterns.append(pattern)
+        self._name_regex = _compile(name_patterns)
+        self._path_regex = _compile(path_patterns)
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_project(cls, root: Path) -> "IgnoreMatcher":
+        """
+        Create a matcher from the default patterns, the ``ignore`` and ``max_depth``
+        options in the project's ``Project.toml``, and the patterns listed in the
+        project's ``.mallennlpignore`` file.
+        """
+        patterns = list(DEFAULT_IGNORE_PATTERNS)
+        max_depth: Optional[int] = None
+        try:
+            config = Config.from_toml(root)
+            patterns.extend(config.project.ignore or [])
+            max_depth = config.project.max_depth
+        except NotInProjectError:
+            pass
+        ignore_path = root / IGNORE_FNAME
+        if ignore_path.exists():
+            with open(ignore_path) as ignore_file:
+                patterns.extend(ignore_file.read().splitlines())
+        return cls(patterns, max_depth=max_depth)
+
+    def should_descend(self, parent: str, name: str) -> bool:
+        """
+        Check whether to search the directory ``name`` within ``parent`` for experiments,
+        where ``parent`` is a path relative to the project root ("." for the root).
+        """
+        if name.startswith("."):
+            return False
+        if self._name_regex is not None and self._name_regex.match(name):
+            return False
+        path = name if parent == "." else f"{parent}/{name}"
+        if self.max_depth is not None and path.count("/") + 1 > self.max_depth:
+            return False
+        if self._path_regex is not None and self._path_regex.match(path):
+            return False
+        return True
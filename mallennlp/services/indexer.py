@@ -0,0 +1,225 @@
+import os
+from pathlib import Path
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from mallennlp.domain.experiment import IndexUpdate
+from mallennlp.services.db import Tables, get_db_from_app
+from mallennlp.services.experiment import ExperimentService
+from mallennlp.services.ignore import IgnoreMatcher
+from mallennlp.services.scanner import parallel_walk
+
+
+DirRecord = Tuple[Optional[str], Optional[int], int, int]
+"""
+A row from the ``experiment_dirs`` table: ``(parent, mtime_ns, inode, is_experiment)``.
+"""
+
+DirRow = Tuple[str, Optional[str], Optional[int], int, int]
+"""
+A full row to insert into the ``experiment_dirs`` table.
+"""
+
+VisitResult = Tuple[str, Optional[DirRow], bool]
+"""
+The path of a directory visited, a new row for it if it changed, and whether it's
+an experiment.
+"""
+
+
+class ExperimentIndexer:
+    """
+    Incrementally keeps the experiments table in sync with the project directory tree.
+
+    The mtime and inode of every directory visited is recorded in the ``experiment_dirs``
+    table. Since the mtime of a directory only changes when entries are added, removed,
+    or renamed directly within it, only directories whose mtime or inode changed
+    since the last update need to be listed. For all other directories we just
+    follow the subdirectories recorded last time.
+    """
+
+    TABLE: str = "experiment_dirs"
+
+    SCHEMA_VERSION: int = 5
+    """
+    Needs to match the ``user_version`` set in ``schema/experiments.sql``.
+    """
+
+    RACY_MTIME_NS: int = 2_000_000_000
+    """
+    Directories modified this close to the start of an update could be modified again
+    without their mtime changing (depending on the resolution of the filesystem's
+    timestamps), so they will always be listed again on the next update.
+    """
+
+    def __init__(
+        self,
+        root: Path = None,
+        db=None,
+        workers: int = 1,
+        ignore: IgnoreMatcher = None,
+    ) -> None:
+        self.root = (root or Path("./")).resolve()
+        self._db = db
+        self.workers = workers
+        self.ignore = ignore or IgnoreMatcher.from_project(self.root)
+
+    @property
+    def db(self):
+        return self._db or get_db_from_app()
+
+    @classmethod
+    def is_ready(cls, db) -> bool:
+        """
+        Check whether the index tables exist and match the current schema.
+        """
+        return db.execute("PRAGMA user_version").fetchone()[0] == cls.SCHEMA_VERSION
+
+    def list_dir(self, path: str) -> Tuple[bool, List[str]]:
+        """
+        List a directory relative to the root, returning whether it's an experiment
+        and the paths of the subdirectories that should be descended into.
+        """
+        has_config, subdirs = ExperimentService.scan_dir(
+            self.root / path, self.ignore, path
+        )
+        if has_config and path != ".":
+            # Experiments can't be nested, so we never descend into them.
+            return True, []
+        return False, [str(Path(path) / d) for d in subdirs]
+
+    def _load_dirs(self) -> Dict[str, DirRecord]:
+        cursor = self.db.execute(
+            f"SELECT path, parent, mtime_ns, inode, is_experiment FROM {self.TABLE}"
+        )
+        return {
+            row["path"]: (
+                row["parent"],
+                row["mtime_ns"],
+                row["inode"],
+                row["is_experiment"],
+            )
+            for row in cursor
+        }
+
+    def update(self) -> IndexUpdate:
+        """
+        Bring the experiments table up-to-date with the project directory tree,
+        only touching the rows of experiments that were added, removed, or changed.
+        """
+        start_ns = int(time.time() * 1e9)
+        known = self._load_dirs()
+        children: Dict[Optional[str], List[str]] = {}
+        for path, record in known.items():
+            children.setdefault(record[0], []).append(path)
+
+        def visit(
+            node: Tuple[str, Optional[str]]
+        ) -> Tuple[Optional[VisitResult], List[Tuple[str, Optional[str]]]]:
+            path, parent = node
+            try:
+                st = os.stat(self.root / path)
+                record = known.get(path)
+                if record is not None and record[1:3] == (st.st_mtime_ns, st.st_ino):
+                    # Directory hasn't changed since the last update.
+                    is_experiment = bool(record[3])
+                    subdirs = [
+                        d
+                        for d in ([] if is_experiment else children.get(path, []))
+                        # Ignore patterns may have changed since the last update.
+                        if self.ignore.should_descend(path, d.rsplit("/", 1)[-1])
+                    ]
+                    return (path, None, is_experiment), [(d, path) for d in subdirs]
+                is_experiment, subdirs = self.list_dir(path)
+            except (FileNotFoundError, NotADirectoryError):
+                # Directory was removed while we were scanning.
+                return None, []
+            mtime_ns: Optional[int] = st.st_mtime_ns
+            if start_ns - st.st_mtime_ns < self.RACY_MTIME_NS:
+                mtime_ns = None
+            row = (path, parent, mtime_ns, st.st_ino, int(is_experiment))
+            return (path, row, is_experiment), [(d, path) for d in subdirs]
+
+        seen: Set[str] = set()
+        experiments: Set[str] = set()
+        modified: Set[str] = set()
+        dir_upserts: List[DirRow] = []
+        start: List[Tuple[str, Optional[str]]] = [(".", None)]
+        for result in parallel_walk(start, visit, workers=self.workers):
+            if result is None:
+                continue
+            path, row, is_experiment = result
+            seen.add(path)
+            if row is not None:
+                dir_upserts.append(row)
+            if is_experiment:
+                experiments.add(path)
+                if row is not None:
+                    modified.add(path)
+
+        indexed = {
+            row["path"]
+            for row in self.db.execute(f"SELECT path FROM {Tables.EXPERIMENTS.value}")
+        }
+        added = sorted(experiments - indexed)
+        removed = sorted(indexed - experiments)
+        changed = sorted(modified & indexed)
+
+        experiments_to_write = [
+            ExperimentService(self.root / path) for path in added + changed
+        ]
+        entries = [
+            (path,) + es.get_db_fields()[1:]
+            for path, es in zip(added + changed, experiments_to_write)
+        ]
+        c = self.db.cursor()
+        ExperimentService.delete_db_entries(c, removed)
+        ExperimentService.write_db_entries(c, entries)
+        ExperimentService.write_db_configs(c, experiments_to_write, self.root)
+        c.executemany(
+            f"DELETE FROM {self.TABLE} WHERE path = ?",
+            ((path,) for path in known.keys() - seen),
+        )
+        c.executemany(
+            f"INSERT OR REPLACE INTO {self.TABLE} "
+            f"(path, parent, mtime_ns, inode, is_experiment) VALUES (?, ?, ?, ?, ?)",
+            dir_upserts,
+        )
+        self.db.commit()
+        return IndexUpdate(
+            added=added, removed=removed, changed=changed, total=len(experiments)
+        )
+
+    def refresh(self, paths: Iterable[str]) -> IndexUpdate:
+        """
+        Update the rows of specific experiments, e.g. after files within them have been
+        written to. Paths that are no longer experiments are removed from the index.
+        """
+        added: List[str] = []
+        removed: List[str] = []
+        changed: List[str] = []
+        entries = []
+        experiments_to_write: List[ExperimentService] = []
+        c = self.db.cursor()
+        for path in sorted(set(paths)):
+            indexed = (
+                c.execute(
+                    f"SELECT 1 FROM {Tables.EXPERIMENTS.value} WHERE path = ?", (path,)
+                ).fetchone()
+                is not None
+            )
+            if ExperimentService.is_experiment(self.root / path):
+                es = ExperimentService(self.root / path)
+                entries.append((path,) + es.get_db_fields()[1:])
+                experiments_to_write.append(es)
+                (changed if indexed else added).append(path)
+            elif indexed:
+                removed.append(path)
+        ExperimentService.delete_db_entries(c, removed)
+        ExperimentService.write_db_entries(c, entries)
+        ExperimentService.write_db_configs(c, experiments_to_write, self.root)
+        self.db.commit()
+        total = c.execute(f"SELECT COUNT(*) FROM {Tables.EXPERIMENTS.value}").fetchone()
+        return IndexUpdate(
+            added=added, removed=removed, changed=changed, total=total[0]
+        )
@@ -0,0 +1,355 @@
+from bisect import bisect_right
+from collections import OrderedDict
+import hashlib
+import logging
+import os
+from pathlib import Path
+import threading
+import time
+from typing import BinaryIO, List, Optional, Tuple
+
+from flask import current_app, has_app_context
+import numpy as np
+
+from mallennlp.services.sidecar import prune_sidecars
+
+
+logger = logging.getLogger(__name__)
+
+
+NEWLINE = ord("\n")
+
+BLOCK_SIZE = 1024 * 1024
+"""
+Number of bytes read at a time when scanning a file for newlines.
+"""
+
+SYNC_INDEX_SIZE = 16 * 1024 * 1024
+"""
+Number of bytes that `LineIndexCache.get_nowait` indexes right away. The rest of a
+file that has more than this left to index is indexed in the background.
+"""
+
+LINE_INDEX_CACHE_DIRNAME = "line_index"
+
+LINE_INDEX_CACHE_SIZE = 1024
+"""
+Maximum number of sidecar files saved by ``save_line_index`` to keep.
+"""
+
+FINGERPRINT_SIZE = 64
+"""
+Number of bytes before an offset that `get_fingerprint` hashes.
+"""
+
+
+def get_fingerprint(fd: int, offset: int) -> str:
+    """
+    Hash the bytes right before ``offset`` in an open file. If the file is truncated
+    and rewritten past ``offset`` these bytes almost certainly change, which the size
+    of the file alone wouldn't show.
+    """
+    start = max(0, offset - FINGERPRINT_SIZE)
+    return hashlib.sha1(os.pread(fd, offset - start, start)).hexdigest()
+
+
+class LineIndex:
+    """
+    A sparse index of the lines in a file, which holds the byte offset of every
+    ``interval``-th line.
+
+    The index is built by counting newlines in large binary blocks, without decoding
+    them, and it's extended incrementally as the file grows. The number of the line
+    at any offset can then be found by reading at most ``interval`` lines from the
+    closest checkpoint before it.
+    """
+
+    def __init__(self, interval: int = 1000) -> None:
+        self.interval = interval
+        self.checkpoints: List[int] = [0]
+        """
+        The offset of line ``i * interval`` (counting from 0) is ``checkpoints[i]``.
+        """
+        self.n_lines = 0
+        """
+        The number of newlines in the part of the file that's been indexed.
+        """
+        self.end = 0
+        """
+        The offset up to which the file has been indexed.
+        """
+        self.fingerprint: Optional[str] = None
+        """
+        The `get_fingerprint` of the file at ``end``, set by ``LineIndexCache``.
+        """
+
+    def extend(self, f: BinaryIO, limit: Optional[int] = None) -> None:
+        """
+        Index the rest of a file opened in binary mode, or at most the next ``limit``
+        bytes of it.
+        """
+        f.seek(self.end)
+        remaining = limit
+        while remaining is None or remaining > 0:
+            block = f.read(
+                BLOCK_SIZE if remaining is None else min(BLOCK_SIZE, remaining)
+            )
+            if not block:
+                break
+            if remaining is not None:
+                remaining -= len(block)
+            newlines = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == NEWLINE)
+            # The line after the i-th newline in the block is line
+            # `self.n_lines + i + 1`, which needs a checkpoint when that's a
+            # multiple of the interval.
+            first = -(self.n_lines + 1) % self.interval
+            self.checkpoints.extend(
+                (newlines[first :: self.interval] + self.end + 1).tolist()
+            )
+            self.n_lines += len(newlines)
+            self.end += len(block)
+
+    def count_lines(self, f: BinaryIO, offset: int) -> int:
+        """
+        Get the number of newlines before ``offset``, which has to have been indexed
+        already.
+        """
+        if offset > self.end:
+            raise ValueError(f"offset {offset} hasn't been indexed")
+        i = bisect_right(self.checkpoints, offset) - 1
+        f.seek(self.checkpoints[i])
+        return i * self.interval + f.read(offset - self.checkpoints[i]).count(b"\n")
+
+    def find_line(self, f: BinaryIO, line: int) -> Optional[int]:
+        """
+        Get the offset of the start of a line (counting from 0), or ``None`` if the
+        part of the file that's been indexed doesn't have that many lines.
+        """
+        if line < 0 or line > self.n_lines:
+            return None
+        f.seek(self.checkpoints[line // self.interval])
+        for _ in range(line % self.interval):
+            f.readline()
+        return f.tell()
+
+
+def save_line_index(path: Path, index: LineIndex, inode: int) -> None:
+    """
+    Save ``index`` of the file with the given inode to an uncompressed ``.npz`` file.
+    The file is replaced atomically, so readers in other processes never see a
+    partially written file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            checkpoints=np.array(index.checkpoints, dtype=np.int64),
+            header=np.array(
+                [index.interval, index.n_lines, index.end, inode], dtype=np.int64
+            ),
+            fingerprint=np.array(index.fingerprint or ""),
+        )
+    os.replace(tmp_path, path)
+    prune_sidecars(path.parent, LINE_INDEX_CACHE_SIZE)
+
+
+def get_line_index_path(cache_dir: Path, path: str, inode: int) -> Path:
+    """
+    Get the path of the sidecar file of the index of the file at ``path`` with the
+    given inode.
+    """
+    key = hashlib.sha1(f"{os.path.abspath(path)}:{inode}".encode()).hexdigest()
+    return cache_dir / f"{key}.npz"
+
+
+def load_line_index(path: Path, inode: int) -> Optional[LineIndex]:
+    """
+    Load an index saved with ``save_line_index``, or return ``None`` if the file
+    doesn't exist, can't be read, or is for a different inode.
+    """
+    try:
+        with np.load(path) as data:
+            interval, n_lines, end, saved_inode = data["header"].tolist()
+            if saved_inode != inode:
+                return None
+            index = LineIndex(interval=interval)
+            index.checkpoints = data["checkpoints"].tolist()
+            index.n_lines = n_lines
+            index.end = end
+            index.fingerprint = str(data["fingerprint"]) or None
+            return index
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def get_line_index_cache_dir() -> Optional[Path]:
+    """
+    Get the directory where line indexes are saved, which is the "line_index"
+    directory in the app's instance folder, or ``None`` outside of an app context.
+    """
+    if not has_app_context():
+        return None
+    return Path(current_app.instance_path) / LINE_INDEX_CACHE_DIRNAME
+
+
+def is_valid(index: LineIndex, fd: int) -> bool:
+    """
+    Check that the file hasn't been truncated since it was indexed, even if it has
+    grown past where it was indexed up to since.
+    """
+    if index.end > os.fstat(fd).st_size:
+        return False
+    return index.fingerprint is None or index.fingerprint == get_fingerprint(
+        fd, index.end
+    )
+
+
+class _Entry:
+    def __init__(self, inode: int) -> None:
+        self.inode = inode
+        self.index: Optional[LineIndex] = None
+        self.lock = threading.Lock()
+        """
+        Held while the index is loaded or extended, which can take a while, so the
+        lock of the whole cache isn't held for that long.
+        """
+        self.building = False
+        """
+        Whether the index is being built in the background.
+        """
+
+
+class LineIndexCache:
+    """
+    A size-bounded LRU cache of ``LineIndex`` objects keyed by path, so that each
+    file is only scanned from the start once. An entry is dropped when its file is
+    replaced or truncated.
+
+    Indexes are also saved to sidecar files keyed by the path and inode of the file,
+    so that other worker processes and restarts of the server only have to index
+    what was written since.
+    """
+
+    def __init__(self, size: int = 64) -> None:
+        self.size = size
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self, path: str, f: BinaryIO, cache_dir: Optional[Path] = None
+    ) -> LineIndex:
+        """
+        Get the index of the file at ``path``, opened as ``f``, indexed up to the
+        end of the file. ``cache_dir`` defaults to ``get_line_index_cache_dir()``.
+
+        This waits for the file to be indexed, even if that's being done in the
+        background.
+        """
+        entry, sidecar_path = self._get_entry(path, f, cache_dir)
+        with entry.lock:
+            return self._extend(entry, f, sidecar_path)
+
+    def get_nowait(
+        self, path: str, f: BinaryIO, cache_dir: Optional[Path] = None
+    ) -> Optional[LineIndex]:
+        """
+        Like `get`, but if more than `SYNC_INDEX_SIZE` bytes of the file are left to
+        index, start indexing them in the background and return ``None`` instead of
+        waiting, so opening a big file for the first time isn't slowed down by it.
+        """
+        entry, sidecar_path = self._get_entry(path, f, cache_dir)
+        if not entry.lock.acquire(blocking=False):
+            return None
+        try:
+            index = self._extend(entry, f, sidecar_path, limit=SYNC_INDEX_SIZE)
+            if index.end >= os.fstat(f.fileno()).st_size:
+                return index
+            if entry.building:
+                return None
+            entry.building = True
+        finally:
+            entry.lock.release()
+        thread = threading.Thread(
+            target=self._build, args=(path, entry, sidecar_path), daemon=True
+        )
+        thread.start()
+        return None
+
+    def _get_entry(
+        self, path: str, f: BinaryIO, cache_dir: Optional[Path]
+    ) -> Tuple[_Entry, Optional[Path]]:
+        if cache_dir is None:
+            cache_dir = get_line_index_cache_dir()
+        st = os.fstat(f.fileno())
+        sidecar_path: Optional[Path] = None
+        if cache_dir is not None:
+            sidecar_path = get_line_index_path(cache_dir, path, st.st_ino)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.inode != st.st_ino and cache_dir is not None:
+                # The file was replaced, so the index of the old one isn't needed.
+                try:
+                    os.remove(get_line_index_path(cache_dir, path, entry.inode))
+                except FileNotFoundError:
+                    pass
+            if entry is None or entry.inode != st.st_ino:
+                entry = self._entries[path] = _Entry(st.st_ino)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return entry, sidecar_path
+
+    def _extend(
+        self,
+        entry: _Entry,
+        f: BinaryIO,
+        sidecar_path: Optional[Path],
+        limit: Optional[int] = None,
+    ) -> LineIndex:
+        """
+        Extend the index of an entry, loading it from its sidecar file first or
+        starting over if it isn't valid. The lock of the entry has to be held.
+        """
+        fd = f.fileno()
+        index = entry.index
+        if index is None or not is_valid(index, fd):
+            index = None
+            if sidecar_path is not None:
+                index = load_line_index(sidecar_path, entry.inode)
+                if index is not None and not is_valid(index, fd):
+                    index = None
+            entry.index = index = index or LineIndex()
+        end = index.end
+        index.extend(f, limit)
+        index.fingerprint = get_fingerprint(fd, index.end)
+        if index.end != end and sidecar_path is not None:
+            save_line_index(sidecar_path, index, entry.inode)
+        return index
+
+    def _build(self, path: str, entry: _Entry, sidecar_path: Optional[Path]) -> None:
+        with entry.lock:
+            try:
+                with open(path, "rb") as f:
+                    if os.fstat(f.fileno()).st_ino != entry.inode:
+                        return
+                    while True:
+                        # The sidecar file is only saved once the file is indexed.
+                        index = self._extend(entry, f, None, limit=SYNC_INDEX_SIZE)
+                        if index.end >= os.fstat(f.fileno()).st_size:
+                            break
+                        # Under the gevent workers that serve the dashboard this
+                        # thread is a greenlet, so let the others run between chunks.
+                        time.sleep(0)
+                    if sidecar_path is not None:
+                        save_line_index(sidecar_path, index, entry.inode)
+            except Exception as e:
+                logger.exception(e)
+            finally:
+                entry.building = False
+
+
+line_index_cache = LineIndexCache()
@@ -1,15 +1,230 @@
+from collections import deque
+from io import BufferedReader
+import os
 from pathlib import Path
-from typing import List, Optional
+import re
+from typing import BinaryIO, Callable, Deque, Iterator, List, Optional, Pattern, TextIO
 
 import attr
+import numpy as np
 
-from mallennlp.services.serde import serde
+from mallennlp.services.line_index import NEWLINE, get_fingerprint, line_index_cache
+from mallennlp.services.serde import serde, TRANSIENT
+
+
+TAIL_BLOCK_SIZE = 64 * 1024
+"""
+Number of bytes read at a time when seeking backwards through a file.
+"""
+
+SCAN_BLOCK_SIZE = 1024 * 1024
+"""
+Number of bytes scanned for newlines at a time by `LogStreamService.readlines`.
+"""
 
 
 @serde
 class Line:
     content: str
     number: int
+    approximate: bool = False
+    """
+    Whether ``number`` is only an estimate, since the file hasn't been indexed yet.
+    """
+
+
+def seek_lines_back(f: BinaryIO, end: int, n: int) -> int:
+    """
+    Find the offset of the start of the ``n``-th line before the line containing
+    ``end`` in a file opened in binary mode, or 0 if there are less than ``n`` lines
+    before it. The file is read backwards from ``end`` in blocks, so only those lines
+    are read.
+    """
+    pos = end
+    count = 0
+    while pos > 0:
+        start = max(0, pos - TAIL_BLOCK_SIZE)
+        f.seek(start)
+        block = f.read(pos - start)
+        i = len(block)
+        while True:
+            i = block.rfind(b"\n", 0, i)
+            if i < 0:
+                break
+            count += 1
+            if count > n:
+                return start + i + 1
+        pos = start
+    return 0
+
+
+def decode_lines(data: bytes) -> List[str]:
+    """
+    Decode the complete lines in bytes read from a log file, leaving out a trailing
+    partial line.
+    """
+    lines = data.decode(errors="replace").split("\n")
+    return [line.strip() for line in lines[:-1]]
+
+
+def estimate_line_number(start: int, end: int, n_lines: int) -> int:
+    """
+    Estimate the number of the line starting at offset ``start`` of a file, given that
+    there are ``n_lines`` lines between ``start`` and ``end``.
+    """
+    if not start or not n_lines:
+        return 1
+    return round(start * n_lines / (end - start)) + 1
+
+
+def find_newlines(buffer: bytearray, size: int, offset: int) -> np.ndarray:
+    """
+    Get the offsets in a file of the newlines in the first ``size`` bytes of
+    ``buffer``, which were read from ``offset`` in the file.
+    """
+    block = np.frombuffer(buffer, dtype=np.uint8, count=size)
+    return np.flatnonzero(block == NEWLINE) + offset
+
+
+SEARCH_BLOCK_SIZE = 1024 * 1024
+"""
+Number of bytes read at a time when searching a file.
+"""
+
+_UNSAFE_PREFILTER_RE = re.compile(
+    r"[\^$]|\\[wWdDsSbBAZuUNx0-9]|\(\?[aiLmsux-]|(?<!\\)(?:\\\\)*\."
+)
+
+
+def get_prefilter(regex: Pattern[str]) -> Optional[Pattern[bytes]]:
+    """
+    Get a bytes version of ``regex`` that matches at least every line ``regex`` matches,
+    so lines can be filtered out before being decoded, or ``None`` if there isn't one.
+
+    That's not the case if the pattern has non-ASCII characters, anchors (lines are
+    stripped before they're matched with ``regex``), or anything that matches a
+    single character that could be non-ASCII, like ``.``, negated character sets,
+    and Unicode character classes, since that's more than one byte in UTF-8. Escapes
+    of character codes, like ``\xe9``, are left out too, since they'd match the
+    Latin-1 byte rather than the UTF-8 character, and so are inline flags, some of
+    which bytes patterns don't support.
+    """
+    pattern = regex.pattern
+    if any(ord(c) >= 128 for c in pattern) or _UNSAFE_PREFILTER_RE.search(pattern):
+        return None
+    if regex.flags & re.IGNORECASE and re.search("[iks]", pattern, re.IGNORECASE):
+        # These match non-ASCII characters too ("ı", "K", and "ſ").
+        return None
+    flags = regex.flags & (re.IGNORECASE | re.MULTILINE | re.DOTALL | re.VERBOSE)
+    try:
+        return re.compile(pattern.encode(), flags)
+    except re.error:
+        return None
+
+
+@serde
+class SearchCursor:
+    """
+    Where a search of a file that's done in steps with `search_lines` is up to.
+    """
+
+    end: int
+    """
+    Offset in the file that the search stops at.
+    """
+
+    position: int = 0
+    """
+    Offset of the start of the next line to search.
+    """
+
+    line_number: int = 1
+    """
+    Number of the line at `position`.
+    """
+
+    @property
+    def done(self) -> bool:
+        return self.position >= self.end
+
+
+def search_lines(
+    f: BinaryIO,
+    regex: Pattern[str],
+    end: Optional[int] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    cursor: Optional[SearchCursor] = None,
+) -> Iterator[Line]:
+    """
+    Find the complete lines before ``end`` in a file opened in binary mode that
+    match ``regex``, yielding them as they're found.
+
+    The file is read in large blocks, and when there's a prefilter for ``regex`` (see
+    `get_prefilter`) only the lines it matches are decoded. The search stops early
+    when ``should_stop`` returns ``True``, which is checked after each block.
+
+    If there's a ``cursor``, the search starts where it's up to and stops at its end
+    instead, and the cursor is moved past each block once it's been searched, so
+    a search that was stopped early can be continued later.
+    """
+    prefilter = get_prefilter(regex)
+    start = 0
+    number = 1
+    if cursor is not None:
+        start, end, number = cursor.position, cursor.end, cursor.line_number
+    f.seek(start)
+    remaining = None if end is None else max(0, end - start)
+    # Offset of the start of the next block, after the partial line carried over.
+    position = start
+    carry = b""
+    # Whether the last block didn't finish a line, in which case the search goes on,
+    # since stopping there would leave the cursor where it was.
+    in_line = False
+    while in_line or should_stop is None or not should_stop():
+        size = (
+            SEARCH_BLOCK_SIZE
+            if remaining is None
+            else min(SEARCH_BLOCK_SIZE, remaining)
+        )
+        data = f.read(size) if size else b""
+        if not data:
+            if cursor is not None:
+                cursor.position = cursor.end
+            return
+        if remaining is not None:
+            remaining -= len(data)
+        block = carry + data
+        cut = block.rfind(b"\n") + 1
+        block, carry = block[:cut], block[cut:]
+        in_line = not cut
+        if prefilter is None:
+            lines = block.decode(errors="replace").split("\n")[:-1]
+            for i, line in enumerate(lines):
+                content = line.strip()
+                if regex.search(content):
+                    yield Line(content, number + i)
+        else:
+            pos = 0
+            line_number = number
+            while True:
+                m = prefilter.search(block, pos)
+                if m is None:
+                    break
+                start = block.rfind(b"\n", 0, m.start()) + 1
+                stop = block.find(b"\n", m.start())
+                if stop < 0:
+                    break
+                line_number += block.count(b"\n", pos, start)
+                content = block[start:stop].decode(errors="replace").strip()
+                if regex.search(content):
+                    yield Line(content, line_number)
+                pos = stop + 1
+                line_number += 1
+        number += block.count(b"\n")
+        position += cut
+        if cursor is not None:
+            cursor.position = position
+            cursor.line_number = number
 
 
 @serde
@@ -19,9 +234,9 @@ class LogStreamService:
     Path to the log file to stream.
     """
 
-    _lines: List[Line] = attr.ib(default=attr.Factory(list))
+    _line_number: int = 0
     """
-    Keeps track of current lines.
+    Number of the last complete line read.
     """
 
     _current_line: str = ""
@@ -34,11 +249,43 @@ class LogStreamService:
     Keeps track of current position in the file.
     """
 
+    _inode: Optional[int] = None
+    """
+    Inode of the file when it was last read, to tell when the file was replaced.
+    """
+
+    _size: Optional[int] = None
+    """
+    Size of the file when it was last read.
+    """
+
+    _fingerprint: Optional[str] = None
+    """
+    Fingerprint of the bytes before `_position` (see `get_fingerprint`), to tell when
+    the file was truncated, even if it has grown past `_position` since.
+    """
+
     _at_eof: bool = False
     """
     At EOF or not.
     """
 
+    _first_position: Optional[int] = None
+    """
+    Position in the file of the oldest line read, from where `read_before` continues.
+    """
+
+    _first_line_number: int = 1
+    """
+    Number of the oldest line read.
+    """
+
+    _approximate: bool = False
+    """
+    Whether the line numbers are estimates, until the file has been indexed (see
+    `read_tail`).
+    """
+
     _last_modified: Optional[float] = None
 
     max_lines: Optional[int] = None
@@ -65,65 +312,376 @@ class LogStreamService:
     max_block_size: int = -1
     """
     Max number of characters to read per block.
+
+    If this is negative the file is scanned for newlines in binary instead, and only
+    the new lines that are kept (the last `max_lines`) are decoded. Partial lines are
+    then left in the file until they're complete, so `_position` is always at the
+    start of a line.
+    """
+
+    _lines: Deque[Line] = attr.ib(
+        default=attr.Factory(
+            lambda self: deque(maxlen=self.max_lines or None), takes_self=True
+        ),
+        init=False,
+        repr=False,
+        metadata={TRANSIENT: True},
+    )
+    """
+    Keeps track of the last `max_lines` lines read. This is a ring buffer, so old lines
+    are dropped in constant time as new ones are read.
+
+    The lines aren't serialized, so only the lines read since the service was
+    deserialized are kept. The serialized state is just the position in the file
+    and the number of the last line read.
     """
 
     @property
     def current_line_number(self) -> int:
-        if not self._lines:
-            return 0
-        return self._lines[-1].number
+        return self._line_number
+
+    @property
+    def has_earlier_lines(self) -> bool:
+        """
+        Whether there are lines before the oldest line read for `read_before` to read.
+        """
+        return bool(self._first_position)
 
     def should_read(self) -> bool:
-        path = Path(self.path)
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            # The file was rotated, and the new one hasn't been created yet.
+            return False
         if self._last_modified is None:
-            self._last_modified = path.stat().st_mtime
+            self._last_modified = st.st_mtime
             return True
         if not self._at_eof:
             return True
         tmp = self._last_modified
-        self._last_modified = path.stat().st_mtime
-        return tmp < self._last_modified
+        self._last_modified = st.st_mtime
+        return (
+            tmp < self._last_modified
+            or st.st_ino != self._inode
+            or st.st_size != self._size
+        )
 
     def readlines(self) -> List[Line]:
-        if self._last_modified is None:
-            self._last_modified = Path(self.path).stat().st_mtime
-        with open(self.path) as f:
-            if self._position is not None:
-                f.seek(self._position)
-            n_lines = 0
-            n_blocks = 0
-            # Read block-by-block until we reach the end of the file or
-            # either `n_lines >= self.max_lines_per_update` or
-            # `n_blocks >= self.max_blocks_per_update `.
-            for block in iter(lambda: f.read(self.max_block_size), None):
-                n_blocks += 1
-                if block:
-                    for line in (self._current_line + block).splitlines(True):
-                        if line.endswith("\n"):
-                            # We have a complete line.
-                            n_lines += 1
-                            self._lines.append(
-                                Line(line.strip(), self.current_line_number + 1)
-                            )
-                            self._current_line = ""
-                        else:
-                            # Incomplete line.
-                            self._current_line = line
-                    if (
-                        self.max_lines_per_update
-                        and n_lines >= self.max_lines_per_update
-                    ):
-                        break
-                    if (
-                        self.max_blocks_per_update
-                        and n_blocks >= self.max_blocks_per_update
-                    ):
-                        break
-                else:
-                    break
-            self._position = f.tell()
+        """
+        Read new lines from the file and return the last `max_lines` lines read since
+        this service was created or deserialized.
+
+        Like ``tail -F``, this keeps following the log when it's truncated or replaced,
+        e.g. by a training run that was restarted. Streaming then starts over from
+        the start of the file, with line numbers starting over from 1. If the file
+        was rotated to "PATH.1", the rest of the rotated file is read first.
+        """
+        binary = self.max_block_size < 0
+        try:
+            f = open(self.path, "rb" if binary else "r")
+        except FileNotFoundError:
+            # The file was rotated, and the new one hasn't been created yet.
+            return list(self._lines)
+        with f:
+            st = os.fstat(f.fileno())
+            if self._last_modified is None:
+                self._last_modified = st.st_mtime
+            if self._inode is not None and st.st_ino != self._inode:
+                self._read_rotated()
+                self._start_over()
+            elif self._position and (
+                st.st_size < self._position
+                or get_fingerprint(f.fileno(), self._position) != self._fingerprint
+            ):
+                self._start_over()
+            elif self._approximate:
+                self._resolve_line_numbers()
+            self._read(f)
+            self._record(f)
+        return list(self._lines)
+
+    def _read(self, f) -> None:
+        if self.max_block_size < 0:
+            self._read_binary(f)
+        else:
+            self._read_blocks(f)
+
+    def _read_rotated(self) -> None:
+        try:
+            f = open(self.path + ".1", "rb" if self.max_block_size < 0 else "r")
+        except FileNotFoundError:
+            return
+        with f:
+            if os.fstat(f.fileno()).st_ino != self._inode:
+                return
+            self._at_eof = False
+            while not self._at_eof:
+                self._read(f)
+            # Nothing else will be written to the rotated file, so a partial line at
+            # the end of it is complete.
+            if self.max_block_size < 0:
+                f.seek(self._position or 0)
+                rest = f.read().decode(errors="replace")
+            else:
+                rest = self._current_line
+            if rest:
+                self._line_number += 1
+                self._lines.append(
+                    Line(rest.strip(), self._line_number, self._approximate)
+                )
+
+    def _start_over(self) -> None:
+        # The lines already read are kept, since they're still the latest lines.
+        self._line_number = 0
+        self._current_line = ""
+        self._position = None
+        self._first_position = None
+        self._first_line_number = 1
+        self._approximate = False
+
+    def _record(self, f) -> None:
+        """
+        Record what the file looks like after reading it up to `_position`.
+        """
+        st = os.fstat(f.fileno())
+        self._inode = st.st_ino
+        self._size = st.st_size
+        self._fingerprint = get_fingerprint(f.fileno(), self._position or 0)
+
+    def _read_binary(self, f: BufferedReader) -> None:
+        start = self._position or 0
+        if start == 0:
+            self._first_position = 0
+        size = os.fstat(f.fileno()).st_size
+        if size <= start:
+            self._at_eof = True
+            return
+        # The offsets of the newlines ending the new lines that are kept, after the
+        # offset of the newline before the first one, found a block at a time. They're
+        # only concatenated once, and blocks with none of the lines that are kept are
+        # dropped as soon as there are enough lines after them.
+        chunks: Deque[np.ndarray] = deque([np.array([start - 1], dtype=np.int64)])
+        n_ends = 1
+        n_lines = 0
+        self._at_eof = True
+        # The file is read into the same buffer rather than memory-mapped, since
+        # reading a mapped page past the end of a file that was truncated while mapped
+        # is fatal.
+        buffer = bytearray(SCAN_BLOCK_SIZE)
+        view = memoryview(buffer)
+        f.seek(start)
+        offset = start
+        while offset < size:
+            n = f.readinto(view[: min(SCAN_BLOCK_SIZE, size - offset)])
+            if not n:
+                # The file was truncated after its size was read.
+                break
+            newlines = find_newlines(buffer, n, offset)
+            offset += n
+            if self.max_lines_per_update:
+                newlines = newlines[: self.max_lines_per_update - n_lines]
+            n_lines += len(newlines)
+            chunks.append(newlines)
+            n_ends += len(newlines)
             if self.max_lines:
-                self._lines = self._lines[-self.max_lines :]
-            # Peek one more character to see if we're at EOF.
-            self._at_eof = not bool(f.read(1))
-        return self._lines
+                while n_ends - len(chunks[0]) >= self.max_lines + 1:
+                    n_ends -= len(chunks.popleft())
+            if self.max_lines_per_update and n_lines >= self.max_lines_per_update:
+                self._at_eof = False
+                break
+        ends = np.concatenate(chunks)
+        if self.max_lines:
+            ends = ends[-(self.max_lines + 1) :]
+        offsets = ends.tolist()
+        first_line_number = self._line_number + n_lines - len(offsets) + 2
+        # Only the lines that are kept are read again to be decoded.
+        data = os.pread(f.fileno(), offsets[-1] - offsets[0], offsets[0] + 1)
+        for i in range(len(offsets) - 1):
+            content = data[
+                offsets[i] - offsets[0] : offsets[i + 1] - offsets[0] - 1
+            ].decode(errors="replace")
+            self._lines.append(
+                Line(content.strip(), first_line_number + i, self._approximate)
+            )
+        self._line_number += n_lines
+        self._position = offsets[-1] + 1
+
+    def _read_blocks(self, f: TextIO) -> None:
+        if self._position is not None:
+            f.seek(self._position)
+        else:
+            self._first_position = 0
+        n_lines = 0
+        n_blocks = 0
+        # Read block-by-block until we reach the end of the file or
+        # either `n_lines >= self.max_lines_per_update` or
+        # `n_blocks >= self.max_blocks_per_update `.
+        for block in iter(lambda: f.read(self.max_block_size), None):
+            n_blocks += 1
+            if block:
+                for line in (self._current_line + block).splitlines(True):
+                    if line.endswith("\n"):
+                        # We have a complete line.
+                        n_lines += 1
+                        self._line_number += 1
+                        self._lines.append(
+                            Line(line.strip(), self._line_number, self._approximate)
+                        )
+                        self._current_line = ""
+                    else:
+                        # Incomplete line.
+                        self._current_line = line
+                if self.max_lines_per_update and n_lines >= self.max_lines_per_update:
+                    break
+                if (
+                    self.max_blocks_per_update
+                    and n_blocks >= self.max_blocks_per_update
+                ):
+                    break
+            else:
+                break
+        self._position = f.tell()
+        # Peek one more character to see if we're at EOF.
+        self._at_eof = not bool(f.read(1))
+
+    def read_tail(self, n: Optional[int] = None) -> List[Line]:
+        """
+        Start streaming from the last ``n`` lines of the file (by default
+        `max_lines`), which are found by reading backwards from the end of the file,
+        so only those lines have to be read and decoded no matter how big the file is.
+
+        The line numbers come from a `LineIndex` of the file that's shared by every
+        stream of the file in this process, so the newlines in the rest of the file
+        are only counted once. If it would take a while to index the file, the
+        line numbers are estimated from the length of the lines read instead, and
+        the file is indexed in the background. Later reads correct the line numbers
+        once it's indexed. Returns the same as `readlines`.
+        """
+        n = n or self.max_lines or 0
+        self._last_modified = Path(self.path).stat().st_mtime
+        with open(self.path, "rb") as f:
+            end = f.seek(0, os.SEEK_END)
+            complete_end = seek_lines_back(f, end, 0)
+            start = seek_lines_back(f, complete_end, n)
+            index = line_index_cache.get_nowait(self.path, f)
+            f.seek(start)
+            lines = decode_lines(f.read(complete_end - start))
+            if index is not None:
+                first_line_number = index.count_lines(f, start) + 1
+            else:
+                first_line_number = estimate_line_number(
+                    start, complete_end, len(lines)
+                )
+            # Continue from the start of the partial line at the end, if there is one.
+            self._current_line = ""
+            self._position = complete_end
+            self._at_eof = complete_end == end
+            self._record(f)
+        self._approximate = index is None
+        self._lines.clear()
+        self._lines.extend(
+            Line(content, first_line_number + i, self._approximate)
+            for i, content in enumerate(lines)
+        )
+        self._line_number = first_line_number + len(lines) - 1
+        self._first_position = start
+        self._first_line_number = first_line_number
+        return list(self._lines)
+
+    def _resolve_line_numbers(self) -> None:
+        """
+        Replace estimated line numbers with the actual ones if the file has been
+        indexed since they were estimated.
+        """
+        with open(self.path, "rb") as f:
+            index = line_index_cache.get_nowait(self.path, f)
+            if index is None:
+                return
+            shift = index.count_lines(f, self._first_position or 0) + 1
+        shift -= self._first_line_number
+        self._first_line_number += shift
+        self._line_number += shift
+        lines = [Line(line.content, line.number + shift) for line in self._lines]
+        self._lines.clear()
+        self._lines.extend(lines)
+        self._approximate = False
+
+    def read_before(self, n: Optional[int] = None) -> List[Line]:
+        """
+        Read up to ``n`` lines (by default `max_lines`) before the oldest line read
+        so far, to page backwards through the file. These lines aren't kept with the
+        lines returned by `readlines`.
+        """
+        if not self._first_position:
+            return []
+        if self._approximate:
+            self._resolve_line_numbers()
+        n = n or self.max_lines or 0
+        with open(self.path, "rb") as f:
+            start = seek_lines_back(f, self._first_position, n)
+            f.seek(start)
+            lines = decode_lines(f.read(self._first_position - start))
+        first_line_number = self._first_line_number - len(lines)
+        self._first_position = start
+        self._first_line_number = first_line_number
+        return [
+            Line(content, first_line_number + i, self._approximate)
+            for i, content in enumerate(lines)
+        ]
+
+    def read_range(self, first: int, last: Optional[int] = None) -> List[Line]:
+        """
+        Read lines ``first`` through ``last`` (by default `max_lines` lines), using
+        the `LineIndex` of the file to seek to the first line. Streaming continues from
+        the last line read, and `read_before` continues from the first one, so this
+        can be used to jump to any line of the file.
+        """
+        first = max(first, 1)
+        if last is None:
+            last = first + (self.max_lines or 1) - 1
+        self._last_modified = Path(self.path).stat().st_mtime
+        with open(self.path, "rb") as f:
+            index = line_index_cache.get(self.path, f)
+            start = index.find_line(f, first - 1)
+            if start is None:
+                # Past the end of the file, so just start from the end.
+                return self.read_tail(1)
+            data = b"".join(f.readline() for _ in range(last - first + 1))
+            lines = decode_lines(data)
+            # Continue from the start of the partial line at the end, if there is one.
+            self._current_line = ""
+            self._position = start + data.rfind(b"\n") + 1
+            self._at_eof = not f.read(1)
+            self._record(f)
+        self._lines.clear()
+        self._lines.extend(Line(content, first + i) for i, content in enumerate(lines))
+        self._line_number = first + len(lines) - 1
+        self._first_position = start
+        self._first_line_number = first
+        self._approximate = False
+        return list(self._lines)
+
+    def get_search_cursor(self) -> SearchCursor:
+        """
+        Get a cursor for searching the file in steps with `search`, up to the current
+        position of the stream.
+        """
+        return SearchCursor(end=self._position or 0)
+
+    def search(
+        self,
+        regex: Pattern[str],
+        end: Optional[int] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+        cursor: Optional[SearchCursor] = None,
+    ) -> Iterator[Line]:
+        """
+        Find the lines of the file that match ``regex`` with `search_lines`, by default
+        up to the current position of the stream.
+        """
+        if end is None:
+            end = self._position
+        with open(self.path, "rb") as f:
+            yield from search_lines(
+                f, regex, end=end, should_stop=should_stop, cursor=cursor
+            )
@@ -0,0 +1,43 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, List, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+R = TypeVar("R")
+
+
+def parallel_walk(
+    start: Iterable[T],
+    visit: Callable[[T], Tuple[R, Iterable[T]]],
+    workers: int = 1,
+) -> Iterator[R]:
+    """
+    Walk a tree (such as a directory tree), visiting nodes concurrently over a pool
+    of ``workers`` threads.
+
+    ``visit`` is called once for every node, starting with the nodes in ``start``, and
+    should return a result along with the children of the node to visit next. Results
+    are yielded in the order that nodes finish, which is not deterministic when
+    ``workers > 1``.
+
+    Listing directories is mostly spent waiting on the filesystem, especially on
+    network filesystems, so even though the GIL is held while processing the results
+    the directory listings themselves can happen in parallel.
+    """
+    if workers <= 1:
+        stack: List[T] = list(start)
+        while stack:
+            result, children = visit(stack.pop())
+            yield result
+            stack.extend(children)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {executor.submit(visit, node) for node in start}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result, children = future.result()
+                yield result
+                pending.update(executor.submit(visit, node) for node in children)
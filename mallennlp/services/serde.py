@@ -11,6 +11,18 @@ from mallennlp.exceptions import InvalidPageParametersError
 T = TypeVar("T")
 
 
+TRANSIENT = "transient"
+"""
+Metadata key for fields of serializable classes that shouldn't be serialized,
+e.g. ``attr.ib(init=False, metadata={TRANSIENT: True})``. Transient fields have to be
+(re)initialized by the class itself, usually in ``__attrs_post_init__``.
+"""
+
+
+def _is_serialized(attribute: attr.Attribute, value: Any) -> bool:
+    return not attribute.metadata.get(TRANSIENT, False)
+
+
 class _JsonSerializer(json.JSONEncoder):
     """
     Adds a serializable default representation for `attr` classes.
@@ -18,7 +30,12 @@ class _JsonSerializer(json.JSONEncoder):
 
     def default(self, o):
         if attr.has(o):
-            return attr.asdict(o, recurse=False, retain_collection_types=False)
+            return attr.asdict(
+                o,
+                recurse=False,
+                filter=_is_serialized,
+                retain_collection_types=False,
+            )
         return json.JSONEncoder.default(self, o)
 
 
@@ -0,0 +1,35 @@
+import os
+from pathlib import Path
+from typing import Dict
+
+
+def prune_sidecars(directory: Path, max_files: int) -> None:
+    """
+    Remove the least recently written files in ``directory`` until at most
+    ``max_files`` are left.
+
+    Sidecar files are keyed by what they cache, such as the path of an experiment,
+    and nothing tells us when that's gone for good, so the number of them is capped
+    instead. Temporary files that other processes are still writing are left alone.
+    """
+    try:
+        entries = [
+            entry
+            for entry in os.scandir(directory)
+            if entry.is_file() and not entry.name.endswith(".tmp")
+        ]
+    except FileNotFoundError:
+        return
+    if len(entries) <= max_files:
+        return
+    mtimes: Dict[str, float] = {}
+    for entry in entries:
+        try:
+            mtimes[entry.path] = entry.stat().st_mtime
+        except FileNotFoundError:
+            continue
+    for path in sorted(mtimes, key=mtimes.__getitem__)[: len(mtimes) - max_files]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,303 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+from pathlib import Path
+import select
+import sqlite3
+import struct
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from mallennlp.services.experiment import ExperimentService
+from mallennlp.services.indexer import ExperimentIndexer
+
+
+logger = logging.getLogger(__name__)
+
+
+class Inotify:
+    """
+    Minimal wrapper around the Linux inotify API using ``ctypes``.
+    """
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+
+    EVENT_HEADER = struct.Struct("iIII")
+
+    READ_SIZE = 64 * 1024
+
+    def __init__(self) -> None:
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    @classmethod
+    def is_available(cls) -> bool:
+        try:
+            cls().close()
+        except (AttributeError, OSError):
+            return False
+        return True
+
+    def add_watch(self, path: Path, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(str(path)), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), str(path))
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self, timeout: float) -> List[Tuple[int, int, str]]:
+        """
+        Wait up to ``timeout`` seconds for events, returning a list of
+        ``(watch_descriptor, mask, name)`` tuples.
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        data = os.read(self.fd, self.READ_SIZE)
+        events: List[Tuple[int, int, str]] = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class ExperimentWatcher:
+    """
+    Keeps the experiments table up-to-date as experiments are written to disk.
+
+    With the inotify backend every directory in the project that the indexer would
+    descend into is watched. Writes to the files that an experiment's database entry
+    depends on mark that experiment as dirty, while directories or ``config.json``
+    files being created or removed trigger an incremental update of the index.
+
+    The polling backend just runs an incremental update of the index on every
+    interval. Since creating a file changes the mtime of its directory, this
+    catches new experiments as well as new epoch metrics, final metrics, and meta files.
+
+    In both cases changes are batched and flushed to the database at most once
+    every ``interval`` seconds.
+    """
+
+    BACKENDS = ("auto", "inotify", "poll")
+
+    WATCHED_FNAMES: Set[str] = {
+        ExperimentService.CONFIG_FNAME,
+        ExperimentService.META_FNAME,
+        ExperimentService.METRICS_FNAME,
+    }
+
+    WATCH_MASK = (
+        Inotify.IN_CREATE
+        | Inotify.IN_DELETE
+        | Inotify.IN_MOVED_FROM
+        | Inotify.IN_MOVED_TO
+        | Inotify.IN_CLOSE_WRITE
+        | Inotify.IN_MOVE_SELF
+        | Inotify.IN_ONLYDIR
+    )
+
+    def __init__(
+        self,
+        db,
+        root: Path = None,
+        interval: float = 5.0,
+        backend: str = "auto",
+        workers: int = 1,
+    ) -> None:
+        if backend not in self.BACKENDS:
+            raise ValueError(f"invalid watcher backend '{backend}'")
+        self.indexer = ExperimentIndexer(root, db, workers=workers)
+        self.interval = interval
+        self.backend = backend
+        self._inotify: Optional[Inotify] = None
+        self._watches: Dict[int, str] = {}
+        self._dirty: Set[str] = set()
+        self._needs_update = False
+        self._pending_since: Optional[float] = None
+
+    @classmethod
+    def is_watched_file(cls, fname: str) -> bool:
+        return fname in cls.WATCHED_FNAMES or bool(
+            ExperimentService.EPOCH_METRICS_FNAME_REGEX.match(fname)
+        )
+
+    def open(self) -> None:
+        """
+        Set up the backend. Falls back to polling if inotify is unavailable or if we
+        run out of inotify watches.
+        """
+        if self.backend == "poll" or (
+            self.backend == "auto" and not Inotify.is_available()
+        ):
+            self.backend = "poll"
+            return
+        self._inotify = Inotify()
+        try:
+            self._add_watches(".")
+        except OSError as e:
+            logger.warning(
+                "Failed to set up inotify watches (%s), falling back to polling. "
+                "You may need to increase fs.inotify.max_user_watches.",
+                e,
+            )
+            self.close()
+            self.backend = "poll"
+            return
+        self.backend = "inotify"
+
+    def close(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        self._watches = {}
+
+    def _add_watches(self, path: str) -> None:
+        assert self._inotify is not None
+        stack = [path]
+        while stack:
+            path = stack.pop()
+            try:
+                wd = self._inotify.add_watch(self.indexer.root / path, self.WATCH_MASK)
+                _, subdirs = self.indexer.list_dir(path)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            self._watches[wd] = path
+            stack.extend(subdirs)
+
+    def _remove_watches(self, path: str) -> None:
+        assert self._inotify is not None
+        for wd, watched_path in list(self._watches.items()):
+            if watched_path == path or watched_path.startswith(path + "/"):
+                self._inotify.rm_watch(wd)
+                del self._watches[wd]
+
+    def _handle_event(self, wd: int, mask: int, name: str) -> None:
+        path = self._watches.get(wd)
+        if mask & Inotify.IN_Q_OVERFLOW:
+            # Events were dropped, so we don't know what changed.
+            self._needs_update = True
+        elif path is None:
+            return
+        elif mask & Inotify.IN_IGNORED:
+            # Directory was deleted.
+            del self._watches[wd]
+            self._needs_update = True
+        elif mask & Inotify.IN_MOVE_SELF:
+            # Watches below this directory now have stale paths. The new location
+            # will be watched after the `IN_MOVED_TO` event from its new parent.
+            self._remove_watches(path)
+            self._needs_update = True
+        elif mask & Inotify.IN_ISDIR:
+            if mask & (Inotify.IN_CREATE | Inotify.IN_MOVED_TO):
+                if self.indexer.ignore.should_descend(path, name):
+                    self._add_watches(str(Path(path) / name))
+            self._needs_update = True
+        elif name == ExperimentService.CONFIG_FNAME:
+            # Experiment was possibly created or removed, or its config changed.
+            self._needs_update = True
+            self._dirty.add(path)
+        elif self.is_watched_file(name):
+            self._dirty.add(path)
+        else:
+            return
+        if self._pending_since is None:
+            self._pending_since = time.time()
+
+    def poll(self, timeout: float) -> None:
+        """
+        Wait up to ``timeout`` seconds to collect changes.
+        """
+        if self._inotify is None:
+            # Nothing to wait on, so just assume something might have changed.
+            self._needs_update = True
+            if self._pending_since is None:
+                self._pending_since = time.time()
+            time.sleep(timeout)
+            return
+        for wd, mask, name in self._inotify.read_events(timeout):
+            self._handle_event(wd, mask, name)
+
+    def flush(self) -> None:
+        """
+        Write collected changes to the database.
+        """
+        try:
+            if self._needs_update:
+                update = self.indexer.update()
+                self._dirty -= set(update.added + update.removed + update.changed)
+                self._log_update("Updated", update)
+            if self._dirty:
+                self._log_update("Refreshed", self.indexer.refresh(self._dirty))
+        except sqlite3.OperationalError as e:
+            # Most likely the database is locked, so try again on the next flush.
+            logger.warning("Failed to update experiments database (%s)", e)
+            self._needs_update = True
+            self._pending_since = time.time()
+            return
+        self._dirty = set()
+        self._needs_update = False
+        self._pending_since = None
+
+    @staticmethod
+    def _log_update(verb: str, update) -> None:
+        if update.added or update.removed or update.changed:
+            logger.info(
+                "%s experiments index: %d added, %d removed, %d changed",
+                verb,
+                len(update.added),
+                len(update.removed),
+                len(update.changed),
+            )
+
+    def run(self) -> None:
+        """
+        Watch for changes until interrupted.
+        """
+        self.open()
+        logger.info(
+            "Watching %s for experiment changes (%s backend)",
+            self.indexer.root,
+            self.backend,
+        )
+        try:
+            # Catch up on anything that changed before we started watching.
+            self._needs_update = True
+            self.flush()
+            while True:
+                if self._pending_since is None:
+                    timeout = self.interval
+                else:
+                    timeout = max(
+                        0.0, self._pending_since + self.interval - time.time()
+                    )
+                self.poll(timeout)
+                if (
+                    self._pending_since is not None
+                    and time.time() - self._pending_since >= self.interval
+                ):
+                    self.flush()
+        finally:
+            self.close()
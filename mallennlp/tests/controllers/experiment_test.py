@@ -1,6 +1,20 @@
+import json
+import os
+from pathlib import Path
+import shutil
+import tempfile
+from typing import List
+
 import pytest
 
-from mallennlp.controllers.experiment import parse_filters
+from mallennlp.controllers.experiment import (
+    get_metric_plot_extension,
+    get_metric_plot_figure,
+    get_seek_condition,
+    parse_filters,
+)
+from mallennlp.services.db import Tables, _get_db, init_tables
+from mallennlp.services.experiment import ExperimentService
 
 
 @pytest.mark.parametrize(
@@ -8,14 +22,212 @@ from mallennlp.controllers.experiment import parse_filters
     [
         ("{path} contains greetings/*", ("path GLOB ?", ["greetings/*"])),
         ("{path} contains greetings/* ", ("path GLOB ?", ["greetings/*"])),
+        ("{path} in (run_01, 'run_02')", ("path IN (?, ?)", ["run_01", "run_02"])),
+        ("{path} in (run_01)", ("path IN (?)", ["run_01"])),
+        ("{path} in ()", ("", [])),
         (
             "{path} contains greetings/* && {tags} contains copynet seq2seq",
             (
-                "path GLOB ? AND HasAllTags(tags, ?, ?)",
+                "path GLOB ? AND path IN (SELECT path FROM experiment_tags "
+                "WHERE tag IN (?, ?) GROUP BY path HAVING COUNT(*) = 2)",
                 ["greetings/*", "copynet", "seq2seq"],
             ),
         ),
+        (
+            '{tags} contains "copynet seq2seq"',
+            (
+                "path IN (SELECT path FROM experiment_tags "
+                "WHERE tag IN (?, ?) GROUP BY path HAVING COUNT(*) = 2)",
+                ["copynet", "seq2seq"],
+            ),
+        ),
+        (
+            "{tags} contains copynet copynet",
+            (
+                "path IN (SELECT path FROM experiment_tags WHERE tag IN (?))",
+                ["copynet"],
+            ),
+        ),
+        (
+            "{config} contains bert-base-uncased lr=2e-5",
+            (
+                "path IN (SELECT path FROM experiment_configs "
+                "WHERE experiment_configs MATCH ?)",
+                ['"bert-base-uncased" "lr = 2e-05"'],
+            ),
+        ),
+        (
+            "{param:trainer.optimizer.lr} < 1e-4",
+            (
+                "path IN (SELECT path FROM experiment_params "
+                "WHERE key = ? AND num_value < ?)",
+                ["trainer.optimizer.lr", 1e-4],
+            ),
+        ),
+        (
+            "{param:model.type} in (copynet_seq2seq, 'simple_seq2seq')",
+            (
+                "path IN (SELECT path FROM experiment_params "
+                "WHERE key = ? AND str_value IN (?, ?))",
+                ["model.type", "copynet_seq2seq", "simple_seq2seq"],
+            ),
+        ),
+        ("{param:model.type} > copynet", ("0", [])),
+        ("{status} contains fail", ("status LIKE ?", ["%FAIL%"])),
+        ("{status} = finished", ("status = ?", ["FINISHED"])),
+        ("{epochs} >= 10", ("epochs >= ?", [10.0])),
+        ("{best_validation_metric} lt 0.5", ("best_validation_metric < ?", [0.5])),
+        ("{best_epoch} > foo", ("", [])),
+        ("{mtime}; DROP TABLE experiments > 0", ("", [])),
     ],
 )
 def test_parse_filters(filter_expression, result):
     assert parse_filters(filter_expression) == result
+
+
+@pytest.fixture(scope="module")
+def table_db():
+    db = _get_db(":memory:")
+    init_tables(db, (Tables.EXPERIMENTS.value,))
+    ExperimentService.init_db_table(
+        db=db,
+        entries=[
+            (f"run_{i:02d}", "", i % 2, "FINISHED", 0.0, i % 4 or None)
+            for i in range(20)
+        ],
+    )
+    return db
+
+
+@pytest.mark.parametrize(
+    "filter_expression, paths",
+    [
+        ("{path} in (run_01, 'run_02')", ["run_01", "run_02"]),
+        ("{path} in [run_03]", ["run_03"]),
+    ],
+)
+def test_path_in_filter(table_db, filter_expression, paths):
+    where_clause, args = parse_filters(filter_expression)
+    rows = table_db.execute(
+        f"SELECT path FROM {Tables.EXPERIMENTS.value} WHERE {where_clause} "
+        "ORDER BY path",
+        args,
+    )
+    assert [row["path"] for row in rows] == paths
+
+
+@pytest.mark.parametrize("sort_field", ["path", "epochs", "finished"])
+@pytest.mark.parametrize("sort_direction", ["ASC", "DESC"])
+def test_get_seek_condition(table_db, sort_field, sort_direction):
+    order_by = f"ORDER BY {sort_field} {sort_direction}, path {sort_direction}"
+    expected = [
+        row["path"]
+        for row in table_db.execute(
+            f"SELECT path FROM {Tables.EXPERIMENTS.value} {order_by}"
+        )
+    ]
+    # Page through the table 3 rows at a time by seeking past the last row.
+    paths: List[str] = []
+    condition, args = "1", []
+    while True:
+        rows = table_db.execute(
+            f"SELECT * FROM {Tables.EXPERIMENTS.value} "
+            f"WHERE {condition} {order_by} LIMIT 3",
+            args,
+        ).fetchall()
+        if not rows:
+            break
+        paths.extend(row["path"] for row in rows)
+        condition, args = get_seek_condition(
+            sort_field, sort_direction, [rows[-1][sort_field], rows[-1]["path"]]
+        )
+    assert paths == expected
+
+
+@pytest.fixture
+def experiment_path():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = Path(tmpdirname) / "test_experiment"
+        shutil.copytree("mallennlp/tests/fixtures/test_experiment", path)
+        for epoch in range(5, 10):
+            (path / f"metrics_epoch_{epoch}.json").unlink()
+        yield path
+
+
+def write_epoch(path: Path, epoch: int, **metrics) -> None:
+    with open(path / f"metrics_epoch_{epoch}.json", "w") as f:
+        json.dump({"epoch": epoch, **metrics}, f)
+
+
+def test_get_metric_plot_extension(experiment_path):
+    es = ExperimentService(experiment_path)
+    figure = get_metric_plot_figure(es, "loss")
+    traces = [trace["name"] for trace in figure["data"]]
+    assert traces == ["training_loss", "validation_loss"]
+    assert figure["data"][1]["x"] == list(range(5))
+    run = es.get_epoch_metrics().first_lastmod
+
+    # Nothing new.
+    assert get_metric_plot_extension(es, "loss", traces, 5, run) == (
+        {"x": [[], []], "y": [[], []]},
+        [0, 1],
+    )
+
+    write_epoch(experiment_path, 5, training_loss=0.5, validation_loss=0.25)
+    assert get_metric_plot_extension(es, "loss", traces, 5, run) == (
+        {"x": [[5], [5]], "y": [[0.5], [0.25]]},
+        [0, 1],
+    )
+
+    # Downsampled plots are replaced.
+    assert get_metric_plot_extension(es, "loss", traces, 5, run, max_points=5) is None
+
+    # So are plots with traces that are missing new values.
+    write_epoch(experiment_path, 6, validation_loss=0.2)
+    assert get_metric_plot_extension(es, "loss", traces, 5, run) is None
+    assert get_metric_plot_extension(es, "loss", ["validation_loss"], 5, run) == (
+        {"x": [[5, 6]], "y": [[0.25, 0.2]]},
+        [0],
+    )
+
+    # And plots of more epochs than there are now.
+    assert get_metric_plot_extension(es, "loss", traces, 8, run) is None
+
+
+def test_get_metric_plot_extension_of_empty_plot(experiment_path):
+    for epoch in range(5):
+        (experiment_path / f"metrics_epoch_{epoch}.json").unlink()
+    es = ExperimentService(experiment_path)
+    figure = get_metric_plot_figure(es, "loss")
+    assert figure["data"] == []
+
+    # Plots that were empty before the first epoch are replaced once there's
+    # something to plot, instead of being extended with nothing.
+    write_epoch(experiment_path, 0, training_loss=0.5, validation_loss=0.25)
+    assert get_metric_plot_extension(es, "loss", [], 0, None) is None
+    assert [trace["name"] for trace in get_metric_plot_figure(es, "loss")["data"]] == [
+        "training_loss",
+        "validation_loss",
+    ]
+
+    run = es.get_epoch_metrics().first_lastmod
+
+    # So are plots of a metric that the traces of the plot are missing.
+    assert get_metric_plot_extension(es, "loss", ["validation_loss"], 0, run) is None
+
+
+@pytest.mark.parametrize("n_epochs", [5, 6])
+def test_get_metric_plot_extension_after_restart(experiment_path, n_epochs):
+    es = ExperimentService(experiment_path)
+    figure = get_metric_plot_figure(es, "loss")
+    traces = [trace["name"] for trace in figure["data"]]
+    run = es.get_epoch_metrics().first_lastmod
+
+    # The run is restarted in the same directory, and gets to as many epochs as the
+    # plot has or more. Those epochs aren't a continuation of the ones plotted.
+    for epoch in range(n_epochs):
+        write_epoch(experiment_path, epoch, training_loss=1.0, validation_loss=2.0)
+    first_path = experiment_path / "metrics_epoch_0.json"
+    os.utime(first_path, (run + 10, run + 10))
+    assert es.get_epoch_metrics().first_lastmod != run
+    assert get_metric_plot_extension(es, "loss", traces, 5, run) is None
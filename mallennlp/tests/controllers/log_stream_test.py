@@ -0,0 +1,49 @@
+import json
+
+from mallennlp.controllers import log_stream
+from mallennlp.controllers.log_stream import (
+    compile_filter,
+    filter_lines,
+    get_log_chunk,
+    get_log_search_chunk,
+    search_log,
+)
+from mallennlp.services import log_stream as log_stream_service
+from mallennlp.services.log_stream import Line, LogStreamService
+
+
+def test_get_log_chunk():
+    chunk = get_log_chunk([Line("epoch 1", 41), Line('<b>"loss"</b>', 42)])
+    assert json.loads(chunk) == ["41:  epoch 1", '42:  <b>"loss"</b>']
+    assert json.loads(get_log_chunk([])) == []
+    assert json.loads(get_log_chunk([Line("epoch 1", 41, approximate=True)])) == [
+        "~41:  epoch 1"
+    ]
+
+
+def test_search_log(monkeypatch):
+    # Search a block at a time.
+    monkeypatch.setattr(log_stream, "SEARCH_STEP_SECONDS", 0.0)
+    monkeypatch.setattr(log_stream_service, "SEARCH_BLOCK_SIZE", 1000)
+    path = "mallennlp/tests/fixtures/test_experiment/stdout.log"
+    stream = LogStreamService(path, max_lines=3)
+    stream.read_tail()
+    regex = compile_filter("Validating")
+    cursor = stream.get_search_cursor()
+    steps = []
+    while not cursor.done:
+        steps.append(search_log(stream, regex, cursor))
+    assert len(steps) > 1
+    assert all(len(lines) <= 3 for lines in steps)
+    with open(path) as f:
+        all_lines = [Line(line.strip(), i + 1) for i, line in enumerate(f)]
+    expected = filter_lines(all_lines, regex)
+    lines = [line for step in steps for line in step]
+    assert lines[-3:] == expected[-3:]
+    assert all(line in expected for line in lines)
+    assert compile_filter("") is None
+
+
+def test_get_log_search_chunk():
+    chunk = json.loads(get_log_search_chunk([Line("epoch 1", 41)], 7))
+    assert chunk == {"version": 7, "lines": ["41:  epoch 1"]}
@@ -0,0 +1,114 @@
+import json
+from pathlib import Path
+import shutil
+import tempfile
+
+import numpy as np
+import pytest
+
+from mallennlp.domain.experiment import EpochMetrics
+from mallennlp.services.compare import (
+    CompareService,
+    align_metrics,
+    diff_configs,
+    is_minimized,
+    summarize_metric,
+)
+
+
+@pytest.fixture(scope="module")
+def experiment_paths():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        root = Path(tmpdirname)
+        shutil.copytree(
+            "mallennlp/tests/fixtures/test_experiment", root / "experiment_1"
+        )
+        shutil.copytree(
+            "mallennlp/tests/fixtures/test_experiment", root / "experiment_2"
+        )
+        # The second experiment only got through 5 epochs with a different batch size.
+        for epoch in range(5, 10):
+            (root / "experiment_2" / f"metrics_epoch_{epoch}.json").unlink()
+        config_path = root / "experiment_2" / "config.json"
+        config = json.loads(config_path.read_text())
+        config["iterator"]["batch_size"] = 64
+        config_path.write_text(json.dumps(config))
+        yield [root / "experiment_1", root / "experiment_2"]
+
+
+def test_align_metrics():
+    epochs, metrics = align_metrics(
+        [
+            EpochMetrics(
+                epochs=np.arange(3), columns={"loss": np.array([3.0, 2.0, 1.0])}
+            ),
+            EpochMetrics(
+                epochs=np.arange(2),
+                columns={"loss": np.array([4.0, 3.0]), "acc": np.array([0.1, 0.2])},
+            ),
+        ]
+    )
+    assert epochs.tolist() == [0, 1, 2]
+    assert sorted(metrics) == ["acc", "loss"]
+    np.testing.assert_equal(metrics["loss"], [[3.0, 2.0, 1.0], [4.0, 3.0, np.nan]])
+    np.testing.assert_equal(metrics["acc"], [[np.nan] * 3, [0.1, 0.2, np.nan]])
+
+
+@pytest.mark.parametrize(
+    "minimize, best, best_epoch, final, delta",
+    [
+        (True, [1.0, 2.0, np.nan], [1, 0, -1], [3.0, 4.0, np.nan], [0.0, 1.0, np.nan]),
+        (False, [3.0, 4.0, np.nan], [2, 1, -1], [3.0, 4.0, np.nan], [0.0, 1.0, np.nan]),
+    ],
+)
+def test_summarize_metric(minimize, best, best_epoch, final, delta):
+    values = np.array([[2.0, 1.0, 3.0], [2.0, 4.0, np.nan], [np.nan, np.nan, np.nan]])
+    summary = summarize_metric(values, minimize=minimize)
+    np.testing.assert_equal(summary.best, best)
+    np.testing.assert_equal(summary.best_epoch, best_epoch)
+    np.testing.assert_equal(summary.final, final)
+    np.testing.assert_equal(summary.delta, delta)
+
+
+@pytest.mark.parametrize(
+    "metric_name, validation_metrics, result",
+    [
+        ("validation_loss", [], True),
+        ("training_accuracy", [], False),
+        ("best_validation_accuracy", ["+accuracy"], False),
+        ("validation_perplexity", ["-perplexity"], True),
+        ("training_perplexity", ["-loss", "-perplexity"], True),
+        ("validation_loss", ["+loss"], False),
+    ],
+)
+def test_is_minimized(metric_name, validation_metrics, result):
+    assert is_minimized(metric_name, validation_metrics) == result
+
+
+def test_diff_configs():
+    assert diff_configs(
+        [{"a": 1, "b": "x", "c": [1, 2]}, {"a": 1, "b": "y", "c": [1, 2]}, {"a": 1}]
+    ) == {"b": ["x", "y", None], "c": ["1 2", "1 2", None]}
+
+
+def test_get_comparison(experiment_paths):
+    with tempfile.TemporaryDirectory() as cache_dirname:
+        service = CompareService(experiment_paths, cache_dir=Path(cache_dirname))
+        comparison = service.get_comparison()
+    assert comparison.paths == [str(path) for path in experiment_paths]
+    assert comparison.epochs.tolist() == list(range(10))
+    assert comparison.metrics["validation_loss"].shape == (2, 10)
+    assert np.isnan(comparison.metrics["validation_loss"][1, 5:]).all()
+    assert comparison.config_diff == {"iterator.batch_size": ["32", "64"]}
+    assert comparison.validation_metrics == ["-loss", "-loss"]
+
+    summary = CompareService.get_metric_summary(comparison, "validation_loss")
+    assert summary.best_epoch.tolist() == [9, 4]
+    assert summary.final[0] == pytest.approx(0.011555945791769773)
+    assert summary.delta[0] == 0.0
+    assert summary.delta[1] > 0
+
+    # Unknown metrics give an empty summary.
+    summary = CompareService.get_metric_summary(comparison, "validation_foo")
+    assert summary.best_epoch.tolist() == [-1, -1]
+    assert np.isnan(summary.final).all()
@@ -0,0 +1,62 @@
+from pathlib import Path
+import tempfile
+
+import pytest
+
+from mallennlp.services.db import ConnectionPool, Tables, get_pool, init_tables
+
+
+@pytest.fixture(scope="module")
+def db_path():
+    with tempfile.TemporaryDirectory() as _tmpdirname:
+        path = str(Path(_tmpdirname) / "mallennlp.sqlite")
+        db = ConnectionPool(path).acquire()
+        init_tables(db, (Tables.EXPERIMENTS.value,))
+        db.close()
+        yield path
+
+
+def test_pragmas(db_path):
+    pool = ConnectionPool(db_path)
+    db = pool.acquire()
+    assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert db.execute("PRAGMA synchronous").fetchone()[0] == 1
+    pool.release(db)
+    pool.close()
+
+
+def test_pool_reuses_connections(db_path):
+    pool = ConnectionPool(db_path, size=1)
+    db1 = pool.acquire()
+    db2 = pool.acquire()
+    assert db1 is not db2
+    pool.release(db1)
+    pool.release(db2)
+    # Only one idle connection is kept.
+    assert pool.acquire() is db1
+    assert pool.acquire() is not db2
+    pool.close()
+
+
+def test_release_rolls_back(db_path):
+    pool = ConnectionPool(db_path)
+    db = pool.acquire()
+    db.execute(
+        f"INSERT INTO {Tables.EXPERIMENTS.value} (path, tags, finished) VALUES (?, ?, ?)",
+        ("run_001", "", 0),
+    )
+    assert db.in_transaction
+    pool.release(db)
+    db = pool.acquire()
+    assert not db.in_transaction
+    rows = db.execute(f"SELECT * FROM {Tables.EXPERIMENTS.value}").fetchall()
+    assert rows == []
+    pool.close()
+
+
+def test_get_pool(db_path):
+    pool = get_pool(db_path)
+    assert get_pool(db_path) is pool
+    # A forked process gets a new pool.
+    pool.pid = -1
+    assert get_pool(db_path) is not pool
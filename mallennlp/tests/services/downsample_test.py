@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from mallennlp.services.downsample import downsample, lttb
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    x = np.arange(10000, dtype=np.float64)
+    y = np.sin(x / 500)
+    y[4321] = 10.0
+    y[8765] = -10.0
+    indices = lttb(x, y, 100)
+    assert len(indices) == 100
+    assert indices[0] == 0
+    assert indices[-1] == 9999
+    assert (np.diff(indices) > 0).all()
+    assert 4321 in indices
+    assert 8765 in indices
+
+
+@pytest.mark.parametrize("n_out", [0, 2, 10, 20])
+def test_lttb_short_curves(n_out):
+    x = np.arange(10, dtype=np.float64)
+    assert lttb(x, x, n_out).tolist() == list(range(10))
+
+
+def test_downsample():
+    x = np.arange(5)
+    y = np.array([1.0, np.nan, 3.0, 4.0, np.nan])
+    x_out, y_out = downsample(x, y, 10)
+    assert x_out.tolist() == [0, 2, 3]
+    assert y_out.tolist() == [1.0, 3.0, 4.0]
+
+    x = np.arange(5000)
+    x_out, y_out = downsample(x, np.log1p(x.astype(np.float64)), 500)
+    assert len(x_out) == len(y_out) == 500
+    assert x_out.dtype == x.dtype
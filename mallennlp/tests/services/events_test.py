@@ -0,0 +1,86 @@
+import os
+from pathlib import Path
+import tempfile
+
+import pytest
+
+from mallennlp.services.events import (
+    EventBroker,
+    Subscription,
+    get_topic_signature,
+    stream_events,
+)
+
+
+@pytest.fixture
+def log_path():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = Path(tmpdirname) / "stdout.log"
+        path.write_text("first line\n")
+        yield path
+
+
+def test_get_topic_signature(log_path):
+    topic = f"log:{log_path}"
+    signature = get_topic_signature(topic)
+    assert get_topic_signature(topic) == signature
+    with open(log_path, "a") as f:
+        f.write("second line\n")
+    assert get_topic_signature(topic) != signature
+
+    topic = f"experiment:{log_path.parent}"
+    signature = get_topic_signature(topic)
+    assert get_topic_signature(topic) == signature
+    (log_path.parent / "metrics_epoch_0.json").write_text("{}")
+    assert get_topic_signature(topic) != signature
+
+    with pytest.raises(ValueError):
+        get_topic_signature("foo")
+
+
+def test_subscription_coalesces_notifications():
+    subscription = Subscription({"gpu", "log:a"})
+    subscription.notify("gpu")
+    subscription.notify("log:a")
+    subscription.notify("gpu")
+    assert subscription.get(timeout=0) == "gpu"
+    assert subscription.get(timeout=0) == "log:a"
+    assert subscription.get(timeout=0) is None
+
+
+def test_event_broker(log_path):
+    topic = f"log:{log_path}"
+    broker = EventBroker(poll_interval=None)
+    first = broker.subscribe({topic})
+    second = broker.subscribe({topic, "gpu"})
+
+    # Nothing changed yet.
+    now = os.stat(log_path).st_mtime + 100
+    assert broker.check(now) == ["gpu"]
+    assert first.get(timeout=0) is None
+    assert second.get(timeout=0) == "gpu"
+
+    with open(log_path, "a") as f:
+        f.write("second line\n")
+    # Topics aren't checked again until their interval is up.
+    assert broker.check(now + 0.1) == []
+    assert broker.check(now + 2) == [topic, "gpu"]
+    assert first.get(timeout=0) == topic
+    assert second.get(timeout=0) == topic
+
+    # Topics without subscribers are no longer checked.
+    broker.unsubscribe(first)
+    broker.unsubscribe(second)
+    assert broker.check(now + 10) == []
+
+    with pytest.raises(ValueError):
+        broker.subscribe({"foo"})
+
+
+def test_stream_events():
+    subscription = Subscription({"gpu"})
+    events = stream_events(subscription, heartbeat_interval=0)
+    assert next(events).startswith("retry:")
+    assert next(events) == ": heartbeat\n\n"
+    subscription.notify("gpu")
+    assert next(events) == "event: change\ndata: gpu\n\n"
@@ -4,15 +4,26 @@ import os
 from pathlib import Path
 import shutil
 import tempfile
+import threading
 
 from allennlp.common.params import Params
+import numpy as np
 import pytest
 
 from mallennlp.domain.config import ProjectConfig, ServerConfig
 from mallennlp.domain.experiment import Meta
 from mallennlp.services.config import Config
-from mallennlp.services.db import Tables, init_tables
-from mallennlp.services.experiment import ExperimentService
+from mallennlp.services.db import Tables, _get_db, init_tables
+from mallennlp.services.experiment import (
+    ExperimentCache,
+    ExperimentService,
+    experiment_cache,
+    get_config_search_query,
+    parse_duration,
+)
+
+
+FIXTURES_PATH = Path(__file__).resolve().parent.parent / "fixtures"
 
 
 @pytest.fixture(scope="module")
@@ -56,6 +67,20 @@ def experiment_service(project, db):
     return ExperimentService(project / "test_experiment", db)
 
 
+@pytest.fixture
+def experiment_copy():
+    # Writing tags also updates the database entry, which reads the experiment's
+    # metrics, so tests that write tags get their own copy of the experiment and
+    # database so they don't depend on the order tests run in.
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = Path(tmpdirname) / "test_experiment"
+        shutil.copytree(FIXTURES_PATH / "test_experiment", path)
+        db = _get_db(":memory:")
+        init_tables(db)
+        yield ExperimentService(path, db)
+        db.close()
+
+
 def initial_check(file_data):
     # file should not have been read yet.
     assert file_data.data is None
@@ -89,7 +114,8 @@ def test_get_tags(experiment_service):
     assert experiment_service.get_tags() == []
 
 
-def test_set_tags(experiment_service, db):
+def test_set_tags(experiment_copy):
+    experiment_service, db = experiment_copy, experiment_copy.db
     experiment_service.set_tags(["copynet", "seq2seq"])
     assert experiment_service.get_tags() == ["copynet", "seq2seq"]
 
@@ -117,6 +143,34 @@ def test_get_metrics(experiment_service):
     touch_and_check_again(experiment_service.e.metrics)
 
 
+def test_batch_update_tags(experiment_copy):
+    experiment_service, db = experiment_copy, experiment_copy.db
+    experiment_service.set_tags(["copynet", "seq2seq"])
+    with ExperimentService.batch(db=db, workers=2) as batch:
+        batch.update_tags(experiment_service, add=["baseline"], remove=["copynet"])
+        batch.update_tags(experiment_service, add=["lstm"])
+        # Nothing is written until the batch is committed.
+        assert experiment_service.get_tags() == ["copynet", "seq2seq"]
+    assert experiment_service.get_tags() == ["baseline", "lstm", "seq2seq"]
+    es2 = ExperimentService(experiment_service.get_path())
+    assert es2.get_tags() == ["baseline", "lstm", "seq2seq"]
+    rows = db.execute(
+        f"SELECT tag FROM {ExperimentService.TAGS_TABLE} WHERE path = ? ORDER BY tag",
+        (str(experiment_service.get_path()),),
+    )
+    assert [row["tag"] for row in rows] == ["baseline", "lstm", "seq2seq"]
+
+
+def test_batch_not_committed_on_error(experiment_copy):
+    experiment_service, db = experiment_copy, experiment_copy.db
+    experiment_service.set_tags(["copynet", "seq2seq"])
+    with pytest.raises(ValueError):
+        with ExperimentService.batch(db=db) as batch:
+            batch.set_tags(experiment_service, [])
+            raise ValueError
+    assert experiment_service.get_tags() == ["copynet", "seq2seq"]
+
+
 def test_get_stdout(experiment_service):
     initial_check(experiment_service.e.stdout)
     stdout = experiment_service.get_stdout()
@@ -140,18 +194,218 @@ def test_get_epochs(experiment_service):
     assert epochs[9].metrics.data["training_duration"] == "0:02:04.405518"
     assert not epochs[0].metrics.should_read()
 
-    # Now change one of the epoch metric files.
-    new_data = deepcopy(epochs[0].metrics.data)
+    # Now change the metric file of the latest epoch.
+    new_data = deepcopy(epochs[9].metrics.data)
+    new_data["training_duration"] = "0:02:03.01"
+    with open(epochs[9].metrics.path, "w") as f:
+        json.dump(new_data, f)
+    epochs = experiment_service.get_epochs()
+    assert len(epochs) == 10
+    assert epochs[9].metrics.data["training_duration"] == "0:02:03.01"
+
+
+def test_get_epochs_only_checks_latest(experiment_service):
+    epochs = experiment_service.get_epochs()
+    assert len(epochs) == 10
+
+    # Metrics of earlier epochs are final, so they aren't read again.
+    new_data = deepcopy(epochs[1].metrics.data)
+    training_duration = new_data["training_duration"]
     new_data["training_duration"] = "0:00:12.06"
-    with open(epochs[0].metrics.path, "w") as f:
+    with open(epochs[1].metrics.path, "w") as f:
+        json.dump(new_data, f)
+    epochs = experiment_service.get_epochs()
+    assert epochs[1].metrics.data["training_duration"] == training_duration
+
+    # New epochs are picked up.
+    new_epoch_path = experiment_service.get_path() / "metrics_epoch_10.json"
+    new_data["epoch"] = 10
+    with open(new_epoch_path, "w") as f:
+        json.dump(new_data, f)
+    epochs = experiment_service.get_epochs()
+    assert len(epochs) == 11
+    assert epochs[10].metrics.data["epoch"] == 10
+
+    # Start over if the latest epoch disappears.
+    new_epoch_path.unlink()
+    epochs = experiment_service.get_epochs()
+    assert len(epochs) == 10
+    assert epochs[1].metrics.data["training_duration"] == "0:00:12.06"
+
+    # Or if the first epoch is written again, by a run restarted in the same
+    # directory.
+    new_data["epoch"] = 1
+    new_data["training_duration"] = "0:00:11.01"
+    with open(epochs[1].metrics.path, "w") as f:
         json.dump(new_data, f)
+    os.utime(epochs[0].metrics.path, (0, 0))
     epochs = experiment_service.get_epochs()
     assert len(epochs) == 10
-    assert epochs[0].metrics.data["training_duration"] == "0:00:12.06"
+    assert epochs[1].metrics.data["training_duration"] == "0:00:11.01"
+
+
+def test_get_epoch_metrics(project):
+    path = project / "test_experiment"
+    with tempfile.TemporaryDirectory() as cache_dirname:
+        cache_dir = Path(cache_dirname)
+        es = ExperimentService(path)
+        epoch_metrics = es.get_epoch_metrics(cache_dir)
+        assert epoch_metrics.epochs.tolist() == list(range(10))
+        assert epoch_metrics.columns["validation_loss"][9] == pytest.approx(
+            0.011555945791769773
+        )
+        assert "training_duration" not in epoch_metrics.columns
+
+        # Metrics are saved to a sidecar file that new services load from.
+        assert len(os.listdir(cache_dir)) == 1
+        loaded = ExperimentService(path).get_epoch_metrics(cache_dir)
+        assert loaded.epochs.tolist() == epoch_metrics.epochs.tolist()
+        assert loaded.lastmod == epoch_metrics.lastmod
+        assert (
+            loaded.columns["validation_loss"].tolist()
+            == epoch_metrics.columns["validation_loss"].tolist()
+        )
+
+        # New epochs are appended.
+        new_epoch_path = path / "metrics_epoch_10.json"
+        with open(new_epoch_path, "w") as f:
+            json.dump({"epoch": 10, "validation_loss": 0.01, "new_metric": 1}, f)
+        epoch_metrics = es.get_epoch_metrics(cache_dir)
+        assert epoch_metrics.epochs.tolist() == list(range(11))
+        assert epoch_metrics.columns["validation_loss"][10] == pytest.approx(0.01)
+        assert np.isnan(epoch_metrics.columns["training_loss"][10])
+        assert np.isnan(epoch_metrics.columns["new_metric"][:10]).all()
+
+        # Changes to the latest epoch are picked up.
+        with open(new_epoch_path, "w") as f:
+            json.dump({"epoch": 10, "validation_loss": 0.02}, f)
+        os.utime(new_epoch_path, (0, 0))
+        epoch_metrics = es.get_epoch_metrics(cache_dir)
+        assert epoch_metrics.columns["validation_loss"][10] == pytest.approx(0.02)
+        assert "new_metric" not in epoch_metrics.columns
+
+        # The sidecar file was updated.
+        loaded = ExperimentService(path).get_epoch_metrics(cache_dir)
+        assert loaded.columns["validation_loss"][10] == pytest.approx(0.02)
+
+        new_epoch_path.unlink()
+        epoch_metrics = es.get_epoch_metrics(cache_dir)
+        assert epoch_metrics.epochs.tolist() == list(range(10))
+
+
+def test_get_epoch_metrics_after_restart(experiment_copy):
+    path = experiment_copy.get_path()
+    with tempfile.TemporaryDirectory() as cache_dirname:
+        cache_dir = Path(cache_dirname)
+        experiment_copy.get_epoch_metrics(cache_dir)
+
+        # Restart the run in the same directory, and let it get as far as before.
+        for epoch in range(10):
+            with open(path / f"metrics_epoch_{epoch}.json", "w") as f:
+                json.dump({"epoch": epoch, "validation_loss": 1.0}, f)
+
+        # Neither the sidecar file nor the metrics in memory are from this run.
+        for es in (ExperimentService(path), experiment_copy):
+            epoch_metrics = es.get_epoch_metrics(cache_dir)
+            assert epoch_metrics.epochs.tolist() == list(range(10))
+            assert epoch_metrics.columns["validation_loss"].tolist() == [1.0] * 10
+            assert "training_loss" not in epoch_metrics.columns
+
+
+def test_from_cache(project):
+    path = project / "test_experiment"
+    experiment_cache.clear()
+    es1 = ExperimentService.from_cache(path)
+    es2 = ExperimentService.from_cache(path)
+    assert es1.e is es2.e
+    assert len(experiment_cache) == 1
+
+    # Data read by one service is available to the other.
+    es1.get_config()
+    assert not es2.e.config.should_read()
+
+    # Adding a file to the experiment directory invalidates the entry, except for the
+    # epochs, which check themselves for changes.
+    epochs = es1.get_epochs()
+    new_file = path / "new_file.txt"
+    new_file.touch()
+    mtime = os.stat(path).st_mtime
+    os.utime(path, (mtime + 1, mtime + 1))
+    es3 = ExperimentService.from_cache(path)
+    assert es3.e is not es1.e
+    assert es3.e.config.should_read()
+    assert es3.e.epochs is epochs
+    assert es3._lock is es1._lock
+    new_file.unlink()
+    experiment_cache.clear()
+
+
+def test_experiment_cache_evicts_least_recently_used():
+    cache = ExperimentCache(size=2)
+    experiments = {}
+    for name in ("a", "b", "c"):
+        experiments[name] = ExperimentService(Path(name)).e
+    cache.put("a", 0.0, experiments["a"], threading.Lock())
+    cache.put("b", 0.0, experiments["b"], threading.Lock())
+    assert cache.get("a")[1] is experiments["a"]
+    cache.put("c", 1.0, experiments["c"], threading.Lock())
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a")[1] is experiments["a"]
+    assert cache.get("c")[0] == 1.0
+
+
+def test_get_db_fields(experiment_service):
+    fields = dict(
+        zip(ExperimentService.DB_FIELD_NAMES, experiment_service.get_db_fields())
+    )
+    assert fields["finished"] == 1
+    assert fields["status"] == "FINISHED"
+    assert fields["epochs"] == 10
+    assert fields["best_epoch"] == 9
+    assert fields["training_duration"] == pytest.approx(124.405518)
+    assert fields["validation_metric"] == "-loss"
+    assert fields["best_validation_metric"] == pytest.approx(0.011555945791769773)
 
 
-def test_find_experiments(project):
-    exps = list(ExperimentService.find_experiments(project))
+@pytest.mark.parametrize(
+    "duration, result",
+    [
+        ("0:02:04.405518", 124.405518),
+        ("1 day, 0:00:01", 86401.0),
+        ("2 days, 1:00:00", 176400.0),
+        ("", None),
+        ("not a duration", None),
+    ],
+)
+def test_parse_duration(duration, result):
+    assert parse_duration(duration) == (
+        pytest.approx(result) if result is not None else None
+    )
+
+
+def test_get_config_document(experiment_service):
+    document = experiment_service.get_config_document()
+    assert "dataset_reader.type = copynet_seq2seq" in document.split("\n")
+
+
+@pytest.mark.parametrize(
+    "text, result",
+    [
+        ("bert-base-uncased", '"bert-base-uncased"'),
+        ("lr=2e-5", '"lr = 2e-05"'),
+        ("trainer.optimizer.lr=0.00002", '"trainer.optimizer.lr = 2e-05"'),
+        ("num_epochs=10 bert", '"num_epochs = 10" "bert"'),
+        ('say"what', '"say""what"'),
+    ],
+)
+def test_get_config_search_query(text, result):
+    assert get_config_search_query(text) == result
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_find_experiments(project, workers):
+    exps = list(ExperimentService.find_experiments(project, workers=workers))
     assert len(exps) == 1
     assert exps[0].e.path == Path("test_experiment")
 
@@ -222,6 +476,58 @@ def test_custom_func_hasalltags(db):
     assert len(rows) == 2
 
 
+@pytest.mark.parametrize(
+    "tags, match_all, result",
+    [
+        (["copynet", "copy"], True, ["greetings/copynet/run_002"]),
+        (["copynet"], True, ["greetings/copynet/run_001", "greetings/copynet/run_002"]),
+        (
+            ["copynet", "copy"],
+            False,
+            ["greetings/copynet/run_001", "greetings/copynet/run_002"],
+        ),
+        (
+            ["copynet", "beam-search"],
+            False,
+            [
+                "greetings/copynet/run_001",
+                "greetings/copynet/run_002",
+                "greetings/seq2seq/run_001",
+            ],
+        ),
+        (["simple"], False, []),
+    ],
+)
+def test_get_tags_filter(db, tags, match_all, result):
+    condition, args = ExperimentService.get_tags_filter(tags, match_all=match_all)
+    rows = db.execute(
+        f"SELECT path FROM {Tables.EXPERIMENTS.value} WHERE {condition} ORDER BY path",
+        args,
+    )
+    assert [row["path"] for row in rows] == result
+
+
+def test_tags_table_in_sync(entries):
+    db = _get_db(":memory:")
+    init_tables(db, (Tables.EXPERIMENTS.value,))
+    ExperimentService.init_db_table(db=db, entries=entries)
+    ExperimentService.write_db_entries(
+        db.cursor(), [("greetings/copynet/run_001", "copynet attention", 1)]
+    )
+    ExperimentService.delete_db_entries(db.cursor(), ["greetings/seq2seq/run_001"])
+    rows = db.execute(
+        f"SELECT path, tag FROM {ExperimentService.TAGS_TABLE} ORDER BY path, tag"
+    )
+    assert [tuple(row) for row in rows] == [
+        ("greetings/copynet/run_001", "attention"),
+        ("greetings/copynet/run_001", "copynet"),
+        ("greetings/copynet/run_002", "beam-search"),
+        ("greetings/copynet/run_002", "copy"),
+        ("greetings/copynet/run_002", "copynet"),
+        ("greetings/copynet/run_002", "seq2seq"),
+    ]
+
+
 def test_glob_by_path(db):
     rows = list(
         db.execute(
@@ -0,0 +1,48 @@
+from pathlib import Path
+import tempfile
+
+import pytest
+
+from mallennlp.domain.config import ProjectConfig, ServerConfig
+from mallennlp.services.config import Config
+from mallennlp.services.ignore import IgnoreMatcher
+
+
+@pytest.mark.parametrize(
+    "parent, name, result",
+    [
+        (".", "greetings", True),
+        (".", ".git", False),
+        ("greetings", ".ipynb_checkpoints", False),
+        ("greetings/run_001", "vocabulary", False),
+        (".", "venv", False),
+        ("greetings", "copynet", True),
+        ("greetings", "checkpoints_001", False),
+        ("data", "cache", False),
+        ("greetings", "cache", True),
+        ("greetings/copynet", "run_001", True),
+        ("greetings/copynet/run_001", "nested", False),
+    ],
+)
+def test_should_descend(parent, name, result):
+    matcher = IgnoreMatcher(
+        ["vocabulary", "venv", "checkpoints_*", "/data/cache/"], max_depth=3
+    )
+    assert matcher.should_descend(parent, name) is result
+
+
+def test_from_project():
+    with tempfile.TemporaryDirectory() as _tmpdirname:
+        root = Path(_tmpdirname)
+        config = Config(
+            ProjectConfig(root, ignore=["datasets"], max_depth=2), ServerConfig(root)
+        )
+        config.to_toml(root)
+        with open(root / ".mallennlpignore", "w") as ignore_file:
+            ignore_file.write("# Comment\n\nscratch/*\n")
+        matcher = IgnoreMatcher.from_project(root)
+        assert not matcher.should_descend(".", "datasets")
+        assert not matcher.should_descend("scratch", "run_001")
+        assert not matcher.should_descend("greetings/copynet", "run_001")
+        assert not matcher.should_descend("greetings", "vocabulary")
+        assert matcher.should_descend("greetings", "copynet")
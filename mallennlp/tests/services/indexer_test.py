@@ -0,0 +1,129 @@
+import os
+from pathlib import Path
+import shutil
+import tempfile
+
+import pytest
+
+from mallennlp.services.db import Tables
+from mallennlp.services.experiment import ExperimentService
+from mallennlp.services.indexer import ExperimentIndexer
+
+
+FIXTURE = "mallennlp/tests/fixtures/test_experiment"
+
+
+@pytest.fixture(scope="module")
+def project_path():
+    with tempfile.TemporaryDirectory() as _tmpdirname:
+        path = Path(_tmpdirname)
+        shutil.copytree(FIXTURE, path / "greetings" / "run_001")
+        shutil.copytree(FIXTURE, path / "greetings" / "run_002")
+        (path / ".git" / "objects").mkdir(parents=True)
+        shutil.copytree(FIXTURE, path / ".git" / "objects" / "not_an_experiment")
+        yield path
+
+
+@pytest.fixture(scope="module")
+def indexer(project_path, db):
+    # Don't consider any directories racy so that the updates are deterministic.
+    indexer = ExperimentIndexer(project_path, db)
+    indexer.RACY_MTIME_NS = -1
+    return indexer
+
+
+def indexed_paths(db):
+    return sorted(
+        row["path"]
+        for row in db.execute(f"SELECT path FROM {Tables.EXPERIMENTS.value}")
+    )
+
+
+def test_is_ready(db):
+    assert ExperimentIndexer.is_ready(db)
+
+
+def test_initial_update(indexer, db):
+    update = indexer.update()
+    assert update.added == ["greetings/run_001", "greetings/run_002"]
+    assert update.removed == []
+    assert update.changed == []
+    assert update.total == 2
+    assert indexed_paths(db) == ["greetings/run_001", "greetings/run_002"]
+
+
+def test_update_without_changes(indexer, db):
+    update = indexer.update()
+    assert update.added == []
+    assert update.removed == []
+    assert update.changed == []
+    assert update.total == 2
+
+
+def test_update_with_added_and_removed(indexer, project_path, db):
+    shutil.rmtree(project_path / "greetings" / "run_001")
+    shutil.copytree(FIXTURE, project_path / "greetings" / "nested" / "run_003")
+    update = indexer.update()
+    assert update.added == ["greetings/nested/run_003"]
+    assert update.removed == ["greetings/run_001"]
+    assert update.changed == []
+    assert indexed_paths(db) == ["greetings/nested/run_003", "greetings/run_002"]
+
+
+def test_update_with_changed(indexer, project_path, db):
+    os.remove(project_path / "greetings" / "run_002" / "metrics.json")
+    update = indexer.update()
+    assert update.changed == ["greetings/run_002"]
+    rows = list(
+        db.execute(
+            f"SELECT finished FROM {Tables.EXPERIMENTS.value} WHERE path = ?",
+            ("greetings/run_002",),
+        )
+    )
+    assert rows[0]["finished"] == 0
+
+
+def test_search_configs(indexer, project_path, db):
+    indexer.update()
+    condition, args = ExperimentService.get_config_filter(
+        "copynet_seq2seq max_decoding_steps=20"
+    )
+    rows = db.execute(
+        f"SELECT path FROM {Tables.EXPERIMENTS.value} WHERE {condition} ORDER BY path",
+        args,
+    )
+    assert [row["path"] for row in rows] == [
+        "greetings/nested/run_003",
+        "greetings/run_002",
+    ]
+
+    condition, args = ExperimentService.get_config_filter("max_decoding_steps=21")
+    rows = db.execute(
+        f"SELECT path FROM {Tables.EXPERIMENTS.value} WHERE {condition}", args
+    )
+    assert list(rows) == []
+
+
+@pytest.mark.parametrize(
+    "key, operator, values, result",
+    [
+        ("trainer.num_epochs", "=", ["10"], True),
+        ("trainer.num_epochs", ">", ["10"], False),
+        ("trainer.num_epochs", "in", ["5", "10"], True),
+        ("model.type", "=", ["copynet_seq2seq"], True),
+        ("model.type", "contains", ["copynet"], True),
+        ("model.type", "in", ["simple_seq2seq", "bart"], False),
+        ("model.type", "<", ["copynet"], False),
+        ("not.a.param", "=", ["10"], False),
+    ],
+)
+def test_param_filter(indexer, db, key, operator, values, result):
+    condition, args = ExperimentService.get_param_filter(key, operator, values)
+    rows = db.execute(
+        f"SELECT path FROM {Tables.EXPERIMENTS.value} WHERE {condition} ORDER BY path",
+        args,
+    )
+    paths = [row["path"] for row in rows]
+    assert paths == (
+        ["greetings/nested/run_003", "greetings/run_002"] if result else []
+    )
@@ -0,0 +1,130 @@
+import io
+import os
+from pathlib import Path
+import tempfile
+
+import pytest
+
+from mallennlp.services import line_index
+from mallennlp.services.line_index import LineIndex, LineIndexCache, load_line_index
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    monkeypatch.setattr(line_index, "BLOCK_SIZE", 7)
+
+
+def test_line_index(small_blocks):
+    data = b"".join(f"line {i}\n".encode() for i in range(100))
+    index = LineIndex(interval=10)
+    index.extend(io.BytesIO(data[:333]))
+    index.extend(io.BytesIO(data))
+    assert index.n_lines == 100
+    assert index.end == len(data)
+    # Line 100 is the empty line at the end of the file.
+    assert index.checkpoints == [
+        data.index(b"line %d\n" % i) for i in range(0, 100, 10)
+    ] + [len(data)]
+    f = io.BytesIO(data)
+    for offset in (0, 1, 6, 7, 100, 333, len(data)):
+        assert index.count_lines(f, offset) == data[:offset].count(b"\n")
+    with pytest.raises(ValueError):
+        index.count_lines(f, len(data) + 1)
+
+
+def test_line_index_cache():
+    cache = LineIndexCache(size=1)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "stdout.log")
+        with open(path, "wb") as f:
+            f.write(b"a\nb\n")
+        with open(path, "rb") as f:
+            index = cache.get(path, f)
+        assert index.n_lines == 2
+
+        # Extended as the file grows.
+        with open(path, "ab") as f:
+            f.write(b"c\n")
+        with open(path, "rb") as f:
+            assert cache.get(path, f) is index
+        assert index.n_lines == 3
+
+        # Rebuilt when the file is truncated.
+        with open(path, "wb") as f:
+            f.write(b"d\n")
+        with open(path, "rb") as f:
+            assert cache.get(path, f).n_lines == 1
+
+        # Also when it's rewritten past where it was indexed up to.
+        with open(path, "wb") as f:
+            f.write(b"eeee\nf\n")
+        with open(path, "rb") as f:
+            assert cache.get(path, f).n_lines == 2
+
+
+def test_find_line(small_blocks):
+    data = b"".join(f"line {i}\n".encode() for i in range(100))
+    f = io.BytesIO(data)
+    index = LineIndex(interval=10)
+    index.extend(f)
+    for line in (0, 1, 9, 10, 55, 99):
+        offset = index.find_line(f, line)
+        assert data[offset:].startswith(b"line %d\n" % line)
+    assert index.find_line(f, 100) == len(data)
+    assert index.find_line(f, 101) is None
+
+
+def test_line_index_sidecar():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "stdout.log")
+        cache_dir = Path(tmpdir) / "line_index"
+        with open(path, "wb") as f:
+            f.write(b"a\nb\n")
+        with open(path, "rb") as f:
+            LineIndexCache().get(path, f, cache_dir=cache_dir)
+        sidecars = list(cache_dir.glob("*.npz"))
+        assert len(sidecars) == 1
+
+        # A new process picks up where the last one left off.
+        with open(path, "ab") as f:
+            f.write(b"c\n")
+        with open(path, "rb") as f:
+            inode = os.fstat(f.fileno()).st_ino
+            assert load_line_index(sidecars[0], inode).end == 4
+            index = LineIndexCache().get(path, f, cache_dir=cache_dir)
+        assert index.n_lines == 3
+        assert load_line_index(sidecars[0], inode).end == 6
+        assert load_line_index(sidecars[0], inode + 1) is None
+
+
+def test_line_index_sidecars_are_pruned(monkeypatch):
+    monkeypatch.setattr(line_index, "LINE_INDEX_CACHE_SIZE", 2)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache_dir = Path(tmpdir) / "line_index"
+        cache = LineIndexCache()
+        path = os.path.join(tmpdir, "stdout.log")
+        with open(path, "wb") as f:
+            f.write(b"a\nb\n")
+        with open(path, "rb") as old_f:
+            cache.get(path, old_f, cache_dir=cache_dir)
+            old_sidecars = set(cache_dir.glob("*.npz"))
+
+            # The sidecar of a file that was replaced is removed. The old file is
+            # kept open so its inode isn't reused.
+            with open(path + ".new", "wb") as f:
+                f.write(b"c\n")
+            os.replace(path + ".new", path)
+            with open(path, "rb") as f:
+                cache.get(path, f, cache_dir=cache_dir)
+        sidecars = set(cache_dir.glob("*.npz"))
+        assert len(sidecars) == 1
+        assert not sidecars & old_sidecars
+
+        # Only the most recently saved ones are kept.
+        for i in range(3):
+            other_path = os.path.join(tmpdir, f"{i}.log")
+            with open(other_path, "wb") as f:
+                f.write(b"d\n")
+            with open(other_path, "rb") as f:
+                cache.get(other_path, f, cache_dir=cache_dir)
+        assert len(list(cache_dir.glob("*.npz"))) == 2
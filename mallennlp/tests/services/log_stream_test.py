@@ -1,6 +1,18 @@
+from collections import deque
+import json
+import os
 from pathlib import Path
+import re
+import subprocess
+import sys
+import tempfile
 
+import pytest
+
+from mallennlp.services import line_index, log_stream
+from mallennlp.services.line_index import LineIndexCache
 from mallennlp.services.log_stream import LogStreamService
+from mallennlp.services.serde import serialize, deserialize
 
 
 def test_stream_stdout_log():
@@ -16,8 +28,9 @@ def test_stream_stdout_log():
     )
     assert s.should_read()
 
-    # Just make sure this was initialized correctly with the attr factory.
-    assert isinstance(s._lines, list)
+    # Just make sure the ring buffer was initialized correctly.
+    assert isinstance(s._lines, deque)
+    assert s._lines.maxlen == s.max_lines
 
     # First read, lines 1 - 50.
     lines = s.readlines()
@@ -96,3 +109,316 @@ def test_small_lines_block_size_1():
     assert lines == []
     lines = s.readlines()
     assert [l.content for l in lines] == all_lines[0:1]
+
+
+def test_serialized_state_excludes_lines():
+    path = "mallennlp/tests/fixtures/test_experiment/stdout.log"
+    with open(path) as f:
+        all_lines = [line.strip() for line in f]
+    s = LogStreamService(path, max_lines=100, max_lines_per_update=50, max_block_size=8)
+    s.readlines()
+
+    data = serialize(s)
+    assert "_lines" not in json.loads(data)
+    assert len(data) < 500
+
+    # Picks up where the last one left off, with only the new lines.
+    s = deserialize(LogStreamService, data)
+    assert s.current_line_number == 50
+    lines = s.readlines()
+    assert len(lines) == 50
+    assert lines[0].number == 51
+    assert lines[0].content == all_lines[50]
+
+
+def test_read_tail_and_before():
+    path = "mallennlp/tests/fixtures/test_experiment/stdout.log"
+    with open(path) as f:
+        all_lines = [line.strip() for line in f]
+    s = LogStreamService(path, max_lines=100)
+    lines = s.read_tail()
+    assert [line.content for line in lines] == all_lines[-100:]
+    assert [line.number for line in lines] == list(range(316, 416))
+    assert s.has_earlier_lines
+
+    # Nothing new to read.
+    assert s.readlines() == lines
+
+    lines = s.read_before(300)
+    assert [line.content for line in lines] == all_lines[15:315]
+    assert lines[0].number == 16
+    lines = s.read_before(300)
+    assert [line.number for line in lines] == list(range(1, 16))
+    assert not s.has_earlier_lines
+    assert s.read_before() == []
+
+
+def test_read_tail_estimates_line_numbers(monkeypatch):
+    # Too big to index right away, so it's indexed in the background.
+    monkeypatch.setattr(line_index, "SYNC_INDEX_SIZE", 1024)
+    monkeypatch.setattr(log_stream, "line_index_cache", LineIndexCache())
+    path = "mallennlp/tests/fixtures/test_experiment/stdout.log"
+    with open(path) as f:
+        all_lines = [line.strip() for line in f]
+    s = LogStreamService(path, max_lines=100)
+    lines = s.read_tail()
+    assert [line.content for line in lines] == all_lines[-100:]
+    assert all(line.approximate for line in lines)
+    assert [line.number for line in lines] == list(
+        range(lines[0].number, lines[0].number + 100)
+    )
+
+    # Wait for it to be indexed, after which the line numbers are corrected.
+    with open(path, "rb") as f:
+        log_stream.line_index_cache.get(path, f)
+    lines = s.read_before(10)
+    assert [line.content for line in lines] == all_lines[305:315]
+    assert [line.number for line in lines] == list(range(306, 316))
+    assert not any(line.approximate for line in lines)
+    lines = s.readlines()
+    assert [line.number for line in lines] == list(range(316, 416))
+    assert not any(line.approximate for line in lines)
+
+
+def test_read_tail_partial_line():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "stdout.log")
+        with open(path, "w") as f:
+            f.write("a\nb\nc")
+        s = LogStreamService(path, max_lines=5)
+        assert [(line.content, line.number) for line in s.read_tail()] == [
+            ("a", 1),
+            ("b", 2),
+        ]
+        with open(path, "a") as f:
+            f.write("d\ne\n")
+        assert s.should_read()
+        assert [(line.content, line.number) for line in s.readlines()][-2:] == [
+            ("cd", 3),
+            ("e", 4),
+        ]
+
+
+def test_read_range():
+    path = "mallennlp/tests/fixtures/test_experiment/stdout.log"
+    with open(path) as f:
+        all_lines = [line.strip() for line in f]
+    s = LogStreamService(path, max_lines=100)
+    lines = s.read_range(200, 209)
+    assert [line.content for line in lines] == all_lines[199:209]
+    assert [line.number for line in lines] == list(range(200, 210))
+
+    # Scrolls back and streams on from there.
+    assert [line.number for line in s.read_before(5)] == list(range(195, 200))
+    lines = s.readlines()
+    assert [line.number for line in lines][-1] == 415
+    assert lines[-1].content == all_lines[-1]
+
+    assert [line.number for line in s.read_range(410)] == list(range(410, 416))
+
+
+@pytest.mark.parametrize(
+    "pattern, has_prefilter",
+    [
+        ("tensorboard_writer", True),
+        ("Validating", True),
+        ("(?i)validating", False),
+        ("WARNING|ERROR", True),
+        ("^2019.*WARNING", False),
+        (r"loss\s+\|\s+\d", False),
+        ("Validating.*", False),
+        (r"training\.tensorboard_writer", True),
+        (r"[^a]tensorboard_writer", False),
+    ],
+)
+def test_search(monkeypatch, pattern, has_prefilter):
+    monkeypatch.setattr(log_stream, "SEARCH_BLOCK_SIZE", 100)
+    path = "mallennlp/tests/fixtures/test_experiment/stdout.log"
+    regex = re.compile(pattern)
+    with open(path) as f:
+        expected = [
+            (line.strip(), i + 1)
+            for i, line in enumerate(f)
+            if regex.search(line.strip())
+        ]
+    assert expected
+    assert (log_stream.get_prefilter(regex) is not None) == has_prefilter
+    s = LogStreamService(path)
+    assert [(line.content, line.number) for line in s.search(regex)] == expected
+
+    # Only up to the current position.
+    s.read_range(1, 200)
+    assert [line.number for line in s.search(regex)] == [
+        number for _, number in expected if number <= 200
+    ]
+
+    # In steps of one block, each continuing where the last one stopped.
+    cursor = s.get_search_cursor()
+    lines = []
+    while not cursor.done:
+        stops = iter([False, True])
+        lines.extend(s.search(regex, should_stop=lambda: next(stops), cursor=cursor))
+    assert [line.number for line in lines] == [
+        number for _, number in expected if number <= 200
+    ]
+
+    # Cancelled after the first block.
+    assert list(s.search(regex, should_stop=lambda: True)) == []
+
+
+def test_search_non_ascii_characters():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "stdout.log")
+        with open(path, "w") as f:
+            f.write("loss→val\nloss_val\nloss\n")
+        s = LogStreamService(path)
+        assert [line.number for line in s.search(re.compile("loss.val"))] == [1, 2]
+        assert [line.number for line in s.search(re.compile("loss[^_]"))] == [1]
+
+
+@pytest.mark.parametrize(
+    "pattern, expected",
+    [
+        ("(?u)caf", [1, 2]),
+        ("(?a:caf)", [1, 2]),
+        (r"caf\xe9", [1]),
+        (r"caf\351", [1]),
+        (r"caf[\xe0-\xff]", [1]),
+    ],
+)
+def test_search_without_prefilter(pattern, expected):
+    regex = re.compile(pattern)
+    assert log_stream.get_prefilter(regex) is None
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "stdout.log")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("café ok\ncafe\n")
+        s = LogStreamService(path)
+        assert [line.number for line in s.search(regex)] == expected
+
+
+@pytest.mark.parametrize(
+    "max_lines, max_lines_per_update", [(None, None), (100, None), (100, 30), (5, 1)]
+)
+def test_binary_reader(monkeypatch, max_lines, max_lines_per_update):
+    monkeypatch.setattr(log_stream, "SCAN_BLOCK_SIZE", 64)
+    path = "mallennlp/tests/fixtures/test_experiment/stdout.log"
+    kwargs = dict(max_lines=max_lines, max_lines_per_update=max_lines_per_update)
+    s = LogStreamService(path, **kwargs)
+    # Reading a character at a time stops right at `max_lines_per_update`.
+    expected = LogStreamService(path, max_block_size=1, **kwargs)
+    while True:
+        lines = s.readlines()
+        assert lines == expected.readlines()
+        assert s.current_line_number == expected.current_line_number
+        if s._at_eof:
+            break
+    assert s.current_line_number == 415
+    assert expected._at_eof
+
+
+def test_binary_reader_partial_lines_and_truncation():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "stdout.log")
+        open(path, "w").close()
+        s = LogStreamService(path, max_lines=10)
+        assert s.readlines() == []
+        with open(path, "w") as f:
+            f.write("a\nb")
+        assert [l.content for l in s.readlines()] == ["a"]
+        assert s._position == 2
+        with open(path, "a") as f:
+            f.write("c\n")
+        assert [(l.content, l.number) for l in s.readlines()][-1] == ("bc", 2)
+
+        # Truncated by a restarted run.
+        with open(path, "w") as f:
+            f.write("x\n")
+        assert [(l.content, l.number) for l in s.readlines()][-1] == ("x", 1)
+
+        # Rotated, and replaced by a new file that's just as big.
+        os.rename(path, path + ".1")
+        with open(path, "w") as f:
+            f.write("y\nz\n\n")
+        assert [(l.content, l.number) for l in s.readlines()][-3:] == [
+            ("y", 1),
+            ("z", 2),
+            ("", 3),
+        ]
+
+
+LOG_WRITER = """
+import os
+import sys
+
+path = sys.argv[1]
+for command in sys.stdin:
+    name, *args = command.split()
+    if name == "write":
+        with open(path, "a") as f:
+            for i in range(int(args[0]), int(args[1])):
+                f.write(f"{args[2]} line {i}\\n")
+    elif name == "partial":
+        with open(path, "a") as f:
+            f.write(args[0])
+    elif name == "restart":
+        open(path, "w").close()
+    elif name == "rotate":
+        os.rename(path, path + ".1")
+    print("done", flush=True)
+"""
+
+
+@pytest.mark.parametrize("max_block_size", [-1, 4096])
+def test_follow_restarts_and_rotation(max_block_size):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "stdout.log")
+        writer = subprocess.Popen(
+            [sys.executable, "-c", LOG_WRITER, path],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        )
+
+        def run(*commands):
+            for command in commands:
+                writer.stdin.write(command + "\n")
+                writer.stdin.flush()
+                assert writer.stdout.readline() == "done\n"
+
+        def read_new_lines():
+            # Like the log-stream page, which only keeps the serialized state.
+            nonlocal s
+            s = deserialize(LogStreamService, serialize(s))
+            assert s.should_read()
+            return [(l.content, l.number) for l in s.readlines()]
+
+        try:
+            run("write 0 50 run1")
+            s = LogStreamService(path, max_block_size=max_block_size)
+            assert read_new_lines() == [(f"run1 line {i}", i + 1) for i in range(50)]
+
+            # Restarted with a shorter log.
+            run("restart", "write 0 20 run2")
+            assert read_new_lines() == [(f"run2 line {i}", i + 1) for i in range(20)]
+
+            # Restarted, with the new log already longer than what was read.
+            run("restart", "write 0 80 run3")
+            assert read_new_lines() == [(f"run3 line {i}", i + 1) for i in range(80)]
+
+            # Rotated, with lines that weren't read yet.
+            run("write 80 90 run3", "partial run3-last", "rotate")
+            s = deserialize(LogStreamService, serialize(s))
+            assert not s.should_read()
+            assert s.readlines() == []
+            run("write 0 5 run4")
+            assert read_new_lines() == [
+                (f"run3 line {i}", i + 1) for i in range(80, 90)
+            ] + [("run3-last", 91)] + [(f"run4 line {i}", i + 1) for i in range(5)]
+
+            # Nothing changed.
+            s = deserialize(LogStreamService, serialize(s))
+            assert not s.should_read()
+        finally:
+            writer.stdin.close()
+            writer.wait()
@@ -0,0 +1,12 @@
+import pytest
+
+from mallennlp.services.scanner import parallel_walk
+
+
+TREE = {0: [1, 2], 1: [3, 4], 2: [5], 3: [], 4: [6], 5: [], 6: []}
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_parallel_walk(workers):
+    results = list(parallel_walk([0], lambda n: (n * 10, TREE[n]), workers=workers))
+    assert sorted(results) == [0, 10, 20, 30, 40, 50, 60]
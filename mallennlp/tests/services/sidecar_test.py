@@ -0,0 +1,25 @@
+import os
+from pathlib import Path
+import tempfile
+
+from mallennlp.services.sidecar import prune_sidecars
+
+
+def test_prune_sidecars():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        directory = Path(tmpdirname)
+        for i in range(5):
+            path = directory / f"{i}.npz"
+            path.touch()
+            os.utime(path, (i, i))
+        (directory / "0.npz.123.tmp").touch()
+        os.utime(directory / "0.npz.123.tmp", (0, 0))
+
+        prune_sidecars(directory, 5)
+        assert len(os.listdir(directory)) == 6
+
+        prune_sidecars(directory, 2)
+        assert sorted(os.listdir(directory)) == ["0.npz.123.tmp", "3.npz", "4.npz"]
+
+    # Nothing to prune if nothing was saved yet.
+    prune_sidecars(directory, 2)
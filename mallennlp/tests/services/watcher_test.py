@@ -0,0 +1,89 @@
+import json
+from pathlib import Path
+import shutil
+import tempfile
+
+import pytest
+
+from mallennlp.services.db import Tables
+from mallennlp.services.watcher import ExperimentWatcher, Inotify
+
+
+FIXTURE = "mallennlp/tests/fixtures/test_experiment"
+
+
+@pytest.fixture(scope="function")
+def project_path():
+    with tempfile.TemporaryDirectory() as _tmpdirname:
+        path = Path(_tmpdirname)
+        shutil.copytree(FIXTURE, path / "greetings" / "run_001")
+        yield path
+
+
+def get_row(db, path):
+    return db.execute(
+        f"SELECT * FROM {Tables.EXPERIMENTS.value} WHERE path = ?", (path,)
+    ).fetchone()
+
+
+@pytest.mark.parametrize(
+    "fname, result",
+    [
+        ("config.json", True),
+        ("meta.json", True),
+        ("metrics.json", True),
+        ("metrics_epoch_10.json", True),
+        ("metrics_epoch_.json", False),
+        ("stdout.log", False),
+    ],
+)
+def test_is_watched_file(fname, result):
+    assert ExperimentWatcher.is_watched_file(fname) is result
+
+
+def test_poll_backend(project_path, db):
+    watcher = ExperimentWatcher(db, project_path, interval=0.1, backend="poll")
+    watcher.indexer.RACY_MTIME_NS = -1
+    watcher.open()
+    assert watcher.backend == "poll"
+    watcher.poll(0.0)
+    watcher.flush()
+    assert get_row(db, "greetings/run_001") is not None
+
+    shutil.copytree(FIXTURE, project_path / "greetings" / "run_002")
+    watcher.poll(0.0)
+    watcher.flush()
+    assert get_row(db, "greetings/run_002") is not None
+    watcher.close()
+
+
+@pytest.mark.skipif(not Inotify.is_available(), reason="inotify not available")
+def test_inotify_backend(project_path, db):
+    watcher = ExperimentWatcher(db, project_path, interval=0.1, backend="inotify")
+    watcher.open()
+    assert watcher.backend == "inotify"
+    watcher._needs_update = True
+    watcher.flush()
+    assert get_row(db, "greetings/run_001") is not None
+
+    # New experiment.
+    shutil.copytree(FIXTURE, project_path / "greetings" / "run_002")
+    watcher.poll(0.1)
+    assert watcher._needs_update
+    watcher.flush()
+    assert get_row(db, "greetings/run_002") is not None
+
+    # Tags changed outside of the manager.
+    with open(project_path / "greetings" / "run_002" / "meta.json", "w") as f:
+        json.dump({"tags": ["copynet"]}, f)
+    watcher.poll(0.1)
+    assert watcher._dirty == {"greetings/run_002"}
+    watcher.flush()
+    assert get_row(db, "greetings/run_002")["tags"] == "copynet"
+
+    # Experiment removed.
+    shutil.rmtree(project_path / "greetings" / "run_001")
+    watcher.poll(0.1)
+    watcher.flush()
+    assert get_row(db, "greetings/run_001") is None
+    watcher.close()
@@ -6,7 +6,7 @@ import pytest
 
 from mallennlp.bin.main import main
 from mallennlp.domain.user import Permissions
-from mallennlp.services.db import get_db_from_cli
+from mallennlp.services.db import Tables, get_db_from_cli
 from mallennlp.services.config import Config
 from mallennlp.services.user import UserService
 
@@ -148,3 +148,25 @@ def test_user_password_changed(user_service):
     assert user is not None
     # Alternate id should have been incremented.
     assert user.alt_id == 1
+
+
+def test_add_and_remove_tags(runner, db):
+    shutil.copytree(
+        os.path.join(
+            os.path.dirname(__file__), "../mallennlp/tests/fixtures/test_experiment"
+        ),
+        "run_001",
+    )
+    result = runner.invoke(
+        main, ["tags", "add", "run_001", "--tag=copynet", "--tag=seq2seq"]
+    )
+    assert result.exit_code == 0, result.output
+    result = runner.invoke(main, ["tags", "remove", "run_001", "--tag=copynet"])
+    assert result.exit_code == 0, result.output
+    rows = db.execute(
+        f"SELECT tags FROM {Tables.EXPERIMENTS.value} WHERE path = ?", ("run_001",)
+    )
+    assert [row["tags"] for row in rows] == ["seq2seq"]
+
+    result = runner.invoke(main, ["tags", "add", "not_an_experiment", "--tag=x"])
+    assert result.exit_code == 2